@@ -0,0 +1,542 @@
+import json
+import os
+import sys
+import time
+import shutil
+import struct
+import logging
+import threading
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.core.work_queue import BoundedWorkQueue
+from src.core.index_builder import IndexBuilder, index_categories
+from src.core.page_generator import PageGenerator
+from src.core.embed_checker import is_dead
+from src.storage import create_store, AssetPack
+
+ISSUE_KINDS = ("orphaned", "missing", "truncated", "inconsistent")
+ASSET_FIELDS = ("thumbnailUrl", "previewUrl", "previewVideoUrl")
+ASSET_URL_PREFIX = "/games/assets/"
+
+
+def check_asset_file(path: str, size: int):
+    """
+    检查资源文件是否完整，完整时返回None，否则返回原因
+    只读取文件头尾，不解码整个文件
+    """
+    if size == 0:
+        return "空文件"
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "rb") as f:
+        head = f.read(16)
+        f.seek(max(0, size - 32))
+        tail = f.read()
+    if ext in (".jpg", ".jpeg"):
+        if not head.startswith(b"\xff\xd8"):
+            return "JPEG文件头无效"
+        # EOI之后允许有填充或附加数据，需要按段结构查找，不能只看文件末尾
+        if not _jpeg_has_eoi(path):
+            return "JPEG缺少结束标记"
+    elif ext == ".png":
+        if not head.startswith(b"\x89PNG") or b"IEND" not in tail:
+            return "PNG缺少IEND块"
+    elif ext == ".gif":
+        if not head.startswith(b"GIF8") or not tail.rstrip(b"\x00").endswith(b"\x3b"):
+            return "GIF缺少结束标记"
+    elif ext == ".webp":
+        if head[:4] != b"RIFF" or head[8:12] != b"WEBP":
+            return "WebP文件头无效"
+        if struct.unpack("<I", head[4:8])[0] + 8 > size:
+            return "WebP数据不完整"
+    elif ext == ".mp4":
+        return _check_mp4_boxes(path, size)
+    return None
+
+
+def _jpeg_has_eoi(path: str) -> bool:
+    """
+    按段结构查找JPEG的EOI标记：跳过带长度的段(EXIF等段中可能包含内嵌缩略图的EOI)，
+    在压缩数据中跳过填充字节(FF00)和RST标记，遇到的第一个EOI才是主图像的结束
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 2
+    size = len(data)
+    while offset + 4 <= size:
+        if data[offset] != 0xFF:
+            return False
+        marker = data[offset + 1]
+        if marker == 0xFF:  # 段之间允许任意个FF填充
+            offset += 1
+            continue
+        if marker == 0xD9:
+            return True
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            offset += 2
+            continue
+        length = struct.unpack(">H", data[offset + 2:offset + 4])[0]
+        offset += 2 + length
+        if marker != 0xDA:
+            continue
+        # SOS之后是压缩数据，直到下一个不是FF00/RST的标记
+        while True:
+            offset = data.find(b"\xff", offset)
+            if offset < 0 or offset + 1 >= size:
+                return False
+            following = data[offset + 1]
+            if following == 0x00 or 0xD0 <= following <= 0xD7 or following == 0xFF:
+                offset += 1 if following == 0xFF else 2
+                continue
+            break
+    return offset + 1 < size and data[offset:offset + 2] == b"\xff\xd9"
+
+
+def _check_mp4_boxes(path: str, size: int):
+    """遍历MP4顶层box，box长度之和应正好等于文件大小"""
+    offset = 0
+    seen = set()
+    with open(path, "rb") as f:
+        while offset < size:
+            f.seek(offset)
+            header = f.read(16)
+            if len(header) < 8:
+                return f"MP4在偏移量{offset}处截断"
+            box_size, box_type = struct.unpack(">I4s", header[:8])
+            if box_size == 1:
+                if len(header) < 16:
+                    return f"MP4在偏移量{offset}处截断"
+                box_size = struct.unpack(">Q", header[8:16])[0]
+            elif box_size == 0:
+                box_size = size - offset
+            if box_size < 8:
+                return f"MP4 box长度无效: {box_type!r}"
+            if offset + box_size > size:
+                return f"MP4的{box_type.decode('latin-1')} box超出文件末尾"
+            seen.add(box_type)
+            offset += box_size
+    if b"moov" not in seen:
+        return "MP4缺少moov box"
+    return None
+
+
+class CatalogVerifier:
+    """
+    目录完整性检查和修复
+
+    并发扫描每个游戏的元数据和资源文件，报告四类问题:
+    - orphaned: 没有元数据的资源目录、未被引用的资源文件、索引中没有元数据的游戏、残留的.tmp文件
+    - missing: 缺少info/stats等文档、元数据引用的资源文件不存在、游戏不在索引中
+    - truncated: 资源文件不完整(空文件、缺少结束标记、MP4 box越界)、文档无法解析
+    - inconsistent: ID不一致、game.json与info.json不同、索引与元数据不同、进度文件重复记录
+
+    每个游戏的检查结果按文件大小和修改时间缓存，未变化的游戏直接沿用上次结果。
+    repair() 修复可修复的问题，并由元数据目录重建索引和进度文件。
+    """
+
+    def __init__(self, metadata_dir="games/metadata", assets_dir="games/assets",
+                 progress_file="crawl_progress.json", storage=None, workers=16,
+                 cache_file="games/cache/verify_cache.json", report_file="games/cache/verify_report.json",
+                 pack_dir="games/packs", quarantine_dir="games/cache/quarantine"):
+        """
+        :param metadata_dir: 元数据目录
+        :param assets_dir: 资源目录
+        :param progress_file: 爬取进度文件
+        :param storage: 元数据存储(CatalogStore)，默认为metadata_dir下的JSON目录
+        :param workers: 扫描线程数
+        :param cache_file: 扫描结果缓存
+        :param report_file: 检查报告输出文件
+        :param pack_dir: 资源包目录，资源目录中缺少但资源包中存在的文件不算缺失
+        :param quarantine_dir: 修复时损坏的资源文件移到这里，不直接删除
+        """
+        self.metadata_dir = metadata_dir
+        self.assets_dir = assets_dir
+        self.progress_file = progress_file
+        self.index_file = os.path.join(metadata_dir, "index.json")
+        self.storage = storage or create_store("json", metadata_dir=metadata_dir)
+        self.workers = workers
+        self.cache_file = cache_file
+        self.report_file = report_file
+        self.quarantine_dir = quarantine_dir
+        self.pack = AssetPack(pack_dir) if os.path.exists(os.path.join(pack_dir, "index.log")) else None
+        self.logger = logging.getLogger(__name__)
+
+        self.cache = {}
+        self.records = {}   # 游戏ID -> 扫描结果
+        self.lock = threading.Lock()
+
+    # ---- 扫描 ----
+
+    def _fingerprint(self, game_id: str):
+        """
+        元数据各文档的版本标识(由存储提供，JSON目录和SQLite都适用)，
+        以及资源目录下全部文件的(相对路径, 大小, 修改时间)
+        """
+        entries = [["m", kind, version] for kind, version in self.storage.versions(game_id).items()]
+        root = os.path.join(self.assets_dir, game_id)
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append(["a", os.path.relpath(path, root), stat.st_size, stat.st_mtime_ns])
+        return sorted(entries)
+
+    def scan_game(self, game_id: str):
+        """检查单个游戏，返回 {fingerprint, issues, record}"""
+        fingerprint = self._fingerprint(game_id)
+        cached = self.cache.get(game_id)
+        if cached and cached.get("fingerprint") == fingerprint:
+            return cached, True
+
+        issues = []
+
+        def issue(kind, target, detail):
+            issues.append({"kind": kind, "gameId": game_id, "target": target, "detail": detail})
+
+        docs = {}
+        for kind in ("info", "game", "stats", "comments"):
+            docs[kind] = self.storage.get(game_id, kind)
+            if docs[kind] is None:
+                if self.storage.exists(game_id, kind):
+                    issue("truncated", f"{kind}.json", "无法解析")
+                elif kind != "game":
+                    issue("missing", f"{kind}.json", "文档不存在")
+
+        info, stats = docs["info"], docs["stats"]
+        record = None
+        if info is not None:
+            if info.get("id") != game_id:
+                issue("inconsistent", "info.json", f"id为{info.get('id')!r}，与目录名不同")
+            if docs["game"] is not None and docs["game"] != info:
+                issue("inconsistent", "game.json", "与info.json内容不同")
+            elif docs["game"] is None:
+                issue("missing", "game.json", "缓存副本不存在")
+            if stats is not None and stats.get("id") not in (None, game_id):
+                issue("inconsistent", "stats.json", f"id为{stats.get('id')!r}，与目录名不同")
+
+            referenced = set()
+            for field in ASSET_FIELDS:
+                url = info.get(field)
+                if url and url.startswith(ASSET_URL_PREFIX):
+                    referenced.add(url[len(ASSET_URL_PREFIX):])
+                    self._check_reference(url[len(ASSET_URL_PREFIX):], field, issue)
+            for url in info.get("screenshots") or []:
+                if isinstance(url, str) and url.startswith(ASSET_URL_PREFIX):
+                    referenced.add(url[len(ASSET_URL_PREFIX):])
+                    self._check_reference(url[len(ASSET_URL_PREFIX):], "screenshots", issue)
+
+            for kind, rel_path, *_ in fingerprint:
+                if kind != "a":
+                    continue
+                key = f"{game_id}/{rel_path.replace(os.sep, '/')}"
+                if rel_path.endswith(".tmp"):
+                    issue("orphaned", key, "下载中断残留的临时文件")
+                elif key not in referenced:
+                    issue("orphaned", key, "资源文件未被元数据引用")
+
+            stats = stats or {}
+            record = {
+                "id": game_id,
+                "title": info.get("title", ""),
+                "category": info.get("category", ""),
+                "rating": stats.get("rating", 0) or 0,
+                "plays": stats.get("plays", 0) or 0,
+                "thumbnailUrl": info.get("thumbnailUrl", ""),
+                "added": info.get("addedDate", ""),
+                "embedUrls": sorted({url for url in (info.get("url"), info.get("gameUrl")) if url}),
+                "health": info.get("health"),
+            }
+        elif any(kind == "a" for kind, *_ in fingerprint):
+            issue("orphaned", f"{game_id}/", "资源目录没有对应的元数据")
+
+        return {"fingerprint": fingerprint, "issues": issues, "record": record}, False
+
+    def _check_reference(self, key: str, field: str, issue):
+        path = os.path.join(self.assets_dir, *key.split("/"))
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            if not (self.pack and key in self.pack):
+                issue("missing", key, f"{field}引用的文件不存在")
+            return
+        reason = check_asset_file(path, size)
+        if reason:
+            issue("truncated", key, reason)
+
+    def load_cache(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"读取检查缓存失败: {str(e)}")
+            return {}
+
+    def save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_path = self.cache_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.records, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_file)
+
+    def _game_ids(self):
+        ids = set(self.storage.game_ids())
+        if os.path.isdir(self.assets_dir):
+            ids.update(name for name in os.listdir(self.assets_dir)
+                       if os.path.isdir(os.path.join(self.assets_dir, name)))
+        return sorted(ids)
+
+    def verify(self):
+        """扫描整个目录，返回检查报告"""
+        start_time = time.time()
+        self.cache = self.load_cache()
+        self.records = {}
+        game_ids = self._game_ids()
+        counters = {"scanned": 0, "cached": 0}
+
+        def handle(game_id, result, error):
+            if error is not None:
+                self.logger.error(f"检查游戏失败: {game_id} - {str(error)}")
+                return
+            entry, from_cache = result
+            with self.lock:
+                self.records[game_id] = entry
+                counters["cached" if from_cache else "scanned"] += 1
+
+        work_queue = BoundedWorkQueue(handler=self.scan_game, workers=self.workers,
+                                      on_result=handle, name="verify-worker")
+        try:
+            for game_id in game_ids:
+                work_queue.put(game_id)
+            work_queue.join()
+        finally:
+            work_queue.close(wait=True)
+        self.save_cache()
+
+        issues = [issue for game_id in sorted(self.records) for issue in self.records[game_id]["issues"]]
+        issues.extend(self._check_index())
+        issues.extend(self._check_progress())
+
+        report = {
+            "checkedAt": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "games": len(game_ids),
+            "scanned": counters["scanned"],
+            "cached": counters["cached"],
+            "summary": dict(Counter(issue["kind"] for issue in issues)),
+            "issues": issues,
+        }
+        os.makedirs(os.path.dirname(self.report_file), exist_ok=True)
+        with open(self.report_file, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.logger.info(f"目录检查完成: {len(game_ids)} 个游戏, 问题 {len(issues)} 个, "
+                         f"耗时 {time.time() - start_time:.2f}秒")
+        return report
+
+    def _load_index(self):
+        if not os.path.exists(self.index_file):
+            return {"lastUpdated": "", "games": [], "categories": []}
+        with open(self.index_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _check_index(self):
+        issues = []
+        try:
+            index = self._load_index()
+        except Exception as e:
+            return [{"kind": "truncated", "gameId": None, "target": "index.json", "detail": f"无法解析: {str(e)}"}]
+
+        records = {game_id: entry["record"] for game_id, entry in self.records.items() if entry["record"]}
+        seen = Counter(game.get("id") for game in index.get("games", []))
+        for game_id, count in seen.items():
+            if count > 1:
+                issues.append({"kind": "inconsistent", "gameId": game_id, "target": "index.json",
+                               "detail": f"索引中重复出现{count}次"})
+        for game in index.get("games", []):
+            record = records.get(game.get("id"))
+            if record is None:
+                issues.append({"kind": "orphaned", "gameId": game.get("id"), "target": "index.json",
+                               "detail": "索引中的游戏没有元数据"})
+                continue
+            changed = [field for field in ("title", "category", "thumbnailUrl", "added", "rating", "plays")
+                       if game.get(field) != record[field]]
+            if changed:
+                issues.append({"kind": "inconsistent", "gameId": game["id"], "target": "index.json",
+                               "detail": f"字段与元数据不同: {', '.join(changed)}"})
+        for game_id in sorted(set(records) - set(seen)):
+            issues.append({"kind": "missing", "gameId": game_id, "target": "index.json",
+                           "detail": "有元数据但不在索引中"})
+        return issues
+
+    def _load_progress(self):
+        if not os.path.exists(self.progress_file):
+            return {"last_game": None, "processed_games": []}
+        with open(self.progress_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _embed_urls(self):
+        return {url for entry in self.records.values() if entry["record"] for url in entry["record"]["embedUrls"]}
+
+    def _check_progress(self):
+        issues = []
+        try:
+            progress = self._load_progress()
+        except Exception as e:
+            return [{"kind": "truncated", "gameId": None, "target": self.progress_file, "detail": str(e)}]
+        urls = progress.get("processed_games", [])
+        duplicates = [url for url, count in Counter(urls).items() if count > 1]
+        if duplicates:
+            issues.append({"kind": "inconsistent", "gameId": None, "target": self.progress_file,
+                           "detail": f"processed_games中有{len(duplicates)}个重复URL"})
+        embed_urls = [url for url in set(urls) if url in self._embed_urls()]
+        if embed_urls:
+            issues.append({"kind": "inconsistent", "gameId": None, "target": self.progress_file,
+                           "detail": f"processed_games中有{len(embed_urls)}个嵌入地址而不是详情页URL"})
+        for url, record in progress.get("crawl_history", {}).items():
+            if record.get("id") and record["id"] not in self.records:
+                issues.append({"kind": "orphaned", "gameId": record["id"], "target": self.progress_file,
+                               "detail": f"爬取记录没有对应的元数据: {url}"})
+        return issues
+
+    # ---- 修复 ----
+
+    def repair(self):
+        """修复可修复的问题并重建索引和进度文件，返回修复前的检查报告"""
+        report = self.verify()
+        recrawl = set()
+        for game_id, entry in sorted(self.records.items()):
+            if entry["record"] is None:
+                self._remove_empty_dirs(game_id)
+                continue
+            if entry["issues"]:
+                if self._repair_game(game_id, entry["issues"]):
+                    recrawl.add(game_id)
+
+        index = self.rebuild_index()
+        self.rebuild_progress(recrawl)
+        try:
+            IndexBuilder().build(index)
+            PageGenerator(metadata_dir=self.metadata_dir, storage=self.storage).build(index)
+        except Exception as e:
+            self.logger.error(f"重建分页索引或静态页面失败: {str(e)}")
+        self.logger.info(f"修复完成: {len(recrawl)} 个游戏将在下次爬取时重新抓取")
+        report["recrawl"] = sorted(recrawl)
+        return report
+
+    def _repair_game(self, game_id: str, issues) -> bool:
+        """修复单个游戏，返回是否需要重新爬取"""
+        info = self.storage.get(game_id, "info")
+        needs_recrawl = False
+        for issue in issues:
+            target, kind = issue["target"], issue["kind"]
+            path = os.path.join(self.assets_dir, *target.split("/"))
+            if kind == "orphaned" and target.endswith(".tmp") and os.path.exists(path):
+                os.remove(path)
+            elif kind in ("missing", "truncated") and target.startswith(f"{game_id}/"):
+                # 引用的资源不存在或不完整：隔离坏文件、清除引用，下次爬取时重新下载
+                if kind == "truncated" and os.path.exists(path):
+                    self._quarantine(target, path)
+                url = ASSET_URL_PREFIX + target
+                for field in ASSET_FIELDS:
+                    if info.get(field) == url:
+                        info[field] = ""
+                if url in (info.get("screenshots") or []):
+                    info["screenshots"] = [shot for shot in info["screenshots"] if shot != url]
+                needs_recrawl = True
+            elif kind in ("missing", "truncated") and target in ("stats.json", "comments.json"):
+                needs_recrawl = True
+        if info.get("id") != game_id:
+            info["id"] = game_id
+        if needs_recrawl:
+            # 清空lastUpdated，使爬取调度把该游戏视为需要重新爬取
+            info["lastUpdated"] = ""
+        self.storage.put_many([(game_id, "info", info), (game_id, "game", info)])
+        stats = self.storage.get(game_id, "stats")
+        if stats is not None and stats.get("id") not in (None, game_id):
+            stats["id"] = game_id
+            self.storage.put(game_id, "stats", stats)
+        return needs_recrawl
+
+    def _quarantine(self, target: str, path: str):
+        """把疑似损坏的资源移到隔离目录，误判时可以手动恢复"""
+        destination = os.path.join(self.quarantine_dir, *target.split("/"))
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        if os.path.exists(destination):
+            destination = f"{destination}.{int(time.time())}"
+        shutil.move(path, destination)
+        self.logger.warning(f"已隔离损坏的资源文件: {target} -> {destination}")
+
+    def _remove_empty_dirs(self, game_id: str):
+        path = os.path.join(self.metadata_dir, game_id)
+        if os.path.isdir(path) and not os.listdir(path):
+            os.rmdir(path)
+
+    def rebuild_index(self):
+        """由元数据重建index.json，保留原索引中的下架标记"""
+        try:
+            old_games = {game["id"]: game for game in self._load_index().get("games", []) if game.get("id")}
+        except Exception:
+            old_games = {}
+        games = []
+        for game_id in sorted(self.records):
+            if self.records[game_id]["record"] is None:
+                continue
+            # 修复可能改动了info，重新读取
+            info = self.storage.get(game_id, "info") or {}
+            stats = self.storage.get(game_id, "stats") or {}
+            entry = {
+                "id": game_id,
+                "title": info.get("title", ""),
+                "category": info.get("category", ""),
+                "rating": stats.get("rating", 0) or 0,
+                "plays": stats.get("plays", 0) or 0,
+                "thumbnailUrl": info.get("thumbnailUrl", ""),
+                "added": info.get("addedDate", ""),
+            }
+            old = old_games.get(game_id, {})
+            for key in ("removed", "removedDate", "removedReason"):
+                if key in old:
+                    entry[key] = old[key]
+            if is_dead(info.get("health")) and not entry.get("removed"):
+                entry.update(removed=True, removedDate=time.strftime("%Y-%m-%d"), removedReason="embed")
+            games.append(entry)
+
+        categories = index_categories(games)
+        index = {"lastUpdated": time.strftime("%Y-%m-%d"), "games": games, "categories": categories}
+        tmp_path = self.index_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_file)
+        self.logger.info(f"索引已重建: {len(games)} 个游戏, {len(categories)} 个分类")
+        return index
+
+    def rebuild_progress(self, recrawl=()):
+        """去掉重复URL和误记的嵌入地址，删除没有元数据或需要重新爬取的游戏的爬取记录"""
+        try:
+            progress = self._load_progress()
+        except Exception as e:
+            self.logger.error(f"进度文件无法解析，将重新生成: {str(e)}")
+            progress = {"last_game": None, "processed_games": []}
+        embed_urls = self._embed_urls()
+        known_ids = {game_id for game_id, entry in self.records.items() if entry["record"]}
+        history = progress.get("crawl_history", {})
+        for url, record in list(history.items()):
+            if record.get("id") and (record["id"] not in known_ids or record["id"] in recrawl):
+                del history[url]
+        processed = []
+        seen = set()
+        for url in progress.get("processed_games", []):
+            if url in seen or url in embed_urls:
+                continue
+            seen.add(url)
+            processed.append(url)
+        progress["processed_games"] = processed
+        progress["cache_stats"] = {"total_games": len(known_ids), "last_updated": time.strftime("%Y-%m-%d %H:%M:%S")}
+        tmp_path = self.progress_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(progress, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.progress_file)
+        return progress
@@ -0,0 +1,176 @@
+import json
+import os
+import time
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows下没有fcntl，只保证进程内的写入互斥
+    fcntl = None
+
+EVENT_TYPES = ("game_added", "game_updated", "assets_updated", "game_removed", "stats_changed")
+
+
+class ChangeFeed:
+    """
+    目录变更事件流
+
+    事件以JSON Lines格式追加到分段日志文件中，每个事件带有全局字节偏移量(offset)。
+    分段文件名为起始偏移量，超过大小上限后滚动到新分段，只保留最近的若干分段。
+    消费者保存上次读到的next_offset，之后从该位置继续读取即可。
+    """
+
+    SEGMENT_PREFIX = "events-"
+    SEGMENT_SUFFIX = ".jsonl"
+
+    def __init__(self, feed_dir="games/cache/feed", max_segment_bytes=16 * 1024 * 1024, keep_segments=20):
+        """
+        :param feed_dir: 事件日志目录
+        :param max_segment_bytes: 单个分段文件的大小上限
+        :param keep_segments: 保留的分段数量
+        """
+        self.feed_dir = feed_dir
+        self.max_segment_bytes = max_segment_bytes
+        self.keep_segments = max(1, keep_segments)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def _segment_path(self, base_offset: int) -> str:
+        return os.path.join(self.feed_dir, f"{self.SEGMENT_PREFIX}{base_offset:020d}{self.SEGMENT_SUFFIX}")
+
+    def segments(self):
+        """按起始偏移量排序的分段列表 [(起始偏移量, 路径)]"""
+        if not os.path.isdir(self.feed_dir):
+            return []
+        result = []
+        for name in os.listdir(self.feed_dir):
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.SEGMENT_SUFFIX):
+                base = name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]
+                if base.isdigit():
+                    result.append((int(base), os.path.join(self.feed_dir, name)))
+        return sorted(result)
+
+    def emit(self, event_type: str, game_id: str, **data) -> int:
+        """
+        追加一个事件，返回事件的偏移量
+        :param event_type: 事件类型，见EVENT_TYPES
+        :param game_id: 游戏ID
+        :param data: 事件附加数据
+        """
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"未知的事件类型: {event_type}")
+        event = {"type": event_type, "gameId": game_id, "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+        event.update(data)
+
+        try:
+            with self._lock:
+                os.makedirs(self.feed_dir, exist_ok=True)
+                lock_file = open(os.path.join(self.feed_dir, ".lock"), "a")
+                try:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    return self._append(event)
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    lock_file.close()
+        except Exception as e:
+            # 事件流失败不应影响爬取本身
+            self.logger.error(f"写入变更事件失败: {event_type} {game_id} - {str(e)}")
+            return -1
+
+    def _append(self, event: dict) -> int:
+        """在持有锁时追加事件，必要时滚动分段"""
+        segments = self.segments()
+        if segments:
+            base, path = segments[-1]
+            size = os.path.getsize(path)
+            if size >= self.max_segment_bytes:
+                base, path = base + size, self._segment_path(base + size)
+                size = 0
+        else:
+            base, path, size = 0, self._segment_path(0), 0
+
+        offset = base + size
+        event["offset"] = offset
+        line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(path, "ab") as f:
+            f.write(line)
+            f.flush()
+
+        if size == 0:
+            self._prune()
+        return offset
+
+    def _prune(self):
+        """删除超出保留数量的旧分段"""
+        for _, path in self.segments()[:-self.keep_segments]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                self.logger.warning(f"删除旧事件分段失败: {path} - {str(e)}")
+
+    def end_offset(self) -> int:
+        """当前日志末尾的偏移量，新消费者可以从这里开始只读新事件"""
+        segments = self.segments()
+        if not segments:
+            return 0
+        base, path = segments[-1]
+        return base + os.path.getsize(path)
+
+    def read(self, offset: int = 0, limit: int = 1000):
+        """
+        从指定偏移量读取事件
+        :param offset: 起始偏移量，早于最旧分段时从最旧分段开始
+        :param limit: 最多读取的事件数
+        :return: (事件列表, 下一次读取的偏移量)
+        """
+        records, offset = self._read(offset, limit)
+        return [event for event, _ in records], offset
+
+    def _read(self, offset: int, limit: int):
+        """读取事件，返回 ([(事件, 该事件之后的偏移量)], 下一次读取的偏移量)"""
+        records = []
+        segments = self.segments()
+        if not segments:
+            return records, offset
+
+        if offset < segments[0][0]:
+            self.logger.warning(f"偏移量 {offset} 对应的分段已被清理，从 {segments[0][0]} 开始读取")
+            offset = segments[0][0]
+
+        for i, (base, path) in enumerate(segments):
+            next_base = segments[i + 1][0] if i + 1 < len(segments) else None
+            if next_base is not None and offset >= next_base:
+                continue
+            with open(path, "rb") as f:
+                f.seek(max(0, offset - base))
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # 写入中的半行，留到下次读取
+                        return records, offset
+                    offset += len(line)
+                    try:
+                        records.append((json.loads(line), offset))
+                    except ValueError:
+                        self.logger.warning(f"跳过损坏的事件记录: offset={offset - len(line)}")
+                    if len(records) >= limit:
+                        return records, offset
+            if next_base is not None:
+                offset = next_base
+        return records, offset
+
+    def tail(self, offset: int = None, poll_interval: float = 1.0):
+        """
+        持续读取新事件的生成器，产出 (事件, 下一次读取的偏移量)
+        :param offset: 起始偏移量，None表示从当前末尾开始
+        :param poll_interval: 没有新事件时的轮询间隔(秒)
+        """
+        offset = self.end_offset() if offset is None else offset
+        while True:
+            records, offset = self._read(offset, 1000)
+            for record in records:
+                yield record
+            if not records:
+                time.sleep(poll_interval)
@@ -3,27 +3,32 @@ import os
 import sys
 import time
 import logging
-import requests
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Dict
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-from PIL import Image
 import io
-import random
+import hashlib
 import mimetypes
+import multiprocessing
 from urllib.parse import urlparse
 from pathlib import Path
-from tqdm import tqdm
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from src.models.game import Game
 from src.utils.parser import HtmlParser
+from src.utils.text import sanitize_id
+from src.core.work_queue import BoundedWorkQueue
+from src.core.frontier import CrawlFrontier
+from src.core.listing_snapshot import ListingSnapshotStore, diff_snapshots
+from src.core.change_feed import ChangeFeed
+from src.core.game_cache import GameCache
+from src.sites import AddictingGamesAdapter, extract_detail_page
+from src.utils.browser import create_chrome_driver
+from src.utils.log import setup_logging, log_stage
+
+# selenium、Pillow、requests、tqdm以及索引、页面生成、存储和MP4处理模块在用到的方法中才导入，没有新游戏时启动开销最小
 
 CRAWLER_CONFIG = {
     "interval": 5,  # 爬取间隔(秒)
@@ -44,38 +49,29 @@ class Crawler:
 
     def setup_selenium(self):
         """设置Selenium WebDriver"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless=new")  # 启用新版无头模式
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        
-        # SSL相关选项
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--ignore-ssl-errors')
-        chrome_options.add_argument('--ignore-certificate-errors-spki-list')
-        chrome_options.add_argument('--allow-insecure-localhost')
-        chrome_options.add_argument('--allow-running-insecure-content')
-        chrome_options.add_argument('--unsafely-treat-insecure-origin-as-secure')
-        
-        # 禁用安全特性
-        chrome_options.add_argument('--disable-web-security')
-        chrome_options.add_argument('--allow-running-insecure-content')
-        chrome_options.add_argument('--reduce-security-for-testing')
-        
-        # 设置日志级别
-        chrome_options.add_argument('--log-level=3')  # 仅显示致命错误
-        chrome_options.add_argument('--silent')
-        chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-        
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        self.driver = create_chrome_driver(extra_args=(
+            # SSL相关选项
+            '--ignore-certificate-errors',
+            '--ignore-ssl-errors',
+            '--ignore-certificate-errors-spki-list',
+            '--allow-insecure-localhost',
+            '--allow-running-insecure-content',
+            '--unsafely-treat-insecure-origin-as-secure',
+            # 禁用安全特性
+            '--disable-web-security',
+            '--reduce-security-for-testing',
+            '--silent',
+        ))
 
     def crawl(self) -> List[Game]:
         """
         爬取游戏数据
         :return: 游戏列表
         """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
         games = []
         for url in CRAWLER_CONFIG["urls"]:
             try:
@@ -146,77 +142,146 @@ class Crawler:
             self.driver.quit()
 
 class GameCrawler:
-    def __init__(self):
-        self.base_url = "https://www.addictinggames.com/all-games"
-        self.driver = None
-        self.setup_selenium()
+    def __init__(self, storage=None, adapters=None):
+        """
+        :param storage: 元数据存储(CatalogStore)，默认为games/metadata下的JSON目录
+        :param adapters: 要爬取的站点适配器列表，默认只爬取addictinggames
+        """
+        if storage is None:
+            from src.storage import create_store
+            storage = create_store("json")
+        self.storage = storage
+        self.adapters = adapters or [AddictingGamesAdapter()]
+        self._driver = None  # 主WebDriver在第一次使用时才启动
         self.retry_count = 3
         self.scroll_pause_time = 2
         self.max_retries = 3
         self.progress_file = "crawl_progress.json"
         self.stats = {"success": 0, "failed": 0}
-        self.game_cache = {}  # 游戏数据缓存
+        self.game_cache = GameCache(self.storage)  # 已知游戏的成员表和少量完整记录
         self.game_buffer = []  # 游戏信息缓冲区，用于批量更新索引
         
         # 并发控制
         self.max_workers = 5  # 最大线程数
-        self.thread_pool = None  # 线程池在实际使用前初始化
+        self.max_pending = self.max_workers * 2  # 等待队列上限，超过后阻塞游戏发现
+        self.work_queue = None  # 工作队列在实际使用前初始化
+        self.save_queue = None  # 保存队列：解析、下载资源和写入元数据，浏览器线程交出页面后立即加载下一个游戏
+        self.extract_workers = None  # 解析进程数，None为CPU核数(不超过线程数)，0表示在当前线程中解析
+        self._extract_pool = None  # 解析进程池，第一次解析时创建
+        
+        # 调度策略
+        self.recrawl_after = None  # 已爬取游戏的重新爬取间隔(秒)，None表示不重新爬取
+        self.time_budget = None  # 单次运行的时间预算(秒)，None表示不限制
+        self.frontier = None  # 优先级队列在实际使用前初始化
+        self.snapshot_stores = {}  # 站点名 -> 游戏列表快照
+        self.change_feed = ChangeFeed()  # 供下游消费的目录变更事件流
+        self._index_builder = None  # 前端使用的分页索引，第一次重建时创建
+        self._page_generator = None  # 静态页面，第一次生成时创建
+        self.site_touched = set()  # 本次运行中变化的游戏，爬取结束后只重建受影响的页面
+        self.max_removed_ratio = 0.5  # 单次消失游戏超过该比例时视为列表加载不完整，不标记下架
+        self.fetch_assets = True  # 是否下载缩略图和预览视频
+        self.profiler = None  # 性能分析器(CrawlProfiler)，--profile时设置
+        self.last_error = None  # 最近一次crawl()中断时的错误信息，正常完成时为None
+        self.keep_warm = False  # 守护模式下为True：一轮爬取结束后保留浏览器、HTTP连接池和游戏缓存供下一轮使用
+        self._cache_loaded = False  # 游戏缓存是否已从存储加载
+        self._http = None  # 下载资源共用的HTTP会话，第一次下载时创建
         
         # 线程安全锁
-        self.cache_lock = threading.Lock()  # 缓存访问锁
         self.buffer_lock = threading.Lock()  # 缓冲区访问锁
         self.progress_lock = threading.Lock()  # 进度信息锁
         self.stats_lock = threading.Lock()  # 统计信息锁
+        self.result_lock = threading.Lock()  # 任务结果处理锁
+        self.index_lock = threading.Lock()  # 索引文件写入锁
         
         # 线程本地存储WebDriver
         self.local_drivers = {}  # 存储线程ID到WebDriver的映射
+        self.idle_drivers = []  # 保温模式下已退出线程留下的WebDriver，新线程优先复用
         self.driver_lock = threading.Lock()  # WebDriver访问锁
+        self.extract_lock = threading.Lock()  # 解析进程池创建锁
         
         self.setup_logging()
 
     def setup_selenium(self):
         """设置Selenium WebDriver"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless=new")  # 启用新版无头模式
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--ignore-ssl-errors')
-        chrome_options.add_argument('--log-level=3')
-        chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-        
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        self._driver = create_chrome_driver(extra_args=('--ignore-certificate-errors', '--ignore-ssl-errors'))
+
+    @property
+    def driver(self):
+        """主WebDriver，第一次访问时才启动浏览器"""
+        if self._driver is None:
+            self.setup_selenium()
+        return self._driver
+
+    @property
+    def http(self):
+        """下载资源共用的HTTP会话(带连接池和重试)，第一次访问时才创建"""
+        if self._http is None:
+            from src.utils.http import create_session
+            self._http = create_session(pool_size=self.max_workers * 2)
+        return self._http
+
+    @property
+    def index_builder(self):
+        """分页索引生成器，第一次访问时才创建"""
+        if self._index_builder is None:
+            from src.core.index_builder import IndexBuilder
+            self._index_builder = IndexBuilder()
+        return self._index_builder
+
+    @property
+    def page_generator(self):
+        """静态页面生成器，第一次访问时才创建"""
+        if self._page_generator is None:
+            from src.core.page_generator import PageGenerator
+            self._page_generator = PageGenerator(storage=self.storage)
+        return self._page_generator
+
+    @property
+    def extract_pool(self):
+        """
+        解析详情页的进程池，第一次访问时创建，extract_workers为0时返回None
+        BeautifulSoup解析和选择器匹配占用GIL，放在独立进程中不会阻塞浏览器线程的WebDriver通信
+        """
+        workers = self.extract_workers
+        if workers is None:
+            workers = min(os.cpu_count() or 1, self.max_workers)
+        if workers <= 0:
+            return None
+        with self.extract_lock:
+            if self._extract_pool is None:
+                # 此时已有多个线程在运行，用spawn避免fork时复制锁的状态
+                self._extract_pool = ProcessPoolExecutor(max_workers=workers,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+                self.logger.info(f"解析进程池已启动，进程数: {workers}")
+            return self._extract_pool
+
+    def close_extract_pool(self):
+        """关闭解析进程池，未启动时不做任何事"""
+        with self.extract_lock:
+            pool, self._extract_pool = self._extract_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def close_driver(self):
+        """关闭主WebDriver，未启动时不做任何事"""
+        driver, self._driver = self._driver, None
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception as e:
+                self.logger.error(f"关闭WebDriver时出错: {str(e)}")
         
     def setup_logging(self):
-        """设置日志系统"""
-        # 创建logs目录
-        os.makedirs("logs", exist_ok=True)
-        
-        # 设置日志格式
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        
-        # 文件处理器 - 详细日志
-        file_handler = logging.FileHandler("logs/crawler.log", encoding='utf-8')
-        file_handler.setFormatter(formatter)
-        file_handler.setLevel(logging.DEBUG)
-        
-        # 控制台处理器 - 只显示关键信息
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        console_handler.setLevel(logging.INFO)
-        
-        # 配置根日志器
-        self.logger = logging.getLogger()
-        self.logger.setLevel(logging.DEBUG)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        """设置日志系统，日志由后台线程写入 logs/crawler.log，多次创建爬虫不会重复添加处理器"""
+        setup_logging()
+        self.logger = logging.getLogger(__name__)
             
     def download_and_convert_image(self, url: str, save_path: str, max_width: int = None, quality: int = 85):
         """下载图片并转换为WebP格式"""
         if not url:
             return None
+        import requests
+        from PIL import Image
             
         # 创建目录
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
@@ -274,8 +339,8 @@ class GameCrawler:
             # 创建保存目录
             os.makedirs(os.path.dirname(save_path), exist_ok=True)
             
-            # 下载文件
-            response = requests.get(url, stream=True)
+            # 下载文件，复用连接池中的连接
+            response = self.http.get(url, stream=True, timeout=30)
             response.raise_for_status()
             
             # 获取文件扩展名
@@ -301,79 +366,85 @@ class GameCrawler:
             
     def crawl(self):
         """爬取所有游戏，使用多线程并发处理"""
+        from tqdm import tqdm
+        
         print("\n=== 游戏爬虫启动 ===")
         progress = self.load_progress()
+        self.stats = {"success": 0, "failed": 0}
+        self.last_error = None
         
         # 批量处理大小
         batch_size = 10
         
         try:
-            self.driver.get(self.base_url)
-            wait = WebDriverWait(self.driver, 10)
-            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "Listed__Game")))
-            
-            # 滚动加载所有游戏
-            self.scroll_to_load_all_games()
-            
-            # 解析游戏列表
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            game_elements = soup.select('div.Listed__Game a.Listed__Game__Inner')
-            total_games = len(game_elements)
+            # 各站点加载游戏列表
+            self.enter_phase("listing")
+            listings = self.discover_games()
+            total_games = sum(len(games) for games in listings.values())
             
             print(f"\n总共找到 {total_games} 个游戏")
             
-            # 初始化线程池
-            self.thread_pool = ThreadPoolExecutor(max_workers=self.max_workers)
-            self.logger.info(f"初始化线程池，并发线程数: {self.max_workers}")
-            
             # 使用tqdm创建进度条
             pbar = tqdm(total=total_games, desc="爬取进度")
             
-            # 收集需要处理的游戏
-            games_to_process = []
-            
-            # 第一步：过滤已处理的游戏
-            for element in game_elements:
-                try:
-                    game = {
-                        "title": element.text.strip(),
-                        "url": element.get('href', '')
-                    }
-                    
-                    if game["url"] and not game["url"].startswith("http"):
-                        game["url"] = "https://www.addictinggames.com" + game["url"]
-                    
-                    # 生成游戏ID
-                    game_id = self.sanitize_id(game["title"])
-                    
-                    # 快速过滤：检查缓存和已处理列表
-                    if game_id in self.game_cache or game["url"] in progress["processed_games"]:
-                        pbar.update(1)
-                        continue
-                    
-                    # 收集需要处理的游戏
-                    games_to_process.append(game)
-                    
-                except Exception as e:
-                    self.logger.error(f"解析游戏元素时出错: {str(e)}")
-                    with self.stats_lock:
-                        self.stats["failed"] += 1
+            # 每个站点与自己上一次的列表快照比较，找出新增、消失和改名的游戏
+            listed_games = []
+            changed_urls = set()
+            for adapter in self.adapters:
+                games = listings.get(adapter.name) or []
+                listed_games.extend(games)
+                if games:
+                    changed_urls |= self.diff_listing(adapter, games)
+            
+            # 按优先级排列需要爬取的游戏：新游戏、陈旧游戏、热门游戏优先
+            self.frontier = CrawlFrontier(
+                progress.setdefault("crawl_history", {}),
+                stats_loader=self.load_game_stats,
+                recrawl_after=self.recrawl_after
+            )
+            processed_urls = set(progress["processed_games"])
+            for game in listed_games:
+                # 新增和改名的游戏按新游戏排序并强制重新爬取(URL可能已在已处理列表中)，其余已知游戏只在过期后重新爬取
+                changed = game["url"] in changed_urls
+                known = not changed and (game["id"] in self.game_cache or game["url"] in processed_urls)
+                if not self.frontier.push(game, known=known, cached_info=self.game_cache.summary(game["id"]),
+                                          refresh=changed):
                     pbar.update(1)
+            del listed_games, processed_urls
+            
+            self.logger.info(f"需要处理的游戏数量: {len(self.frontier)}")
+            
+            # 初始化有界工作队列，队列满时阻塞下面的出队循环
+            self.enter_phase("detail")
+            self._task_counters = {"completed": 0, "batch_size": batch_size}
+            self.save_queue = BoundedWorkQueue(
+                handler=lambda task: self.process_save_task(task, progress),
+                workers=self.max_workers,
+                max_pending=self.max_pending,
+                on_result=lambda task, result, error: self._handle_task_result(task["game"], result, error, pbar, progress),
+                name="crawl-save"
+            )
+            self.work_queue = BoundedWorkQueue(
+                handler=lambda game: self.process_game_task(game, progress),
+                workers=self.max_workers,
+                max_pending=self.max_pending,
+                on_result=lambda game, result, error: self._handle_task_result(game, result, error, pbar, progress),
+                on_worker_exit=self.release_current_thread_driver
+            )
+            self.logger.info(f"初始化工作队列，并发线程数: {self.max_workers}，等待队列上限: {self.max_pending}")
+            
+            # 按优先级依次提交，超出时间预算后停止提交
+            start_time = time.time()
+            while len(self.frontier):
+                if self.time_budget and time.time() - start_time >= self.time_budget:
+                    self.logger.info(f"已超出时间预算 {self.time_budget} 秒，剩余 {len(self.frontier)} 个游戏留待下次运行")
+                    break
+                self.work_queue.put(self.frontier.pop())
             
-            self.logger.info(f"需要处理的游戏数量: {len(games_to_process)}")
-            
-            # 第二步：批量处理游戏
-            if games_to_process:
-                # 创建Future到游戏的映射
-                futures = {}
-                
-                # 提交所有任务到线程池
-                for game in games_to_process:
-                    future = self.thread_pool.submit(self.process_game_task, game, progress)
-                    futures[future] = game
-                
-                # 处理完成的任务
-                self._process_completed_futures(futures, pbar, progress, batch_size)
+            # 等待队列中的任务全部完成，浏览器线程交出的页面全部进入保存队列后再等待保存完成
+            self.work_queue.join()
+            self.save_queue.join()
+            self.logger.info(f"所有 {self._task_counters['completed']} 个任务已完成处理")
             
             # 确保最后的缓冲区也被处理
             if self.game_buffer:
@@ -386,14 +457,18 @@ class GameCrawler:
             
             # 最后保存一次进度
             self.save_progress(progress)
+            self.build_site_pages()
                 
             pbar.close()
             print(f"\n=== 爬虫运行完成 ===")
             print(f"成功: {self.stats['success']} | 失败: {self.stats['failed']}")
-            print(f"缓存游戏数量: {len(self.game_cache)}")
+            cache_stats = self.game_cache.stats()
+            print(f"缓存游戏数量: {cache_stats['known']} | 完整记录: {cache_stats['records']} | "
+                  f"命中: {cache_stats['hits']} | 未命中: {cache_stats['misses']}")
             
         except Exception as e:
             self.logger.error(f"爬取过程中出现错误: {str(e)}")
+            self.last_error = str(e)
             
             # 确保发生异常时也保存已处理的游戏
             if self.game_buffer:
@@ -409,342 +484,278 @@ class GameCrawler:
                 
             self.save_progress(progress)
         finally:
-            # 关闭所有线程的WebDriver实例
-            self.close_thread_drivers()
-            
-            # 关闭线程池
-            if self.thread_pool:
-                self.thread_pool.shutdown(wait=True)
-                self.logger.info("线程池已关闭")
-            
-            # 关闭主WebDriver
-            if hasattr(self, 'driver'):
-                self.driver.quit()
+            # 关闭工作队列，工作线程退出时交还各自的WebDriver
+            if self.work_queue:
+                self.work_queue.close(wait=True)
+                self.work_queue = None
+                self.logger.info("工作队列已关闭")
+            if self.save_queue:
+                self.save_queue.close(wait=True)
+                self.save_queue = None
+            
+            # 保温模式下浏览器和解析进程留给下一轮，否则全部关闭
+            if not self.keep_warm:
+                self.close_thread_drivers()
+                self.close_driver()
+                self.close_extract_pool()
+
+    def shutdown(self):
+        """释放保温模式下保留的浏览器和HTTP连接，守护进程退出时调用"""
+        self.close_thread_drivers()
+        self.close_driver()
+        self.close_extract_pool()
+        session, self._http = self._http, None
+        if session is not None:
+            session.close()
                 
-    def _process_completed_futures(self, futures, pbar, progress, batch_size):
-        """处理已完成的Future任务"""
-        completed_count = 0
-        buffer_update_threshold = batch_size
-        progress_save_threshold = batch_size * 2
+    def _handle_task_result(self, game, result, error, pbar, progress):
+        """处理单个完成的任务，由工作线程回调"""
+        if result is None and error is None:
+            # 页面已交给保存队列，由保存线程报告结果
+            return
+        if error is not None:
+            result = {"success": False, "game_info": None, "error": str(error)}
+            with self.stats_lock:
+                self.stats["failed"] += 1
         
-        # 等待任务完成并处理结果
-        for future in as_completed(futures):
-            game = futures[future]
-            try:
-                result = future.result()
-                completed_count += 1
-                
-                if result["success"] and result["game_info"]:
-                    self.logger.debug(f"任务成功完成: {game['title']}")
-                else:
-                    self.logger.debug(f"任务跳过或失败: {game['title']} - {result.get('error', '未知错误')}")
-                
-                # 更新进度条
-                pbar.update(1)
-                
-                # 每处理一定数量的任务，批量保存进度和更新索引
-                if completed_count % progress_save_threshold == 0:
-                    self.save_progress(progress)
-                    self.logger.info(f"已处理 {completed_count}/{len(futures)} 个任务，保存进度")
-                
-                # 批量更新索引
-                if completed_count % buffer_update_threshold == 0:
-                    with self.buffer_lock:
-                        if len(self.game_buffer) >= buffer_update_threshold:
-                            buffer_copy = self.game_buffer.copy()
-                            self.game_buffer = []
-                            
-                            # 释放锁后更新索引
-                            self.update_index(buffer_copy)
-                            self.logger.info(f"已批量更新索引，游戏数：{len(buffer_copy)}")
-                
-            except Exception as e:
-                self.logger.error(f"处理任务结果出错: {game['title']} - {str(e)}")
-                pbar.update(1)
-                with self.stats_lock:
-                    self.stats["failed"] += 1
+        if result["success"] and result["game_info"]:
+            self.logger.debug(f"任务成功完成: {game['title']}")
+        else:
+            self.logger.debug(f"任务跳过或失败: {game['title']} - {result.get('error', '未知错误')}")
+        
+        batch_size = self._task_counters["batch_size"]
+        with self.result_lock:
+            self._task_counters["completed"] += 1
+            completed_count = self._task_counters["completed"]
+            pbar.update(1)
         
-        # 确保最后的进度也保存
-        self.save_progress(progress)
-        self.logger.info(f"所有 {completed_count} 个任务已完成处理")
+        # 每处理一定数量的任务，批量保存进度
+        if completed_count % (batch_size * 2) == 0:
+            with self.progress_lock:
+                self.save_progress(progress)
+            self.logger.info(f"已处理 {completed_count} 个任务，保存进度")
         
-        # 短暂延迟，避免请求过于频繁
-        time.sleep(random.uniform(0.2, 0.5))
+        # 批量更新索引
+        buffer_copy = None
+        with self.buffer_lock:
+            if len(self.game_buffer) >= batch_size:
+                buffer_copy = self.game_buffer.copy()
+                self.game_buffer = []
+        
+        # 释放缓冲区锁后更新索引
+        if buffer_copy:
+            with self.index_lock:
+                self.update_index(buffer_copy)
+            self.logger.info(f"已批量更新索引，游戏数：{len(buffer_copy)}")
+
+    def set_concurrency(self, workers: int):
+        """运行时调整并发线程数"""
+        self.max_workers = max(1, int(workers))
+        if not self.work_queue:
+            self.max_pending = self.max_workers * 2
+        else:
+            self.work_queue.resize(self.max_workers)
+            self.save_queue.resize(self.max_workers)
 
     def sanitize_id(self, text: str) -> str:
         """生成安全的ID，去除特殊字符"""
-        # 将标题转换为小写并替换空格为下划线
-        id_text = text.lower().replace(" ", "_")
-        
-        # 移除所有不适合作为文件夹名的字符
-        import re
-        id_text = re.sub(r'[^\w\-]', '_', id_text)
-        
-        # 确保没有连续的下划线
-        id_text = re.sub(r'_+', '_', id_text)
-        
-        # 去除首尾的下划线
-        id_text = id_text.strip('_')
-        
-        return id_text
+        return sanitize_id(text)
 
-    def get_video_url(self, game_data=None, soup=None):
-        """获取视频URL"""
-        try:
-            # 首先尝试从JavaScript数据中获取
-            if game_data and 'videoThumbnailUrl' in game_data:
-                video_url = game_data.get('videoThumbnailUrl')
-                if video_url:
-                    self.logger.debug(f"从JavaScript数据中找到视频URL: {video_url}")
-                    return video_url
-            
-            # 尝试从video标签获取URL
-            if soup:
-                try:
-                    # 找到Gameplay标题下的video标签
-                    gameplay_header = soup.find('h4', text='10 Mahjong Gameplay')
-                    if gameplay_header:
-                        video_div = gameplay_header.find_next('div')
-                        if video_div:
-                            video_source = video_div.find('video').find('source')
-                            if video_source:
-                                video_url = video_source.get('src')
-                                if video_url:
-                                    self.logger.debug(f"从video标签找到视频URL: {video_url}")
-                                    return video_url
-                except Exception as e:
-                    self.logger.debug(f"从video标签获取视频URL失败: {str(e)}")
-            
-            return None
-        except Exception as e:
-            self.logger.error(f"获取视频URL时出错: {str(e)}")
-            return None
+    def adapter_for(self, game: Dict):
+        """按游戏所属站点找到对应的适配器，旧数据没有site字段时使用第一个适配器"""
+        site = game.get("site")
+        for adapter in self.adapters:
+            if adapter.name == site or (not site and adapter.owns(game.get("url", ""))):
+                return adapter
+        return self.adapters[0]
 
-    def crawl_game_detail(self, game_url: str, game_title: str, use_thread_driver=False):
-        """爬取游戏详情页"""
+    def crawl_game_detail(self, game_url: str, game_title: str, use_thread_driver=False, refresh=False, adapter=None):
+        """
+        爬取游戏详情页，refresh为True时忽略缓存重新爬取
+        :param adapter: 游戏所属站点的适配器，默认按URL查找
+        """
         self.logger.debug(f"开始爬取游戏详情: {game_title}")
-        
         try:
+            adapter = adapter or self.adapter_for({"url": game_url})
+            
             # 先检查缓存中是否已存在该游戏
-            game_id = self.sanitize_id(game_title)
-            with self.cache_lock:
-                if game_id in self.game_cache:
-                    self.logger.info(f"使用缓存中的游戏数据: {game_title}")
-                    return self.game_cache[game_id]
+            game_id = adapter.game_id(game_title)
+            if not refresh and game_id in self.game_cache:
+                self.logger.info(f"使用缓存中的游戏数据: {game_title}")
+                return self.game_cache.get(game_id)
             
-            # 以下是原有的爬取逻辑
             # 获取合适的WebDriver，根据是否并发使用不同的实例
             driver = self.get_thread_driver() if use_thread_driver else self.driver
+            with self.stage("load", game_id):
+                page_source = self._load_detail_page(driver, adapter, game_url, game_id)
+            return self.save_game_detail(adapter, game_id, game_title, page_source)
             
-            # 访问游戏详情页
-            self.logger.debug(f"访问URL: {game_url}")
+        except Exception as e:
+            self.logger.error(f"爬取游戏详情时出错: {str(e)}", extra={"url": game_url, "stage": "detail"})
+            return None
+
+    def load_game_page(self, adapter, game_url: str, game_id: str):
+        """用当前线程的WebDriver加载详情页，返回页面HTML，失败时返回None"""
+        try:
+            with self.stage("load", game_id):
+                return self._load_detail_page(self.get_thread_driver(), adapter, game_url, game_id)
+        except Exception as e:
+            self.logger.error(f"加载游戏详情页时出错: {str(e)}", extra={"url": game_url, "stage": "detail"})
+            return None
+
+    def _load_detail_page(self, driver, adapter, game_url: str, game_id: str) -> str:
+        """在浏览器中打开详情页，等待关键元素加载后返回页面HTML"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        
+        # 访问游戏详情页，按站点的频率限制访问
+        with adapter.limiter.slot():
             driver.get(game_url)
-            
-            # 等待页面基本元素加载
-            wait = WebDriverWait(driver, 10)
-            wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            
-            # 等待游戏内容加载 - 使用具体元素而不是固定等待
-            try:
-                # 尝试等待游戏描述或游戏图片等关键元素
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".Content h4, .GamePage__Tags, iframe.PlayFrame")))
-                self.logger.debug("游戏详情页面关键元素已加载")
-            except Exception as e:
-                self.logger.warning(f"等待游戏详情元素超时: {str(e)}")
-            
-            # 获取页面源代码
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # 创建游戏专属目录
-            game_id = self.sanitize_id(game_title)
-            metadata_dir = os.path.join("games/metadata", game_id)
-            assets_dir = os.path.join("games/assets", game_id)
-            os.makedirs(metadata_dir, exist_ok=True)
-            os.makedirs(os.path.join(assets_dir, "screenshots"), exist_ok=True)
-            
-            # 获取游戏URL和游戏数据
-            game_url = None
-            game_data = None
-            next_data = soup.find('script', {'id': '__NEXT_DATA__'})
-            if next_data:
-                try:
-                    data = json.loads(next_data.string)
-                    game_data = data.get('props', {}).get('pageProps', {}).get('game', {})
-                    embed_url = game_data.get('embedUrl', '')
-                    if embed_url:
-                        if embed_url.startswith('//'):
-                            game_url = 'https:' + embed_url
-                        elif embed_url.startswith('/'):
-                            game_url = 'https://www.addictinggames.com' + embed_url
-                        else:
-                            game_url = embed_url
-                        self.logger.debug(f"从JavaScript数据中找到游戏URL: {game_url}")
-                except Exception as e:
-                    self.logger.error(f"解析JavaScript数据时出错: {str(e)}")
-            
-            # 获取视频URL
-            video_url = self.get_video_url(game_data, soup)
-            
-            # 获取游戏信息
-            info = {
-                "id": game_id,
-                "title": game_title,
-                "url": game_url,
-                "description": "",
-                "developer": "",
-                "category": "",
-                "tags": [],
-                "controls": "",
-                "thumbnailUrl": "",  # 稍后更新
-                "previewUrl": "",    # 稍后更新
-                "previewVideoUrl": "",  # 稍后更新
-                "screenshots": [],
-                "features": [],
-                "device": {
-                    "mobile": True,
-                    "desktop": True
-                },
-                "addedDate": "",
-                "lastUpdated": time.strftime("%Y-%m-%d"),
-                "gameUrl": game_url
-            }
-            
-            # 获取描述
-            description = soup.select_one('.Content h4:-soup-contains("Game Description") + div p')
-            if description:
-                info["description"] = description.text.strip()
-            
-            # 获取分类和标签
-            category = soup.select_one('.CategoryTag__Label span')
-            if category:
-                info["category"] = category.text.strip()
-            
-            tags = soup.select('.GamePage__Tags a .CategoryTag__Label span')
-            info["tags"] = [tag.text.strip() for tag in tags if tag.text.strip()]
-            
-            # 获取开发者和发布日期
-            meta_items = soup.select('.GPDescription__GameMeta div')
-            for item in meta_items:
-                label = item.find('strong')
-                if not label:
-                    continue
-                    
-                label_text = label.text.strip()
-                value = item.text.replace(label_text, '').strip()
-                
-                if 'Developer' in label_text:
-                    info["developer"] = value
-                elif 'Release Date' in label_text:
-                    info["addedDate"] = value
-            
-            # 获取游戏说明作为控制说明
-            instructions = soup.select_one('.Content h4:-soup-contains("Instructions") + p')
-            if instructions:
-                info["controls"] = instructions.text.strip()
-            
-            # 下载并处理图片和视频
-            thumbnail = soup.select_one('img[alt$="Thumbnail"]')
-            if thumbnail:
-                src = thumbnail.get('src', '')
-                if src:
-                    if src.startswith('/_next/image'):
-                        srcset = thumbnail.get('srcset', '').split(',')
-                        if srcset:
-                            src = srcset[-1].strip().split(' ')[0]
-                    
-                    if src.startswith('/'):
-                        src = 'https://www.addictinggames.com' + src
-                        
-                    # 下载缩略图
-                    thumbnail_path = os.path.join(assets_dir, "thumbnail")  # 不指定扩展名
-                    saved_path = self.download_file(src, thumbnail_path)
-                    if saved_path:
-                        # 更新路径，使用相对路径
-                        info["thumbnailUrl"] = f"/games/assets/{game_id}/{os.path.basename(saved_path)}"
-                        info["previewUrl"] = info["thumbnailUrl"]  # 使用相同的图片作为预览
+        
+        # 等待页面基本元素加载
+        wait = WebDriverWait(driver, 10)
+        wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+        
+        # 等待游戏内容加载 - 使用具体元素而不是固定等待
+        try:
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, adapter.detail_ready_selector)))
+        except Exception as e:
+            self.logger.warning(f"等待游戏详情元素超时: {str(e)}", extra={"game_id": game_id, "url": game_url})
+        return driver.page_source
+
+    def save_game_detail(self, adapter, game_id: str, game_title: str, page_source: str) -> Dict:
+        """解析详情页HTML，下载资源并保存info/stats/comments，返回info"""
+        # 解析页面由适配器完成
+        with self.stage("extract", game_id):
+            detail = self.extract_detail(adapter, page_source, game_id, game_title)
+        info, stats, comments = detail["info"], detail["stats"], detail["comments"]
+        
+        # 创建游戏专属目录
+        assets_dir = os.path.join("games/assets", game_id)
+        os.makedirs(os.path.join(assets_dir, "screenshots"), exist_ok=True)
+        
+        # 记录写入前的数据，用于生成变更事件
+        old_info = self.storage.get(game_id, "info")
+        old_stats = self.storage.get(game_id, "stats")
+        old_assets = self._asset_digests(assets_dir)
+        
+        assets = detail.get("assets", {}) if self.fetch_assets else {}
+        preview_path = None
+        with self.stage("assets", game_id):
+            # 下载缩略图，同一张图片也作为预览图
+            if assets.get("thumbnail"):
+                saved_path = self.download_file(assets["thumbnail"], os.path.join(assets_dir, "thumbnail"))
+                if saved_path:
+                    info["thumbnailUrl"] = f"/games/assets/{game_id}/{os.path.basename(saved_path)}"
+                    info["previewUrl"] = info["thumbnailUrl"]
             
             # 下载预览视频
-            if video_url:
-                video_path = os.path.join(assets_dir, "preview")  # 不指定扩展名
-                saved_path = self.download_file(video_url, video_path)
-                if saved_path:
-                    info["previewVideoUrl"] = f"/games/assets/{game_id}/{os.path.basename(saved_path)}"
+            if assets.get("preview"):
+                preview_path = self.download_file(assets["preview"], os.path.join(assets_dir, "preview"))
+                if preview_path:
+                    info["previewVideoUrl"] = f"/games/assets/{game_id}/{os.path.basename(preview_path)}"
+        if preview_path:
+            # 在计算资源摘要之前完成改写，重新爬取时摘要不会因CDN原文件与改写后的文件不同而变化
+            self.optimize_video(preview_path, game_id)
+        
+        # 嵌入地址未变时保留上次的嵌入检查结果
+        if old_info and old_info.get("health") and old_info.get("gameUrl") == info["gameUrl"]:
+            info["health"] = old_info["health"]
+        
+        # 详情页不提供截图，保留capture-screenshots截取的画面，截图文件已不存在时才丢弃
+        if old_info and old_info.get("screenshots") and not info["screenshots"]:
+            shots = old_info["screenshots"]
+            if all(os.path.exists(os.path.join("games/assets", url[len("/games/assets/"):]))
+                   for url in shots if url.startswith("/games/assets/")):
+                info["screenshots"] = shots
+        
+        # 保存游戏信息，同时保存到game.json以方便缓存
+        with self.stage("store", game_id):
+            self.storage.put(game_id, "info", info)
+            self.storage.put(game_id, "game", info)
+            self.storage.put(game_id, "stats", stats)
+            self.storage.put(game_id, "comments", comments)
+            self._emit_detail_events(game_id, old_info, info, old_stats, stats, old_assets, assets_dir)
+        
+        # 更新缓存(GameCache自身是线程安全的)
+        self.game_cache.add(game_id, info)
             
-            # 保存游戏信息
-            info_path = os.path.join(metadata_dir, "info.json")
-            with open(info_path, "w", encoding="utf-8") as f:
-                json.dump(info, f, ensure_ascii=False, indent=2)
+        return info
 
-            # 保存游戏数据到game.json以方便缓存
-            game_path = os.path.join(metadata_dir, "game.json")
-            with open(game_path, "w", encoding="utf-8") as f:
-                json.dump(info, f, ensure_ascii=False, indent=2)
-            
-            # 获取统计数据
-            stats = {
-                "id": game_id,
-                "plays": 0,
-                "rating": 0,
-                "ratingCount": 0,
-                "lastUpdated": time.strftime("%Y-%m-%d")
-            }
-            
-            rating_elem = soup.select_one('.GPRatingUi__Rating button span span')
-            if rating_elem:
-                stats["rating"] = float(rating_elem.text.strip())
-            
-            rating_stats = soup.select_one('.GamePage__Game__RatingStats')
-            if rating_stats:
-                count = rating_stats.text.strip().split('\n')[0]
-                stats["ratingCount"] = int(count.replace("Ratings", "").strip())
-            
-            # 保存统计数据
-            with open(os.path.join(metadata_dir, "stats.json"), "w", encoding="utf-8") as f:
-                json.dump(stats, f, ensure_ascii=False, indent=2)
-            
-            # 获取评论
-            comments = {
-                "id": game_id,
-                "comments": [],
-                "lastUpdated": time.strftime("%Y-%m-%d")
-            }
-            
-            for review in soup.select('.GameReview'):
-                try:
-                    author = review.select_one('.GameReview__Author a')
-                    date = review.select_one('.GameReview__Subject')
-                    content = review.select_one('p:not(.GameReview__Subject)')
-                    rating = 5 if 'GameReview--positive' in review.get('class', []) else 1
-                    
-                    if author and date and content:
-                        comments["comments"].append({
-                            "id": f"{game_id}_{len(comments['comments'])}",
-                            "user": author.text.strip(),
-                            "content": content.text.strip(),
-                            "rating": rating,
-                            "date": date.text.strip()
-                        })
-                except Exception as e:
-                    self.logger.error(f"解析评论时出错: {str(e)}")
-                    continue
-            
-            # 保存评论数据
-            with open(os.path.join(metadata_dir, "comments.json"), "w", encoding="utf-8") as f:
-                json.dump(comments, f, ensure_ascii=False, indent=2)
-            
-            self.logger.debug(f"游戏详情已保存到: {metadata_dir}")
-            
-            # 线程安全地更新缓存
-            with self.cache_lock:
-                self.game_cache[game_id] = info
-                
-            return info
-            
-        except Exception as e:
-            self.logger.error(f"爬取游戏详情时出错: {str(e)}")
-            return None
+    def extract_detail(self, adapter, page_source: str, game_id: str, game_title: str) -> Dict:
+        """在解析进程池中解析详情页，进程池不可用时在当前线程中解析，两者结果相同"""
+        pool = self.extract_pool
+        if pool is not None:
+            try:
+                return pool.submit(extract_detail_page, type(adapter), adapter.base_url,
+                                   page_source, game_id, game_title).result()
+            except BrokenProcessPool as e:
+                # 解析进程异常退出，丢弃进程池，下次解析时重新创建
+                self.logger.warning(f"解析进程池已损坏，改为在当前线程中解析: {str(e)}", extra={"game_id": game_id})
+                with self.extract_lock:
+                    if self._extract_pool is pool:
+                        self._extract_pool = None
+                pool.shutdown(wait=False)
+        return adapter.extract_detail(page_source, game_id, game_title)
+
+    def optimize_video(self, path: str, game_id: str = None):
+        """预览视频下载后把moov移到文件开头，悬停预览读到开头几KB就能播放"""
+        from src.utils.mp4 import faststart, Mp4Error, VIDEO_SUFFIXES
+        if os.path.splitext(path)[1].lower() not in VIDEO_SUFFIXES:
+            return
+        with self.stage("faststart", game_id):
+            try:
+                if faststart(path):
+                    self.logger.debug(f"预览视频已改写为faststart: {path}")
+            except (OSError, Mp4Error) as e:
+                self.logger.warning(f"预览视频faststart失败: {path} - {str(e)}")
+
+    @contextmanager
+    def stage(self, name: str, game_id: str = None):
+        """详情页处理的一个阶段：记录耗时日志，启用性能分析时同时统计CPU和内存"""
+        with log_stage(self.logger, name, game_id):
+            if self.profiler is None:
+                yield
+            else:
+                with self.profiler.stage(name, game_id):
+                    yield
+        
+    def _asset_digests(self, assets_dir):
+        """计算资源目录下各文件的MD5，用于检测资源是否变化"""
+        digests = {}
+        if not os.path.isdir(assets_dir):
+            return digests
+        for name in os.listdir(assets_dir):
+            path = os.path.join(assets_dir, name)
+            if os.path.isfile(path):
+                md5 = hashlib.md5()
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(65536), b""):
+                        md5.update(chunk)
+                digests[name] = md5.hexdigest()
+        return digests
+
+    def _emit_detail_events(self, game_id, old_info, info, old_stats, stats, old_assets, assets_dir):
+        """比较详情页写入前后的数据，发出game_updated、assets_updated、stats_changed事件"""
+        if old_info:
+            changed = sorted(key for key in set(old_info) | set(info)
+                             if key != "lastUpdated" and old_info.get(key) != info.get(key))
+            if changed:
+                self.change_feed.emit("game_updated", game_id, fields=changed)
+        
+        new_assets = self._asset_digests(assets_dir)
+        changed_assets = sorted(name for name in new_assets if old_assets.get(name) != new_assets[name])
+        if changed_assets:
+            self.change_feed.emit("assets_updated", game_id,
+                                  assets=[f"/games/assets/{game_id}/{name}" for name in changed_assets])
         
+        if old_stats:
+            changes = {key: [old_stats.get(key), stats.get(key)] for key in ("rating", "ratingCount", "plays")
+                       if old_stats.get(key) != stats.get(key)}
+            if changes:
+                self.change_feed.emit("stats_changed", game_id, changes=changes)
+
     def load_progress(self):
         """加载爬取进度和已下载的游戏数据"""
         progress = {"last_game": None, "processed_games": []}
@@ -757,46 +768,41 @@ class GameCrawler:
             except Exception as e:
                 self.logger.error(f"加载进度文件失败: {str(e)}")
         
-        # 加载已下载的游戏数据到缓存
-        metadata_dir = "games/metadata"
-        if os.path.exists(metadata_dir):
-            for game_dir in os.listdir(metadata_dir):
-                if game_dir == 'index.json':
+        # 保温模式下缓存在每轮爬取中随写入同步更新，不需要重新扫描存储
+        if self.keep_warm and self._cache_loaded:
+            self.logger.info(f"复用内存中的游戏缓存: {len(self.game_cache)} 个游戏")
+            return progress
+        
+        # 加载已知游戏到缓存，优先读取game.json，如果不存在则读取info.json。
+        # 逐条读取，只保留ID和更新日期，不在内存中保留完整记录
+        try:
+            seen = set()
+            for game_dir, game_data in self.storage.scan("game"):
+                seen.add(game_dir)
+                self._remember_game(game_dir, game_data)
+            for game_dir in self.storage.game_ids():
+                if game_dir in seen:
                     continue
-                    
-                # 优先读取game.json，如果不存在则读取info.json
-                game_json = os.path.join(metadata_dir, game_dir, "game.json")
-                info_json = os.path.join(metadata_dir, game_dir, "info.json")
-                
-                json_file = game_json if os.path.exists(game_json) else info_json
-                
-                if os.path.exists(json_file):
-                    try:
-                        with open(json_file, 'r', encoding='utf-8') as f:
-                            game_data = json.load(f)
-                            # 确保游戏ID是安全的
-                            game_id = self.sanitize_id(game_data.get("title", game_dir))
-                            game_data["id"] = game_id
-                            
-                            # 保存到缓存
-                            self.game_cache[game_id] = game_data
-                            
-                            # 如果游戏URL不在进度中，添加到进度
-                            game_url = game_data.get("url", "")
-                            if game_url and game_url not in progress["processed_games"]:
-                                progress["processed_games"].append(game_url)
-                                
-                            # 如果是从info.json加载的，创建game.json以便后续使用
-                            if json_file == info_json and not os.path.exists(game_json):
-                                with open(game_json, 'w', encoding='utf-8') as gf:
-                                    json.dump(game_data, gf, ensure_ascii=False, indent=2)
-                                    
-                    except Exception as e:
-                        self.logger.error(f"加载游戏数据失败 {game_dir}: {str(e)}")
+                info = self.storage.get(game_dir, "info")
+                if info:
+                    # 如果是从info.json加载的，创建game.json以便后续使用
+                    self.storage.put(game_dir, "game", info)
+                    self._remember_game(game_dir, info)
+            self._cache_loaded = True
+        except Exception as e:
+            self.logger.error(f"加载游戏数据失败: {str(e)}")
         
         self.logger.info(f"已加载 {len(self.game_cache)} 个游戏数据到缓存")
         return progress
 
+    def _remember_game(self, game_dir: str, game_data: Dict):
+        """把存储中的一个游戏加入缓存的成员表"""
+        # 确保游戏ID是安全的，适配器写入的数据(带site字段)已经是带命名空间的ID
+        game_id = game_data.get("id") if game_data.get("site") else None
+        game_id = game_id or self.sanitize_id(game_data.get("title", game_dir))
+        # info中的url是嵌入地址而不是详情页URL，不能加入processed_games
+        self.game_cache.add(game_id, game_data, keep_record=False, storage_id=game_dir)
+
     def save_progress(self, progress):
         """保存爬取进度"""
         try:
@@ -812,71 +818,117 @@ class GameCrawler:
         except Exception as e:
             self.logger.error(f"保存进度失败: {str(e)}")
 
-    def scroll_to_load_all_games(self):
-        """滚动页面加载所有游戏"""
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
-        games_count = 0
-        no_change_count = 0
-        max_no_change = 3  # 连续3次没有新内容就认为加载完成
-        
-        # 创建进度条
-        pbar = tqdm(desc="加载游戏列表", unit="个")
+    def discover_games(self) -> Dict[str, List[Dict]]:
+        """
+        各站点加载游戏列表，返回 站点名 -> 游戏列表
+        多个站点时每个站点使用独立的WebDriver并发加载，加载失败的站点返回空列表
+        """
+        def discover(adapter, driver):
+            try:
+                games = adapter.discover(driver)
+                self.logger.info(f"{adapter.name}: 找到 {len(games)} 个游戏")
+                return games
+            except Exception as e:
+                self.logger.error(f"加载 {adapter.name} 游戏列表时出错: {str(e)}")
+                return []
         
-        # 创建WebDriverWait对象
-        wait = WebDriverWait(self.driver, 10)
+        if len(self.adapters) == 1:
+            try:
+                return {self.adapters[0].name: discover(self.adapters[0], self.driver)}
+            finally:
+                # 详情页使用线程专用的WebDriver，列表加载完后主浏览器不再需要(保温模式下留给下一轮)
+                if not self.keep_warm:
+                    self.close_driver()
         
-        while True:
-            # 滚动到页面底部
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            
-            # 使用显式等待，等待新游戏加载
+        def discover_in_thread(adapter):
             try:
-                # 记录当前游戏数量
-                current_count = len(self.driver.find_elements(By.CSS_SELECTOR, '.Listed__Game'))
-                
-                # 如果游戏数量没有变化，尝试通过等待DOM变化来检测新内容
-                if current_count == games_count:
-                    # 等待新游戏加载或超时
-                    start_time = time.time()
-                    while time.time() - start_time < 3:  # 最多等待3秒
-                        new_count = len(self.driver.find_elements(By.CSS_SELECTOR, '.Listed__Game'))
-                        if new_count > current_count:
-                            current_count = new_count
-                            break
-                        # 短暂等待，避免过度消耗CPU
-                        time.sleep(0.2)
-                
-            except Exception as e:
-                self.logger.debug(f"等待新游戏加载时出错: {str(e)}")
-            
-            # 获取当前游戏数量
-            current_games = len(self.driver.find_elements(By.CSS_SELECTOR, '.Listed__Game'))
-            
-            if current_games > games_count:
-                pbar.update(current_games - games_count)
-                games_count = current_games
-                no_change_count = 0
-            else:
-                no_change_count += 1
-                
-            if no_change_count >= max_no_change:
-                break
-                
-            # 检查新的页面高度
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                no_change_count += 1
-            else:
-                last_height = new_height
-                no_change_count = 0
+                return discover(adapter, self.get_thread_driver())
+            finally:
+                self.release_current_thread_driver()
         
-        pbar.close()
-        self.logger.info(f"页面滚动完成，共加载 {games_count} 个游戏")
+        with ThreadPoolExecutor(max_workers=len(self.adapters)) as executor:
+            results = list(executor.map(discover_in_thread, self.adapters))
+        return {adapter.name: games for adapter, games in zip(self.adapters, results)}
+
+    def snapshot_store(self, adapter) -> ListingSnapshotStore:
+        """站点的列表快照存储，带命名空间的站点使用独立的子目录"""
+        if adapter.name not in self.snapshot_stores:
+            snapshot_dir = "games/cache/listings"
+            if adapter.namespace:
+                snapshot_dir = os.path.join(snapshot_dir, adapter.namespace)
+            self.snapshot_stores[adapter.name] = ListingSnapshotStore(snapshot_dir)
+        return self.snapshot_stores[adapter.name]
+
+    def diff_listing(self, adapter, games: List[Dict]) -> set:
+        """保存站点的列表快照并处理与上一次的差异，返回改名游戏的新URL"""
+        store = self.snapshot_store(adapter)
+        snapshot = store.build(games)
+        previous = store.load_latest()
+        diff = diff_snapshots(previous, snapshot) if previous is not None else None
+        store.save(snapshot, diff)
+        if not diff:
+            return set()
+        self.logger.info(f"{adapter.name} 列表变化: 新增 {len(diff.added)} 个, 消失 {len(diff.removed)} 个, 改名 {len(diff.renamed)} 个")
+        self.apply_listing_diff(diff, len(previous))
+        return diff.changed_urls
+
+    def apply_listing_diff(self, diff, previous_count: int):
+        """把列表中消失或改名的游戏在索引中标记为已下架"""
+        removed_ids = {entry["id"] for entry in diff.removed}
+        removed_ids |= {old["id"] for old, _ in diff.renamed}
+        if not removed_ids:
+            return
+        
+        # 列表只加载了一部分时会误判大量游戏消失
+        if previous_count and len(diff.removed) > previous_count * self.max_removed_ratio:
+            self.logger.warning(f"消失的游戏过多({len(diff.removed)}/{previous_count})，可能列表未完整加载，跳过下架标记")
+            return
+        
+        with self.index_lock:
+            self.mark_removed_games(removed_ids)
+
+    def mark_removed_games(self, game_ids):
+        """在index.json中标记已从站点下架的游戏"""
+        index_file = "games/metadata/index.json"
+        if not os.path.exists(index_file):
+            return
+        try:
+            with open(index_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            
+            marked = []
+            today = time.strftime("%Y-%m-%d")
+            for game in index["games"]:
+                if game["id"] in game_ids and not game.get("removed"):
+                    game["removed"] = True
+                    game["removedDate"] = today
+                    marked.append(game["id"])
+            
+            if marked:
+                self._rebuild_categories(index)
+                index["lastUpdated"] = today
+                with open(index_file, "w", encoding="utf-8") as f:
+                    json.dump(index, f, ensure_ascii=False, indent=2)
+                for game_id in marked:
+                    self.change_feed.emit("game_removed", game_id)
+                self.build_index_pages(index, marked)
+            self.logger.info(f"索引中标记了 {len(marked)} 个已下架游戏")
+        except Exception as e:
+            self.logger.error(f"标记下架游戏失败: {str(e)}")
+
+    def load_game_stats(self, game_id: str):
+        """读取游戏的统计数据，不存在或读取失败时返回None"""
+        try:
+            return self.storage.get(game_id, "stats")
+        except Exception as e:
+            self.logger.warning(f"读取游戏统计数据失败: {game_id} - {str(e)}")
+            return None
 
     def update_index(self, games: List[Dict]):
         """批量更新游戏索引文件"""
         if not games:
             return
+        from src.core.embed_checker import is_dead
             
         self.logger.debug(f"正在批量更新索引，游戏数量: {len(games)}")
         index_file = "games/metadata/index.json"
@@ -906,19 +958,11 @@ class GameCrawler:
         # 批量更新游戏列表
         updated_count = 0
         added_count = 0
+        events = []  # 索引保存成功后发出的game_added事件
         
         for game in games:
             # 读取统计数据
-            stats_file = f"games/metadata/{game['id']}/stats.json"
-            if os.path.exists(stats_file):
-                try:
-                    with open(stats_file, "r", encoding="utf-8") as f:
-                        stats = json.load(f)
-                except Exception as e:
-                    self.logger.warning(f"读取游戏统计数据失败: {game['id']} - {str(e)}")
-                    stats = {"rating": 0, "plays": 0}
-            else:
-                stats = {"rating": 0, "plays": 0}
+            stats = self.load_game_stats(game["id"]) or {"rating": 0, "plays": 0}
             
             # 添加或更新游戏信息
             game_index = {
@@ -931,30 +975,34 @@ class GameCrawler:
                 "added": game["addedDate"]
             }
             
+            # 嵌入检查判定无法嵌入的游戏保持下架，直到检查恢复正常
+            embed_dead = is_dead(game.get("health"))
+            
             # 检查是否已存在并更新
             if game["id"] in game_map:
-                index_pos = game_map[game["id"]]
-                index["games"][index_pos].update(game_index)
+                entry = index["games"][game_map[game["id"]]]
+                entry.update(game_index)
+                if embed_dead:
+                    if not entry.get("removed"):
+                        entry.update(removed=True, removedDate=time.strftime("%Y-%m-%d"), removedReason="embed")
+                # 重新上架的游戏清除下架标记
+                elif entry.pop("removed", None):
+                    events.append((game["id"], {"relisted": True}))
+                if not entry.get("removed"):
+                    entry.pop("removedDate", None)
+                    entry.pop("removedReason", None)
                 updated_count += 1
             else:
+                if embed_dead:
+                    game_index.update(removed=True, removedDate=time.strftime("%Y-%m-%d"), removedReason="embed")
                 index["games"].append(game_index)
                 game_map[game["id"]] = len(index["games"]) - 1
                 added_count += 1
+                if not embed_dead:
+                    events.append((game["id"], {"title": game["title"], "category": game["category"]}))
         
         # 更新分类信息
-        category_map = {}
-        for game in index["games"]:
-            cat = game.get("category", "")
-            if cat:
-                if cat not in category_map:
-                    category_map[cat] = {
-                        "id": self.sanitize_id(cat),
-                        "name": cat,
-                        "count": 0
-                    }
-                category_map[cat]["count"] += 1
-        
-        index["categories"] = list(category_map.values())
+        self._rebuild_categories(index)
         index["lastUpdated"] = time.strftime("%Y-%m-%d")
         
         # 保存索引
@@ -962,36 +1010,82 @@ class GameCrawler:
         try:
             with open(index_file, "w", encoding="utf-8") as f:
                 json.dump(index, f, ensure_ascii=False, indent=2)
+            for game_id, data in events:
+                self.change_feed.emit("game_added", game_id, **data)
+            self.build_index_pages(index, [game["id"] for game in games])
+            self.site_touched.update(game["id"] for game in games)
             self.logger.info(f"索引已更新: 添加 {added_count} 个新游戏, 更新 {updated_count} 个现有游戏")
         except Exception as e:
             self.logger.error(f"保存索引文件失败: {str(e)}")
             
+    def build_index_pages(self, index, touched_ids=None):
+        """增量重建分页索引，失败不影响index.json本身"""
+        try:
+            self.index_builder.build(index, touched_ids)
+        except Exception as e:
+            self.logger.error(f"生成分页索引失败: {str(e)}")
+
+    def build_site_pages(self):
+        """根据本次运行中变化的游戏增量生成静态页面"""
+        try:
+            self.page_generator.build(touched_ids=self.site_touched)
+            self.site_touched = set()
+        except Exception as e:
+            self.logger.error(f"生成静态页面失败: {str(e)}")
+
+    def _rebuild_categories(self, index):
+        """根据索引中的游戏重新统计分类数量，已下架的游戏不计入"""
+        from src.core.index_builder import index_categories
+        index["categories"] = index_categories(index["games"])
+
     def get_thread_driver(self):
-        """获取当前线程的WebDriver实例"""
+        """获取当前线程的WebDriver实例，线程第一次领到任务时才启动浏览器"""
         thread_id = threading.get_ident()
         
         with self.driver_lock:
-            if thread_id not in self.local_drivers:
-                self.logger.debug(f"为线程 {thread_id} 创建新的WebDriver实例")
-                # 创建新的WebDriver实例
-                chrome_options = Options()
-                chrome_options.add_argument("--headless=new")
-                chrome_options.add_argument("--disable-gpu")
-                chrome_options.add_argument("--no-sandbox")
-                chrome_options.add_argument("--disable-dev-shm-usage")
-                chrome_options.add_argument('--ignore-certificate-errors')
-                chrome_options.add_argument('--ignore-ssl-errors')
-                chrome_options.add_argument('--log-level=3')
-                chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-                
-                service = Service(ChromeDriverManager().install())
-                self.local_drivers[thread_id] = webdriver.Chrome(service=service, options=chrome_options)
-            
-            return self.local_drivers[thread_id]
-            
+            driver = self.local_drivers.get(thread_id)
+            if driver is None and self.idle_drivers:
+                driver = self.idle_drivers.pop()
+                self.local_drivers[thread_id] = driver
+                reused = True
+            else:
+                reused = False
+        if reused and not self._driver_alive(driver):
+            # 空闲期间浏览器可能已经崩溃，丢弃后重新启动
+            self.logger.warning(f"复用的WebDriver已失效，为线程 {thread_id} 重新创建")
+            with self.driver_lock:
+                self.local_drivers.pop(thread_id, None)
+            self._quit_driver(driver)
+            driver = None
+        if driver is None:
+            # 在锁外启动浏览器，多个线程可以同时启动；chromedriver路径整个进程只解析一次
+            self.logger.debug(f"为线程 {thread_id} 创建新的WebDriver实例")
+            driver = create_chrome_driver(extra_args=('--ignore-certificate-errors', '--ignore-ssl-errors'))
+            with self.driver_lock:
+                self.local_drivers[thread_id] = driver
+        return driver
+            
+    @staticmethod
+    def _driver_alive(driver) -> bool:
+        """检查WebDriver对应的浏览器是否仍然可用"""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _quit_driver(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.error(f"关闭WebDriver实例时出错: {str(e)}")
+
     def close_thread_drivers(self):
-        """关闭所有线程的WebDriver实例"""
+        """关闭所有线程的WebDriver实例，包括保温模式下空闲的实例"""
         with self.driver_lock:
+            idle, self.idle_drivers = self.idle_drivers, []
+            for driver in idle:
+                self._quit_driver(driver)
             for thread_id, driver in self.local_drivers.items():
                 try:
                     driver.quit()
@@ -1002,9 +1096,51 @@ class GameCrawler:
             # 清空驱动程序字典
             self.local_drivers.clear()
 
+    def close_current_thread_driver(self):
+        """关闭当前线程的WebDriver实例，在工作线程退出时调用"""
+        thread_id = threading.get_ident()
+        with self.driver_lock:
+            driver = self.local_drivers.pop(thread_id, None)
+        if driver:
+            try:
+                driver.quit()
+                self.logger.debug(f"已关闭线程 {thread_id} 的WebDriver实例")
+            except Exception as e:
+                self.logger.error(f"关闭线程 {thread_id} 的WebDriver实例时出错: {str(e)}")
+
+    def release_current_thread_driver(self):
+        """工作线程退出时交还WebDriver：保温模式下放入空闲列表供后续线程复用，否则关闭"""
+        if not self.keep_warm:
+            self.close_current_thread_driver()
+            return
+        with self.driver_lock:
+            driver = self.local_drivers.pop(threading.get_ident(), None)
+            if driver is not None:
+                self.idle_drivers.append(driver)
+
+    def driver_stats(self) -> Dict:
+        """当前启动的浏览器数量"""
+        with self.driver_lock:
+            return {"main": int(self._driver is not None), "threads": len(self.local_drivers),
+                    "idle": len(self.idle_drivers)}
+
+    def enter_phase(self, name: str):
+        """进入爬取的下一个阶段(listing/detail)，供性能分析比较各阶段的内存峰值"""
+        if self.profiler is not None:
+            self.profiler.enter_phase(name)
+
     def process_game_task(self, game, progress):
         """处理单个游戏爬取任务，用于并发执行"""
-        game_id = self.sanitize_id(game["title"])
+        if self.profiler is not None:
+            # 在工作线程中启用该线程的cProfile
+            with self.profiler.thread_scope():
+                return self._process_game_task(game, progress)
+        return self._process_game_task(game, progress)
+
+    def _process_game_task(self, game, progress):
+        adapter = self.adapter_for(game)
+        game_id = game.get("id") or adapter.game_id(game["title"])
+        refresh = game.get("refresh", False)
         result = {
             "success": False,
             "game_info": None,
@@ -1013,47 +1149,47 @@ class GameCrawler:
         
         try:
             # 检查游戏是否在缓存中（再次检查是为了避免任务提交后缓存更新的情况）
-            with self.cache_lock:
-                if game_id in self.game_cache:
-                    self.logger.debug(f"[线程任务] 使用缓存数据: {game['title']}")
-                    result["success"] = True
-                    result["game_info"] = self.game_cache[game_id]
-                    return result
+            if not refresh and game_id in self.game_cache:
+                self.logger.debug(f"[线程任务] 使用缓存数据: {game['title']}", extra={"game_id": game_id, "site": adapter.name})
+                result["success"] = True
+                result["game_info"] = self.game_cache.get(game_id)
+                return result
             
             # 检查是否已处理过该游戏
             with self.progress_lock:
-                if game["url"] in progress["processed_games"]:
-                    self.logger.debug(f"[线程任务] 跳过已处理的游戏: {game['title']}")
+                if not refresh and game["url"] in progress["processed_games"]:
+                    self.logger.debug(f"[线程任务] 跳过已处理的游戏: {game['title']}", extra={"game_id": game_id, "site": adapter.name})
                     result["success"] = True
                     return result
             
-            self.logger.info(f"[线程任务] 处理游戏: {game['title']}")
+            self.logger.info(f"[线程任务] 处理游戏: {game['title']}", extra={"game_id": game_id, "site": adapter.name})
+            
+            if self.save_queue is not None:
+                # 浏览器线程只加载页面，解析和保存交给保存队列，随即加载下一个游戏
+                # 加载失败时与不使用保存队列时一样最多尝试max_retries次
+                page_source = None
+                for retry_count in range(1, self.max_retries + 1):
+                    page_source = self.load_game_page(adapter, game["url"], game_id)
+                    if page_source is not None:
+                        break
+                    result["error"] = f"加载详情页失败 (尝试 {retry_count}/{self.max_retries})"
+                    self.logger.warning(f"{result['error']}: {game['title']}", extra={"game_id": game_id, "site": adapter.name})
+                if page_source is None:
+                    self._record_task_failure(game, game_id)
+                    return result
+                self.save_queue.put({"game": game, "adapter": adapter, "game_id": game_id, "page_source": page_source})
+                return None
             
             # 爬取游戏详情，使用线程专用WebDriver
             retry_count = 0
             while retry_count < self.max_retries:
                 try:
-                    game_info = self.crawl_game_detail(game["url"], game["title"], use_thread_driver=True)
+                    game_info = self.crawl_game_detail(game["url"], game["title"], use_thread_driver=True,
+                                                       refresh=refresh, adapter=adapter)
                     if game_info:
-                        result["success"] = True
-                        result["game_info"] = game_info
-                        
-                        # 线程安全地更新进度
-                        with self.progress_lock:
-                            if game["url"] not in progress["processed_games"]:
-                                progress["processed_games"].append(game["url"])
-                                progress["last_game"] = game["url"]
-                        
-                        # 线程安全地添加到缓冲区
-                        with self.buffer_lock:
-                            self.game_buffer.append(game_info)
-                        
-                        # 线程安全地更新统计信息
-                        with self.stats_lock:
-                            self.stats["success"] += 1
+                        self._record_task_success(game, game_id, game_info, progress, result)
                     else:
-                        with self.stats_lock:
-                            self.stats["failed"] += 1
+                        self._record_task_failure(game, game_id)
                     break
                 except Exception as e:
                     retry_count += 1
@@ -1062,8 +1198,7 @@ class GameCrawler:
                     result["error"] = error_msg
                     
                     if retry_count >= self.max_retries:
-                        with self.stats_lock:
-                            self.stats["failed"] += 1
+                        self._record_task_failure(game, game_id)
             
             return result
             
@@ -1072,11 +1207,65 @@ class GameCrawler:
             self.logger.error(error_msg)
             result["error"] = error_msg
             
-            with self.stats_lock:
-                self.stats["failed"] += 1
+            self._record_task_failure(game, game_id)
             
             return result
 
+    def process_save_task(self, task, progress):
+        """解析浏览器线程交出的页面并保存，在保存队列的线程中执行"""
+        if self.profiler is not None:
+            with self.profiler.thread_scope():
+                return self._process_save_task(task, progress)
+        return self._process_save_task(task, progress)
+
+    def _process_save_task(self, task, progress):
+        game, game_id = task["game"], task["game_id"]
+        result = {
+            "success": False,
+            "game_info": None,
+            "error": None
+        }
+        try:
+            game_info = self.save_game_detail(task["adapter"], game_id, game["title"], task.pop("page_source"))
+        except Exception as e:
+            self.logger.error(f"解析或保存游戏详情时出错: {str(e)}", extra={"url": game["url"], "stage": "detail"})
+            result["error"] = f"解析或保存游戏详情时出错: {str(e)}"
+            game_info = None
+        if game_info:
+            self._record_task_success(game, game_id, game_info, progress, result)
+        else:
+            self._record_task_failure(game, game_id)
+        return result
+
+    def _record_task_success(self, game, game_id, game_info, progress, result):
+        """记录成功爬取的游戏：更新进度、索引缓冲区和统计"""
+        result["success"] = True
+        result["game_info"] = game_info
+        
+        # 线程安全地更新进度
+        with self.progress_lock:
+            if game["url"] not in progress["processed_games"]:
+                progress["processed_games"].append(game["url"])
+                progress["last_game"] = game["url"]
+            if self.frontier:
+                self.frontier.record_success(game["url"], game_id)
+        
+        # 线程安全地添加到缓冲区
+        with self.buffer_lock:
+            self.game_buffer.append(game_info)
+        
+        # 线程安全地更新统计信息
+        with self.stats_lock:
+            self.stats["success"] += 1
+
+    def _record_task_failure(self, game, game_id):
+        """记录任务失败，失败次数会降低该游戏下次的调度优先级"""
+        with self.stats_lock:
+            self.stats["failed"] += 1
+        if self.frontier:
+            with self.progress_lock:
+                self.frontier.record_failure(game["url"], game_id)
+
 if __name__ == "__main__":
     crawler = GameCrawler()
     crawler.crawl() 
\ No newline at end of file
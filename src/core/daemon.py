@@ -0,0 +1,264 @@
+import json
+import os
+import re
+import sys
+import time
+import logging
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+INTERVAL_PATTERN = re.compile(r"(\d+(?:\.\d+)?)([smhd])")
+
+
+def parse_interval(value) -> float:
+    """
+    解析爬取间隔，返回秒数
+    :param value: 数字(秒)或带单位的字符串，如 "90s"、"15m"、"24h"、"1d"、"1h30m"
+    """
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        text = str(value).strip().lower()
+        if re.fullmatch(r"\d+(?:\.\d+)?", text):
+            seconds = float(text)
+        elif text and INTERVAL_PATTERN.sub("", text) == "":
+            seconds = sum(float(number) * INTERVAL_UNITS[unit] for number, unit in INTERVAL_PATTERN.findall(text))
+        else:
+            raise ValueError(f"无法解析的爬取间隔: {value!r}")
+    if seconds <= 0:
+        raise ValueError(f"爬取间隔必须大于0: {value!r}")
+    return seconds
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(value).isoformat(timespec="seconds") if value else None
+
+
+class CrawlDaemon:
+    """
+    守护模式：按固定间隔重复执行爬取，也可以通过本地控制接口立即触发一轮
+
+    所有轮次共用同一个GameCrawler并开启keep_warm，浏览器、HTTP连接池、游戏缓存、
+    分页索引和列表快照在两轮之间保留在内存中，之后的每一轮只需处理变化的部分。
+    同一时间只运行一轮，运行中收到的触发请求会被拒绝。
+    """
+
+    def __init__(self, crawler, interval: float = 24 * 3600, run_at_start: bool = True):
+        """
+        :param crawler: GameCrawler实例
+        :param interval: 两轮爬取开始时间的间隔(秒)
+        :param run_at_start: 启动后是否立即运行第一轮，否则等待一个间隔
+        """
+        self.crawler = crawler
+        self.crawler.keep_warm = True
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+
+        self._wake = threading.Event()  # 立即运行或停止时唤醒等待中的循环
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.started_at = None
+        self.state = "idle"  # idle/running/stopping/stopped
+        self.cycles = 0
+        self.failures = 0
+        self.last_cycle = None  # 最近一轮的结果
+        self.next_run = None if run_at_start else time.time() + interval
+        self.pending_reason = "startup" if run_at_start else None
+
+    # ---- 循环 ----
+
+    def start(self):
+        """在后台线程中启动循环"""
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._loop, name="crawl-daemon", daemon=True)
+        self._thread.start()
+        self.logger.info(f"守护模式已启动，爬取间隔 {self.interval:g} 秒")
+
+    def _loop(self):
+        try:
+            while not self._stopping.is_set():
+                with self._lock:
+                    reason = self.pending_reason
+                    if reason is None and self.next_run is not None and time.time() >= self.next_run:
+                        reason = "schedule"
+                    wait = None if reason else max(0.0, self.next_run - time.time())
+                if reason is None:
+                    self._wake.wait(wait)
+                    self._wake.clear()
+                    continue
+                self._run_cycle(reason)
+        finally:
+            with self._lock:
+                self.state = "stopped"
+
+    def _run_cycle(self, reason: str):
+        with self._lock:
+            self.state = "running"
+            self.pending_reason = None
+            started = time.time()
+            # 下一轮按本轮开始时间计算，爬取耗时不会让周期越来越晚
+            self.next_run = started + self.interval
+        self.logger.info(f"开始第 {self.cycles + 1} 轮爬取(触发原因: {reason})")
+
+        # crawl()自身捕获异常并保存进度，中断原因记录在crawler.last_error中
+        try:
+            self.crawler.crawl()
+            error = self.crawler.last_error
+        except Exception as e:
+            error = str(e)
+        if error:
+            self.logger.error(f"第 {self.cycles + 1} 轮爬取失败: {error}")
+
+        finished = time.time()
+        with self._lock:
+            self.cycles += 1
+            if error:
+                self.failures += 1
+            self.last_cycle = {
+                "reason": reason,
+                "start": _timestamp(started),
+                "end": _timestamp(finished),
+                "duration": round(finished - started, 1),
+                "success": self.crawler.stats.get("success", 0),
+                "failed": self.crawler.stats.get("failed", 0),
+                "error": error,
+            }
+            self.state = "stopping" if self._stopping.is_set() else "idle"
+        self.logger.info(f"第 {self.cycles} 轮爬取结束，耗时 {finished - started:.1f} 秒，"
+                         f"下一轮: {_timestamp(self.next_run)}")
+
+    def trigger(self, reason: str = "manual") -> bool:
+        """
+        请求立即运行一轮
+        :return: 是否接受，正在运行或已在等待运行时返回False
+        """
+        with self._lock:
+            if self.state != "idle" or self.pending_reason is not None:
+                return False
+            self.pending_reason = reason
+        self._wake.set()
+        return True
+
+    def stop(self, timeout: float = None):
+        """停止循环，正在运行的一轮会先完成，然后释放保留的浏览器和连接"""
+        with self._lock:
+            if self.state in ("idle", "running"):
+                self.state = "stopping"
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.crawler.shutdown()
+        self.logger.info("守护模式已停止")
+
+    def wait(self):
+        """阻塞直到循环线程退出"""
+        while self._thread is not None and self._thread.is_alive():
+            self._thread.join(1)
+
+    # ---- 状态 ----
+
+    def status(self) -> Dict:
+        with self._lock:
+            status = {
+                "state": self.state,
+                "interval": self.interval,
+                "startedAt": _timestamp(self.started_at),
+                "uptime": round(time.time() - self.started_at, 1) if self.started_at else 0,
+                "cycles": self.cycles,
+                "failures": self.failures,
+                "lastCycle": self.last_cycle,
+                "nextRun": _timestamp(self.next_run) if self.pending_reason is None else "pending",
+            }
+        status["cache"] = self.crawler.game_cache.stats()
+        status["drivers"] = self.crawler.driver_stats()
+        return status
+
+    def health(self) -> Tuple[bool, Dict]:
+        """
+        健康检查：循环线程存活、最近一轮没有异常、没有超过两个间隔未完成一轮
+        :return: (是否健康, 详情)
+        """
+        problems = []
+        if self._thread is None or not self._thread.is_alive():
+            problems.append("循环线程未运行")
+        with self._lock:
+            if self.last_cycle and self.last_cycle["error"]:
+                problems.append(f"最近一轮失败: {self.last_cycle['error']}")
+            if self.next_run and time.time() - self.next_run > self.interval:
+                problems.append("已超过计划时间一个间隔仍未完成本轮")
+            state = self.state
+        return not problems, {"healthy": not problems, "state": state, "problems": problems}
+
+
+class ControlRequestHandler(BaseHTTPRequestHandler):
+    """
+    控制接口(只应监听本机地址):
+    - GET /status   运行状态
+    - GET /health   健康检查，不健康时返回503
+    - POST /run     立即运行一轮，正在运行时返回409
+    - POST /stop    停止守护进程
+    """
+
+    daemon = None
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/status":
+            self._send_json(200, self.daemon.status())
+        elif path == "/health":
+            healthy, detail = self.daemon.health()
+            self._send_json(200 if healthy else 503, detail)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path == "/run":
+            if self.daemon.trigger("manual"):
+                self._send_json(202, {"accepted": True})
+            else:
+                self._send_json(409, {"accepted": False, "state": self.daemon.status()["state"]})
+        elif path == "/stop":
+            self._send_json(202, {"stopping": True})
+            # 在新线程中停止，避免等待当前一轮时阻塞请求
+            threading.Thread(target=self.daemon.stop, daemon=True).start()
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+
+
+def serve(crawler, interval: float, host="127.0.0.1", port=8003, run_at_start=True):
+    """启动守护循环和控制接口，直到通过接口停止或收到中断"""
+    daemon = CrawlDaemon(crawler, interval=interval, run_at_start=run_at_start)
+    ControlRequestHandler.daemon = daemon
+    server = ThreadingHTTPServer((host, port), ControlRequestHandler)
+    server_thread = threading.Thread(target=server.serve_forever, name="daemon-control", daemon=True)
+    server_thread.start()
+    daemon.start()
+    print(f"守护模式已启动: 每 {interval:g} 秒爬取一轮，控制接口 http://{host}:{port}/status")
+    try:
+        daemon.wait()
+    except KeyboardInterrupt:
+        print("\n正在停止，等待当前一轮结束...")
+    finally:
+        daemon.stop()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,325 @@
+import os
+import sys
+import json
+import time
+import logging
+import multiprocessing
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.storage import create_store
+
+ASSET_URL_PREFIX = "/games/assets/"
+HASH_SIZE = 8        # 哈希取DCT左上角 8x8 的低频系数，共64位
+DCT_SIZE = 32        # 计算DCT前缩放到的边长
+PAIR_BLOCK_BYTES = 64 * 1024 * 1024  # 批量计算距离时每块异或结果占用的内存上限
+AUTO_BANDING = 20000  # 不同的哈希超过此数量时默认使用分段索引
+DEFAULT_BANDS = 4
+
+
+def _dct_matrix(size: int):
+    import numpy as np
+
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+def image_phash(path: str) -> int:
+    """
+    计算图片的感知哈希(pHash)，在进程池中执行
+    灰度缩放到32x32后做二维DCT，取左上角8x8低频系数，大于中位数(不含直流分量)的位置为1
+    :return: 64位无符号整数
+    """
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(path) as img:
+        pixels = np.asarray(img.convert("L").resize((DCT_SIZE, DCT_SIZE), Image.LANCZOS), dtype=np.float64)
+    matrix = _dct_matrix(DCT_SIZE)
+    low = (matrix @ pixels @ matrix.T)[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def popcount(values):
+    """uint64数组逐元素统计1的个数，NumPy 2.0以下按字节查表"""
+    import numpy as np
+
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return table[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def near_pairs(hashes, threshold: int):
+    """
+    整体批量比较：按行分块，每块与其后的全部哈希计算异或和汉明距离，
+    每块只占用PAIR_BLOCK_BYTES左右的内存
+    :param hashes: uint64数组
+    :return: (i数组, j数组, 距离数组)，i < j
+    """
+    import numpy as np
+
+    count = len(hashes)
+    rows = max(1, PAIR_BLOCK_BYTES // max(1, count * 8))
+    found_i, found_j, found_d = [], [], []
+    for start in range(0, count, rows):
+        block = hashes[start:start + rows]
+        distances = popcount(block[:, None] ^ hashes[None, start:])
+        i, j = np.nonzero(distances <= threshold)
+        keep = i < j
+        i, j = i[keep], j[keep]
+        found_i.append(i + start)
+        found_j.append(j + start)
+        found_d.append(distances[i, j])
+    if not found_i:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    return np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_d)
+
+
+def _flip_masks(width: int, radius: int):
+    """width位以内、1的个数不超过radius的全部掩码"""
+    masks = [0]
+    for bits in range(1, radius + 1):
+        masks.extend(sum(1 << b for b in combo) for combo in combinations(range(width), bits))
+    return masks
+
+
+def banded_pairs(hashes, threshold: int, bands: int = 4):
+    """
+    分段索引(multi-index hashing)：64位分成bands段，两个哈希的距离不超过threshold时，
+    至少有一段的距离不超过 threshold // bands(抽屉原理)。
+    每段按段值排序，对每个哈希查找段值相差不超过该距离的哈希作为候选，再计算完整距离，结果与整体比较一致。
+    段数越多每段越短，候选越多；默认4段(每段16位)适合10万级的目录。
+    :param hashes: uint64数组，应已去除完全相同的哈希
+    """
+    import numpy as np
+
+    count = len(hashes)
+    width = 64 // bands
+    radius = threshold // bands
+    candidates = []
+    positions = np.arange(count)
+    for band in range(bands):
+        shift = 64 - width * (band + 1) if band < bands - 1 else 0
+        bits = width if band < bands - 1 else 64 - width * (bands - 1)
+        keys = (hashes >> np.uint64(shift)) & np.uint64((1 << bits) - 1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        for mask in _flip_masks(bits, radius):
+            probes = keys ^ np.uint64(mask)
+            low = np.searchsorted(sorted_keys, probes, side="left")
+            counts = np.searchsorted(sorted_keys, probes, side="right") - low
+            total = int(counts.sum())
+            if not total:
+                continue
+            # 把每个哈希匹配到的[low, low + count)区间展开为(行, 列)对
+            rows = np.repeat(positions, counts)
+            steps = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            cols = order[np.repeat(low, counts) + steps]
+            keep = rows < cols
+            candidates.append(rows[keep] * count + cols[keep])
+    if not candidates:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    pairs = np.unique(np.concatenate(candidates))
+    pairs_i, pairs_j = pairs // count, pairs % count
+    distances = popcount(hashes[pairs_i] ^ hashes[pairs_j])
+    keep = distances <= threshold
+    return pairs_i[keep], pairs_j[keep], distances[keep]
+
+
+def clusters_from_pairs(count: int, pairs_i, pairs_j, singles: bool = False):
+    """
+    并查集合并相似对，返回[[位置, ...], ...]
+    :param singles: 是否包含只有一个成员的簇
+    """
+    parent = list(range(count))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in zip(pairs_i.tolist(), pairs_j.tolist()):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    groups = {}
+    for pos in range(count):
+        groups.setdefault(find(pos), []).append(pos)
+    return [members for members in groups.values() if singles or len(members) > 1]
+
+
+class DuplicateFinder:
+    """
+    按缩略图的感知哈希查找重复和近似重复的游戏
+
+    同一个游戏常以不同标题和ID出现(如4th_and_goal_2013/2014/2015)，
+    缩略图哈希保存在 games/cache/phash.npz(ID数组 + uint64哈希数组 + 文件大小和修改时间)，
+    缩略图未变化的游戏不重新计算。查找时用NumPy一次批量计算汉明距离，结果按簇写入 games/cache/duplicates.json。
+    """
+
+    def __init__(self, metadata_dir="games/metadata", assets_dir="games/assets", storage=None,
+                 cache_file="games/cache/phash.npz", report_file="games/cache/duplicates.json",
+                 threshold=6, bands=None, workers=None):
+        """
+        :param storage: 元数据存储(CatalogStore)，默认为metadata_dir下的JSON目录
+        :param threshold: 汉明距离不超过此值视为重复(0-64)
+        :param bands: 分段索引的段数，None时哈希数超过AUTO_BANDING且threshold不超过7时使用DEFAULT_BANDS段，0为总是整体比较
+        :param workers: 计算哈希的进程数，默认为CPU核数
+        """
+        self.metadata_dir = metadata_dir
+        self.assets_dir = assets_dir
+        self.storage = storage or create_store("json", metadata_dir=metadata_dir)
+        self.cache_file = cache_file
+        self.report_file = report_file
+        self.threshold = threshold
+        self.bands = bands
+        self.workers = workers
+        self.logger = logging.getLogger(__name__)
+
+    def thumbnail_path(self, info: dict):
+        url = info.get("thumbnailUrl") or ""
+        if not url.startswith(ASSET_URL_PREFIX):
+            return None
+        path = os.path.join(self.assets_dir, url[len(ASSET_URL_PREFIX):])
+        return path if os.path.isfile(path) else None
+
+    def load_cache(self) -> dict:
+        """游戏ID -> (哈希, 文件大小, 修改时间)"""
+        import numpy as np
+
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with np.load(self.cache_file) as data:
+                return {game_id: (int(value), int(size), float(mtime)) for game_id, value, size, mtime in
+                        zip(data["ids"].tolist(), data["hashes"], data["sizes"], data["mtimes"])}
+        except Exception as e:
+            self.logger.warning(f"读取感知哈希缓存失败，将全部重新计算: {str(e)}")
+            return {}
+
+    def save_cache(self, ids, hashes, stamps):
+        import numpy as np
+
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        tmp_path = self.cache_file + ".tmp.npz"
+        np.savez(tmp_path, ids=np.array(ids, dtype=str), hashes=hashes,
+                 sizes=np.array([stamp[0] for stamp in stamps], dtype=np.int64),
+                 mtimes=np.array([stamp[1] for stamp in stamps], dtype=np.float64))
+        os.replace(tmp_path, self.cache_file)
+
+    def compute_hashes(self):
+        """
+        计算所有游戏缩略图的哈希，缓存中大小和修改时间相同的直接使用
+        :return: (ID列表, uint64哈希数组, 标题字典)
+        """
+        import numpy as np
+
+        cache = self.load_cache()
+        ids, stamps, titles = [], [], {}
+        values = []
+        pending = []  # (位置, 路径)
+        for game_id, info in self.storage.scan("info"):
+            path = self.thumbnail_path(info)
+            if not path:
+                continue
+            stat = os.stat(path)
+            stamp = (stat.st_size, stat.st_mtime)
+            cached = cache.get(game_id)
+            titles[game_id] = info.get("title", game_id)
+            ids.append(game_id)
+            stamps.append(stamp)
+            if cached and cached[1:] == stamp:
+                values.append(cached[0])
+            else:
+                values.append(None)
+                pending.append((len(ids) - 1, path))
+
+        if pending:
+            self.logger.info(f"计算 {len(pending)} 个缩略图的感知哈希(缓存命中 {len(ids) - len(pending)} 个)")
+            # 与截图编码相同，用spawn启动图片进程，避免在多线程进程中fork
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [(pos, path, pool.submit(image_phash, path)) for pos, path in pending]
+                for pos, path, future in futures:
+                    try:
+                        values[pos] = future.result()
+                    except Exception as e:
+                        self.logger.warning(f"计算感知哈希失败: {path} - {str(e)}")
+
+        keep = [pos for pos, value in enumerate(values) if value is not None]
+        ids = [ids[pos] for pos in keep]
+        stamps = [stamps[pos] for pos in keep]
+        hashes = np.array([values[pos] for pos in keep], dtype=np.uint64)
+        if pending:
+            self.save_cache(ids, hashes, stamps)
+        return ids, hashes, titles
+
+    def find(self) -> dict:
+        """查找重复游戏并写入报告，返回报告"""
+        import numpy as np
+
+        start_time = time.time()
+        ids, hashes, titles = self.compute_hashes()
+        hashed_time = time.time()
+
+        # 完全相同的哈希(同一张图片、占位图)先合并，只在不同的哈希之间查找近似重复
+        unique, inverse = np.unique(hashes, return_inverse=True)
+        inverse = inverse.ravel()
+        bands = self.bands
+        if bands is None:
+            # 每段允许的距离超过1时探测的掩码数增长很快，分段索引反而比整体比较慢
+            use_bands = len(unique) > AUTO_BANDING and self.threshold // DEFAULT_BANDS <= 1
+            bands = DEFAULT_BANDS if use_bands else 0
+        if bands:
+            pairs_i, pairs_j, distances = banded_pairs(unique, self.threshold, min(bands, 64))
+            method = f"banded({bands})"
+        else:
+            pairs_i, pairs_j, distances = near_pairs(unique, self.threshold)
+            method = "full"
+
+        members_of = {}
+        for pos, key in enumerate(inverse.tolist()):
+            members_of.setdefault(key, []).append(pos)
+        roots = clusters_from_pairs(len(unique), pairs_i, pairs_j, singles=True)
+        cluster_of = {key: number for number, keys in enumerate(roots) for key in keys}
+        max_distance = [0] * len(roots)
+        for i, distance in zip(pairs_i.tolist(), distances.tolist()):
+            number = cluster_of[i]
+            max_distance[number] = max(max_distance[number], distance)
+        clusters = []
+        for number, keys in enumerate(roots):
+            members = sorted(pos for key in keys for pos in members_of[key])
+            if len(members) < 2:
+                continue
+            clusters.append({
+                "ids": [ids[pos] for pos in members],
+                "titles": [titles[ids[pos]] for pos in members],
+                "maxDistance": max_distance[number],
+                "hash": f"{int(unique[keys[0]]):016x}",
+            })
+        clusters.sort(key=lambda cluster: (-len(cluster["ids"]), cluster["ids"][0]))
+
+        report = {
+            "generatedAt": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "games": len(ids),
+            "threshold": self.threshold,
+            "method": method,
+            "uniqueHashes": len(unique),
+            "pairs": len(pairs_i),
+            "hashSeconds": round(hashed_time - start_time, 3),
+            "searchSeconds": round(time.time() - hashed_time, 3),
+            "clusters": clusters,
+        }
+        os.makedirs(os.path.dirname(self.report_file) or ".", exist_ok=True)
+        with open(self.report_file, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
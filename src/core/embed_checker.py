@@ -0,0 +1,430 @@
+import json
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from fnmatch import fnmatch
+from urllib.parse import urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.core.work_queue import BoundedWorkQueue
+from src.core.change_feed import ChangeFeed
+from src.core.index_builder import IndexBuilder, index_categories
+from src.core.page_generator import PageGenerator
+from src.storage import create_store
+from src.utils.browser import create_chrome_driver
+
+# ok: 可以嵌入; blocked: X-Frame-Options/CSP禁止嵌入; unsupported: Flash等浏览器已不支持的格式;
+# dead: 地址不存在(404/410); error: 超时、连接失败、5xx等暂时性错误，不作为下架依据
+HEALTH_STATUSES = ("ok", "blocked", "unsupported", "dead", "error")
+DEAD_STATUSES = ("blocked", "unsupported", "dead")
+UNSUPPORTED_SUFFIXES = (".swf", ".dcr", ".unity3d")
+DEAD_HTTP_STATUSES = (404, 410)
+# 404/410需要连续出现这么多次才判定为失效，避免源站短暂故障导致游戏被下架
+DEAD_CONFIRMATIONS = 2
+
+
+def is_dead(health) -> bool:
+    """健康检查结果是否表示游戏无法嵌入，应从索引中移出"""
+    if not health or health.get("status") not in DEAD_STATUSES:
+        return False
+    if health["status"] == "dead":
+        return health.get("failures", 1) >= DEAD_CONFIRMATIONS
+    return True
+
+
+def frame_block_reason(headers, url: str, site_origin: str = None):
+    """
+    根据响应头判断页面能否被嵌入到site_origin的iframe中，可以嵌入时返回None
+    CSP的frame-ancestors优先于X-Frame-Options，与浏览器行为一致
+    """
+    target = urlparse(url)
+    site = urlparse(site_origin) if site_origin else None
+    same_origin = bool(site) and (site.scheme, site.netloc) == (target.scheme, target.netloc)
+
+    for policy in headers.get("Content-Security-Policy", "").split(","):
+        for directive in policy.split(";"):
+            parts = directive.split()
+            if not parts or parts[0].lower() != "frame-ancestors":
+                continue
+            sources = [source.lower() for source in parts[1:]]
+            if "*" in sources:
+                return None
+            if "'self'" in sources and same_origin:
+                return None
+            if site:
+                for source in sources:
+                    source_url = urlparse(source if "//" in source else f"//{source}")
+                    if source_url.scheme and source_url.scheme != site.scheme:
+                        continue
+                    if source_url.netloc and fnmatch(site.netloc, source_url.netloc):
+                        return None
+            return f"frame-ancestors {' '.join(sources) or 'none'}"
+
+    options = headers.get("X-Frame-Options", "").strip().lower()
+    if options == "deny":
+        return "X-Frame-Options: DENY"
+    if options == "sameorigin" and not same_origin:
+        return "X-Frame-Options: SAMEORIGIN"
+    return None
+
+
+class BrowserPool:
+    """
+    无头浏览器池
+
+    浏览器在第一次使用时才启动，最多size个实例，检查结束后统一关闭。
+    """
+
+    def __init__(self, size=2, page_load_timeout=20):
+        self.size = size
+        self.page_load_timeout = page_load_timeout
+        self._idle = queue.Queue()
+        self._created = 0
+        self._all = []
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def _create(self):
+        return create_chrome_driver(extra_args=("--mute-audio",), page_load_timeout=self.page_load_timeout)
+
+    @contextmanager
+    def driver(self):
+        """借出一个浏览器实例，池未满时新建，否则等待其他线程归还"""
+        with self._lock:
+            create = self._idle.empty() and self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                driver = self._create()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            with self._lock:
+                self._all.append(driver)
+        else:
+            driver = self._idle.get()
+        try:
+            yield driver
+        except Exception:
+            # 出错的浏览器可能已处于异常状态，丢弃后下次重新创建
+            self._discard(driver)
+            raise
+        else:
+            self._idle.put(driver)
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._all:
+                self._all.remove(driver)
+                self._created -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            drivers, self._all, self._created = self._all, [], 0
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                self.logger.warning(f"关闭浏览器失败: {str(e)}")
+
+
+class EmbedChecker:
+    """
+    嵌入地址(gameUrl)可用性检查
+
+    第一层用连接池并发发送HEAD请求(服务器不支持时退回GET)，检查状态码以及
+    X-Frame-Options/CSP frame-ancestors是否允许嵌入；可选的第二层用无头浏览器池
+    实际加载通过第一层的地址并记录加载耗时。
+
+    结果按URL缓存在 games/cache/embed_health.json 中，只重新检查超过TTL的地址。
+    每个游戏的结果写入info.json的health字段，无法嵌入的游戏从索引中移出，恢复后重新加入。
+    """
+
+    def __init__(self, metadata_dir="games/metadata", storage=None, workers=32, ttl=24 * 3600,
+                 timeout=10, browser=False, browser_workers=2, site_origin=None,
+                 cache_file="games/cache/embed_health.json", change_feed=None, max_removed_ratio=0.5):
+        """
+        :param metadata_dir: 元数据目录(index.json所在目录)
+        :param storage: 元数据存储(CatalogStore)，默认为metadata_dir下的JSON目录
+        :param workers: 第一层检查的并发请求数
+        :param ttl: 检查结果的有效期(秒)，暂时性错误的有效期不超过1小时
+        :param timeout: 单个请求的超时时间(秒)
+        :param browser: 是否启用无头浏览器检查
+        :param browser_workers: 浏览器池大小
+        :param site_origin: 嵌入游戏的站点地址，用于判断frame-ancestors/SAMEORIGIN
+        :param cache_file: 检查结果缓存文件
+        :param change_feed: 变更事件流，默认使用 games/cache/feed
+        :param max_removed_ratio: 单次判定失效的游戏超过在架游戏的该比例时视为检查环境异常，不移出索引
+        """
+        self.metadata_dir = metadata_dir
+        self.index_file = os.path.join(metadata_dir, "index.json")
+        self.storage = storage or create_store("json", metadata_dir=metadata_dir)
+        self.workers = workers
+        self.ttl = ttl
+        self.timeout = timeout
+        self.browser = browser
+        self.browser_workers = browser_workers
+        self.site_origin = site_origin
+        self.cache_file = cache_file
+        self.change_feed = change_feed or ChangeFeed()
+        self.max_removed_ratio = max_removed_ratio
+        self.index_builder = IndexBuilder()
+        self.page_generator = PageGenerator(metadata_dir=metadata_dir, storage=self.storage)
+        self.logger = logging.getLogger(__name__)
+
+        # requests只在实际检查时导入，爬虫导入本模块的is_dead时不受影响
+        from src.utils.http import create_session
+        self.session = create_session(pool_size=workers, retries=1)
+        self.cache = {}
+        self.cache_lock = threading.Lock()
+        self.counters = {status: 0 for status in HEALTH_STATUSES}
+        self.counters["cached"] = 0
+
+    # ---- 缓存 ----
+
+    def load_cache(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"读取嵌入检查缓存失败: {str(e)}")
+            return {}
+
+    def save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_path = self.cache_file + ".tmp"
+        with self.cache_lock:
+            data = dict(self.cache)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_file)
+
+    def is_fresh(self, health) -> bool:
+        if not health or not health.get("checkedAt"):
+            return False
+        try:
+            checked = datetime.strptime(health["checkedAt"], "%Y-%m-%d %H:%M:%S").timestamp()
+        except ValueError:
+            return False
+        ttl = self.ttl if health.get("status") != "error" else min(self.ttl, 3600)
+        return time.time() - checked < ttl
+
+    # ---- 检查 ----
+
+    def check_url(self, url: str, previous=None) -> dict:
+        """第一层检查，返回health记录"""
+        import requests
+
+        health = {"status": "ok", "checkedAt": time.strftime("%Y-%m-%d %H:%M:%S")}
+        if not url:
+            health.update(status="dead", reason="缺少gameUrl")
+        elif urlparse(url).path.lower().endswith(UNSUPPORTED_SUFFIXES):
+            health.update(status="unsupported", reason="浏览器不支持的插件格式")
+        else:
+            try:
+                response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+                if response.status_code >= 400:
+                    # 不少服务器不支持HEAD，用GET再确认一次，只读取响应头
+                    response = self.session.get(url, allow_redirects=True, timeout=self.timeout, stream=True)
+                    response.close()
+                health["httpStatus"] = response.status_code
+                if response.url != url:
+                    health["finalUrl"] = response.url
+                if response.status_code in DEAD_HTTP_STATUSES:
+                    health.update(status="dead", reason=f"HTTP {response.status_code}")
+                elif response.status_code >= 400:
+                    health.update(status="error", reason=f"HTTP {response.status_code}")
+                else:
+                    reason = frame_block_reason(response.headers, response.url, self.site_origin)
+                    if reason:
+                        health.update(status="blocked", reason=reason)
+            except requests.exceptions.Timeout:
+                health.update(status="error", reason="请求超时")
+            except requests.exceptions.ConnectionError as e:
+                # DNS、代理、SSL等连接失败可能是检查所在的网络出了问题，不能说明地址已失效
+                health.update(status="error", reason=f"连接失败: {str(e)[:200]}")
+            except requests.exceptions.RequestException as e:
+                health.update(status="error", reason=str(e)[:200])
+
+        if health["status"] == "dead":
+            failures = previous.get("failures", 0) if previous and previous.get("status") == "dead" else 0
+            health["failures"] = failures + 1
+        return health
+
+    def check_in_browser(self, pool: BrowserPool, url: str, health: dict) -> dict:
+        """第二层检查：在无头浏览器中加载，记录加载耗时"""
+        try:
+            with pool.driver() as driver:
+                start = time.time()
+                driver.get(url)
+                timing = driver.execute_script(
+                    "const nav = performance.getEntriesByType('navigation')[0];"
+                    "return {load: nav ? nav.loadEventEnd : null,"
+                    " content: document.body ? document.body.innerHTML.length : 0};")
+                load_time = timing.get("load") or (time.time() - start) * 1000
+                health["loadTime"] = int(load_time)
+                if not timing.get("content"):
+                    health.update(status="error", reason="页面内容为空")
+        except Exception as e:
+            health.update(status="error", reason=f"浏览器加载失败: {str(e).splitlines()[0][:200]}")
+        return health
+
+    def load_targets(self):
+        """[(游戏ID, info)]，跳过没有info的目录"""
+        return list(self.storage.scan("info"))
+
+    def check(self):
+        """检查全部游戏的嵌入地址，更新info.json和索引，返回计数结果"""
+        start_time = time.time()
+        self.cache = self.load_cache()
+        targets = self.load_targets()
+        urls = {}
+        for game_id, info in targets:
+            urls.setdefault(info.get("gameUrl") or "", []).append(game_id)
+        stale = [url for url in urls if not self.is_fresh(self.cache.get(url))]
+        self.counters["cached"] = len(urls) - len(stale)
+        print(f"\n=== 嵌入检查: {len(targets)} 个游戏, {len(urls)} 个地址, 需要检查 {len(stale)} 个 ===")
+
+        checked = {}
+
+        def handle(url, health, error):
+            if error is not None:
+                self.logger.warning(f"嵌入检查失败: {url} - {str(error)}")
+                return
+            with self.cache_lock:
+                self.cache[url] = health
+                checked[url] = health
+
+        work_queue = BoundedWorkQueue(handler=lambda url: self.check_url(url, self.cache.get(url)),
+                                      workers=self.workers, on_result=handle, name="embed-worker")
+        try:
+            for url in stale:
+                work_queue.put(url)
+            work_queue.join()
+        finally:
+            work_queue.close(wait=True)
+            self.session.close()
+
+        if self.browser:
+            candidates = [url for url, health in checked.items() if health["status"] == "ok"]
+            pool = BrowserPool(self.browser_workers, page_load_timeout=self.timeout * 2)
+            browser_queue = BoundedWorkQueue(handler=lambda url: self.check_in_browser(pool, url, checked[url]),
+                                             workers=self.browser_workers, on_result=handle, name="embed-browser")
+            try:
+                for url in candidates:
+                    browser_queue.put(url)
+                browser_queue.join()
+            finally:
+                browser_queue.close(wait=True)
+                pool.close()
+
+        self.save_cache()
+        changed = self.apply_health(targets)
+
+        for url, health in checked.items():
+            self.counters[health["status"]] += len(urls.get(url, []))
+        elapsed = time.time() - start_time
+        print(" | ".join(f"{key}: {value}" for key, value in self.counters.items()) + f" | 耗时: {elapsed:.1f}秒")
+        return changed
+
+    # ---- 写回 ----
+
+    def apply_health(self, targets):
+        """把缓存中的结果写入各游戏的info.json，并根据结果移出或恢复索引中的游戏"""
+        health_by_id = {}
+        documents = []
+        for game_id, info in targets:
+            health = self.cache.get(info.get("gameUrl") or "")
+            if not health:
+                continue
+            health_by_id[game_id] = health
+            if self.health_changed(info.get("health"), health):
+                info["health"] = health
+                documents.append((game_id, "info", info))
+                # game.json是info.json的缓存副本，保持一致
+                if self.storage.exists(game_id, "game"):
+                    documents.append((game_id, "game", info))
+        if documents:
+            self.storage.put_many(documents)
+        return self.update_index(health_by_id)
+
+    @staticmethod
+    def health_changed(old, new) -> bool:
+        """
+        结果是否需要写回info.json：状态、原因或是否判定为无法嵌入发生变化
+        只有checkedAt(和连续失败次数)变化时不重写文档，检查时间保存在缓存文件中
+        """
+        if not old:
+            return True
+        return (old.get("status"), old.get("reason")) != (new.get("status"), new.get("reason")) \
+            or is_dead(old) != is_dead(new)
+
+    def update_index(self, health_by_id) -> list:
+        """无法嵌入的游戏标记为下架(removedReason=embed)，恢复可用的游戏重新上架"""
+        if not os.path.exists(self.index_file):
+            return []
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except Exception as e:
+            self.logger.error(f"读取索引文件失败: {str(e)}")
+            return []
+
+        today = time.strftime("%Y-%m-%d")
+        removed, restored = [], []
+        listed = 0
+        for entry in index.get("games", []):
+            if not entry.get("removed"):
+                listed += 1
+            health = health_by_id.get(entry.get("id"))
+            if not health:
+                continue
+            if is_dead(health):
+                if not entry.get("removed"):
+                    removed.append((entry, health))
+            elif entry.get("removedReason") == "embed" and health["status"] != "error":
+                for key in ("removed", "removedDate", "removedReason"):
+                    entry.pop(key, None)
+                restored.append(entry["id"])
+
+        # 大量游戏同时失效时更可能是源站或网络故障
+        if listed and len(removed) > listed * self.max_removed_ratio:
+            self.logger.warning(f"判定失效的游戏过多({len(removed)}/{listed})，可能是网络或源站故障，跳过移出索引")
+            removed = []
+        for entry, _ in removed:
+            entry.update(removed=True, removedDate=today, removedReason="embed")
+        removed = [(entry["id"], health) for entry, health in removed]
+        if not removed and not restored:
+            return []
+
+        index["categories"] = index_categories(index["games"])
+        index["lastUpdated"] = today
+
+        with open(self.index_file, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        for game_id, health in removed:
+            self.change_feed.emit("game_removed", game_id, reason="embed", health=health["status"])
+        for game_id in restored:
+            self.change_feed.emit("game_added", game_id, relisted=True)
+
+        touched = [game_id for game_id, _ in removed] + restored
+        try:
+            self.index_builder.build(index, touched)
+            self.page_generator.build(index, touched_ids=())
+        except Exception as e:
+            self.logger.error(f"重建分页索引或静态页面失败: {str(e)}")
+        self.logger.info(f"嵌入检查: 移出索引 {len(removed)} 个游戏, 恢复 {len(restored)} 个游戏")
+        return touched
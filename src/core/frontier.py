@@ -0,0 +1,129 @@
+import heapq
+import math
+import time
+import logging
+from datetime import datetime
+
+
+# 评分权重
+NEW_GAME_SCORE = 1000.0          # 从未爬取过的游戏
+STALE_SCORE_PER_DAY = 10.0       # 距上次爬取每过一天增加的分值
+STALE_SCORE_MAX = 300.0          # 陈旧度分值上限(30天)
+POPULARITY_WEIGHT = 40.0         # 评分 × log10(评分人数) 的权重
+FAILURE_PENALTY = 100.0          # 每次近期失败扣除的分值
+FAILURE_WINDOW = 7 * 24 * 3600   # 失败记录的有效期(秒)
+
+
+class CrawlFrontier:
+    """
+    优先级爬取队列
+
+    按以下因素为每个游戏URL打分，分值高的先出队:
+    - 从未爬取过的新游戏
+    - 距上次爬取的时间
+    - 热度(stats.json中的rating和ratingCount)
+    - 近期失败次数
+
+    history为进度文件中的crawl_history字典(URL -> 爬取记录)，
+    record_* 方法会直接修改它，调用方需自行持有进度锁。
+    """
+
+    def __init__(self, history: dict, stats_loader=None, recrawl_after=None):
+        """
+        :param history: URL到爬取记录的映射，记录格式为
+                        {"id", "last_crawled", "failures", "last_failure"}
+        :param stats_loader: 根据游戏ID读取统计数据的函数，返回dict或None
+        :param recrawl_after: 已爬取游戏多少秒后需要重新爬取，None表示不重新爬取
+        """
+        self.history = history
+        self.stats_loader = stats_loader
+        self.recrawl_after = recrawl_after
+        self.logger = logging.getLogger(__name__)
+        self._heap = []
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def last_crawled(self, url: str, cached_info: dict = None):
+        """获取上次爬取时间戳，没有爬取记录时回退到info.json的lastUpdated日期"""
+        record = self.history.get(url)
+        if record and record.get("last_crawled"):
+            return record["last_crawled"]
+        if cached_info and cached_info.get("lastUpdated"):
+            try:
+                return datetime.strptime(cached_info["lastUpdated"], "%Y-%m-%d").timestamp()
+            except ValueError:
+                pass
+        return None
+
+    def score(self, game_id: str, url: str, known: bool, cached_info: dict = None, now=None) -> float:
+        """计算游戏的爬取优先级分值"""
+        now = now or time.time()
+        record = self.history.get(url, {})
+        score = 0.0
+
+        last = self.last_crawled(url, cached_info)
+        if not known and last is None:
+            score += NEW_GAME_SCORE
+        elif last is not None:
+            days = max(0.0, (now - last) / 86400)
+            score += min(days * STALE_SCORE_PER_DAY, STALE_SCORE_MAX)
+
+        if known and self.stats_loader:
+            stats = self.stats_loader(game_id) or {}
+            rating = float(stats.get("rating") or 0)
+            rating_count = int(stats.get("ratingCount") or 0)
+            score += (rating / 5.0) * math.log10(1 + rating_count) * POPULARITY_WEIGHT
+
+        failures = record.get("failures", 0)
+        if failures and now - record.get("last_failure", 0) < FAILURE_WINDOW:
+            score -= failures * FAILURE_PENALTY
+
+        return score
+
+    def is_due(self, url: str, known: bool, cached_info: dict = None, now=None) -> bool:
+        """判断游戏是否需要(重新)爬取"""
+        if not known:
+            return True
+        if self.recrawl_after is None:
+            return False
+        last = self.last_crawled(url, cached_info)
+        return last is None or (now or time.time()) - last >= self.recrawl_after
+
+    def push(self, game: dict, known: bool = False, cached_info: dict = None, refresh: bool = False):
+        """
+        加入候选游戏，不需要爬取时返回False
+        :param game: 包含title、url、id的游戏字典
+        :param known: 游戏是否已在缓存或已处理列表中
+        :param cached_info: 缓存中的游戏信息，用于推算上次爬取时间
+        :param refresh: 强制重新爬取(列表中新增或改名的URL可能已在已处理列表中)
+        """
+        now = time.time()
+        if not self.is_due(game["url"], known, cached_info, now):
+            return False
+        game["refresh"] = known or refresh
+        priority = self.score(game["id"], game["url"], known, cached_info, now)
+        self._seq += 1
+        heapq.heappush(self._heap, (-priority, self._seq, game))
+        return True
+
+    def pop(self):
+        """取出优先级最高的游戏，队列为空时返回None"""
+        if not self._heap:
+            return None
+        return heapq.heappop(self._heap)[2]
+
+    def record_success(self, url: str, game_id: str):
+        """记录爬取成功，清除失败计数"""
+        self.history[url] = {
+            "id": game_id,
+            "last_crawled": time.time(),
+            "failures": 0
+        }
+
+    def record_failure(self, url: str, game_id: str):
+        """记录爬取失败"""
+        record = self.history.setdefault(url, {"id": game_id, "failures": 0})
+        record["failures"] = record.get("failures", 0) + 1
+        record["last_failure"] = time.time()
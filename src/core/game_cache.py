@@ -0,0 +1,93 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class GameCache:
+    """
+    已知游戏缓存
+
+    爬取时大部分调用只需要知道"这个游戏是否已知"以及上次更新日期，不需要完整的info。
+    因此缓存分为两部分:
+    - 成员表: 游戏ID(驻留字符串) -> lastUpdated日期(同一日期共用一个字符串)，每个游戏只占几十字节
+    - LRU: 最近读写过的少量完整记录，未命中时从存储读取
+    常驻内存与游戏总数成正比，但不再随描述、标签等文本的大小增长。
+    """
+
+    def __init__(self, storage, max_records: int = 512):
+        """
+        :param storage: 元数据存储(CatalogStore)，LRU未命中时读取game.json，没有时读取info.json
+        :param max_records: LRU中保留的完整记录数
+        """
+        self.storage = storage
+        self.max_records = max(0, max_records)
+        self._known = {}  # 游戏ID -> lastUpdated
+        self._dirs = {}  # 游戏ID与存储目录名不同时的对应关系(旧数据)
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"known_hits": 0, "known_misses": 0, "hits": 0, "misses": 0, "loads": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._known)
+
+    def __contains__(self, game_id: str) -> bool:
+        with self._lock:
+            known = game_id in self._known
+            self.counters["known_hits" if known else "known_misses"] += 1
+        return known
+
+    def add(self, game_id: str, info: Dict, keep_record: bool = True, storage_id: str = None):
+        """
+        记录一个已知游戏
+        :param keep_record: 是否把完整记录放入LRU，启动时批量加载时为False
+        :param storage_id: 存储中的目录名，与game_id相同时不需要传
+        """
+        game_id = sys.intern(game_id)
+        updated = info.get("lastUpdated")
+        with self._lock:
+            self._known[game_id] = sys.intern(updated) if isinstance(updated, str) else None
+            if storage_id and storage_id != game_id:
+                self._dirs[game_id] = storage_id
+            if keep_record and self.max_records:
+                self._records[game_id] = info
+                self._records.move_to_end(game_id)
+                self._evict()
+
+    def _evict(self):
+        while len(self._records) > self.max_records:
+            self._records.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def summary(self, game_id: str) -> Optional[Dict]:
+        """调度需要的最少信息，未知游戏返回None"""
+        if game_id not in self._known:
+            return None
+        return {"id": game_id, "lastUpdated": self._known[game_id]}
+
+    def get(self, game_id: str) -> Optional[Dict]:
+        """完整记录，LRU未命中时从存储读取，未知游戏返回None"""
+        with self._lock:
+            info = self._records.get(game_id)
+            if info is not None:
+                self._records.move_to_end(game_id)
+                self.counters["hits"] += 1
+                return info
+            self.counters["misses"] += 1
+            if game_id not in self._known:
+                return None
+            storage_id = self._dirs.get(game_id, game_id)
+        info = self.storage.get(storage_id, "game") or self.storage.get(storage_id, "info")
+        if info is None:
+            return None
+        info["id"] = game_id
+        with self._lock:
+            self.counters["loads"] += 1
+            if self.max_records:
+                self._records[game_id] = info
+                self._evict()
+        return info
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self.counters, known=len(self._known), records=len(self._records))
@@ -0,0 +1,206 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+import logging
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.storage.asset_pack import AssetVersions
+from src.utils.text import sanitize_id
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖，缺失时只生成.gz
+    brotli = None
+
+# 分页索引输出目录，放在games/metadata之外，避免与游戏ID的目录冲突
+INDEX_PAGES_DIR = "games/index"
+
+SORT_VIEWS = {
+    "rating": lambda game: (game.get("rating") or 0, game.get("plays") or 0),
+    "plays": lambda game: (game.get("plays") or 0, game.get("rating") or 0),
+    "added": lambda game: added_sort_key(game.get("added")),
+}
+
+
+def index_categories(games) -> list:
+    """
+    按index.json中的游戏统计各分类的游戏数量，已下架的游戏不计入
+    :return: [{"id", "name", "count"}]，按分类第一次出现的顺序排列
+    """
+    categories = {}
+    for game in games:
+        category = game.get("category", "")
+        if category and not game.get("removed"):
+            entry = categories.setdefault(category, {"id": sanitize_id(category), "name": category, "count": 0})
+            entry["count"] += 1
+    return list(categories.values())
+
+
+def added_sort_key(value) -> str:
+    """把"Jan 21, 2020"这类发布日期转换为可排序的ISO日期，无法解析时排在最后"""
+    if not value:
+        return ""
+    for fmt in ("%b %d, %Y", "%B %d, %Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return ""
+
+
+class IndexBuilder:
+    """
+    分片索引生成
+
+    由index.json生成供前端直接使用的分页文件:
+    - <范围>/<排序>/<页码>.json，范围为all或分类ID，排序为rating/plays/added(均为降序)
+    - manifest.json，记录排序方式、分页数量和各分类的游戏数
+    - 每个文件同时生成.gz(以及安装了brotli时的.br)预压缩版本
+    - 缩略图使用带内容版本的URL(?v=<MD5>)，可以被浏览器长期缓存
+
+    增量构建时只重新生成受影响范围中内容实际发生变化的分页，
+    每页的内容哈希保存在不对外发布的 .build_state.json 中。
+    """
+
+    def __init__(self, output_dir=INDEX_PAGES_DIR, page_size=48, asset_versions=None):
+        """
+        :param output_dir: 分页输出目录
+        :param page_size: 每页游戏数
+        :param asset_versions: 资源URL版本(AssetVersions)，默认按games/assets计算
+        """
+        self.output_dir = output_dir
+        self.page_size = page_size
+        self.asset_versions = asset_versions or AssetVersions()
+        self.manifest_file = os.path.join(output_dir, "manifest.json")
+        self.state_file = os.path.join(output_dir, ".build_state.json")
+        self.logger = logging.getLogger(__name__)
+
+    def load_state(self):
+        """读取上次构建的状态，不存在时返回None"""
+        if not os.path.exists(self.state_file):
+            return None
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"读取分页构建状态失败，将全量重建: {str(e)}")
+            return None
+
+    def build(self, index: dict, touched_ids=None):
+        """
+        生成分页文件
+        :param index: index.json的内容
+        :param touched_ids: 本批次变化的游戏ID，None表示全量重建
+        :return: 写入的分页数量
+        """
+        games = [dict(game, thumbnailUrl=self.asset_versions.url(game.get("thumbnailUrl")))
+                 if game.get("thumbnailUrl") else game
+                 for game in index.get("games", []) if not game.get("removed")]
+        scopes = {"all": {"name": "All Games", "games": games}}
+        for game in games:
+            category = game.get("category")
+            if category:
+                scope_id = sanitize_id(category)
+                scopes.setdefault(scope_id, {"name": category, "games": []})["games"].append(game)
+
+        state = self.load_state()
+        if state is None or state.get("pageSize") != self.page_size:
+            touched_ids = None
+            state = {"scopes": {}}
+
+        # 需要重建的范围：包含变化游戏的范围，以及游戏数量发生变化的范围(游戏被移出或下架)
+        if touched_ids is None:
+            dirty = set(scopes)
+        else:
+            touched_ids = set(touched_ids)
+            dirty = {"all"}
+            for scope_id, scope in scopes.items():
+                old_scope = state["scopes"].get(scope_id)
+                if not old_scope or old_scope["count"] != len(scope["games"]) \
+                        or any(game["id"] in touched_ids for game in scope["games"]):
+                    dirty.add(scope_id)
+        dirty |= set(state["scopes"]) - set(scopes)
+
+        written = 0
+        new_scopes = {}
+        for scope_id, scope in scopes.items():
+            if scope_id not in dirty:
+                new_scopes[scope_id] = state["scopes"][scope_id]
+                continue
+            old_hashes = state["scopes"].get(scope_id, {}).get("hashes", {})
+            hashes = {}
+            for sort, key in SORT_VIEWS.items():
+                ordered = sorted(scope["games"], key=key, reverse=True)
+                pages = max(1, (len(ordered) + self.page_size - 1) // self.page_size)
+                sort_hashes = []
+                for page in range(pages):
+                    payload = {
+                        "scope": scope_id,
+                        "sort": sort,
+                        "page": page + 1,
+                        "pages": pages,
+                        "total": len(ordered),
+                        "games": ordered[page * self.page_size:(page + 1) * self.page_size]
+                    }
+                    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                    digest = hashlib.sha1(data).hexdigest()
+                    sort_hashes.append(digest)
+                    old = old_hashes.get(sort, [])
+                    path = os.path.join(self.output_dir, scope_id, sort, f"{page + 1}.json")
+                    if page < len(old) and old[page] == digest and os.path.exists(path):
+                        continue
+                    self._write(path, data)
+                    written += 1
+                # 删除页数减少后多余的旧分页
+                for page in range(pages, len(old_hashes.get(sort, []))):
+                    self._remove(os.path.join(self.output_dir, scope_id, sort, f"{page + 1}.json"))
+                hashes[sort] = sort_hashes
+            new_scopes[scope_id] = {
+                "name": scope["name"],
+                "count": len(scope["games"]),
+                "pages": max(1, (len(scope["games"]) + self.page_size - 1) // self.page_size),
+                "hashes": hashes
+            }
+
+        # 已不存在的分类删除全部分页
+        for scope_id in set(state["scopes"]) - set(scopes):
+            for sort, old in state["scopes"][scope_id].get("hashes", {}).items():
+                for page in range(len(old)):
+                    self._remove(os.path.join(self.output_dir, scope_id, sort, f"{page + 1}.json"))
+
+        new_manifest = {
+            "lastUpdated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "pageSize": self.page_size,
+            "total": len(games),
+            "sorts": list(SORT_VIEWS),
+            "scopes": {scope_id: {key: scope[key] for key in ("name", "count", "pages")}
+                       for scope_id, scope in new_scopes.items()}
+        }
+        self._write(self.manifest_file,
+                    json.dumps(new_manifest, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        with open(self.state_file, "w", encoding="utf-8") as f:
+            json.dump({"pageSize": self.page_size, "scopes": new_scopes}, f, separators=(",", ":"))
+        self.asset_versions.save()
+        self.logger.info(f"分页索引已更新: 重建范围 {len(dirty)} 个, 写入分页 {written} 个")
+        return written
+
+    def _write(self, path: str, data: bytes):
+        """原子写入文件及其预压缩版本"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        variants = [(path, data), (path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli:
+            variants.append((path + ".br", brotli.compress(data)))
+        for target, content in variants:
+            tmp_path = target + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, target)
+
+    def _remove(self, path: str):
+        for target in (path, path + ".gz", path + ".br"):
+            if os.path.exists(target):
+                os.remove(target)
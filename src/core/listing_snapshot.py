@@ -0,0 +1,127 @@
+import json
+import os
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple
+
+
+@dataclass
+class ListingDiff:
+    """两次列表快照之间的差异"""
+    added: List[Dict] = field(default_factory=list)     # 新出现的URL
+    removed: List[Dict] = field(default_factory=list)   # 从列表中消失的URL
+    renamed: List[Tuple[Dict, Dict]] = field(default_factory=list)  # (旧条目, 新条目)，URL相同但ID变化
+
+    @property
+    def changed_urls(self) -> set:
+        """需要重新爬取的URL集合"""
+        return {entry["url"] for entry in self.added} | {new["url"] for _, new in self.renamed}
+
+    def summary(self) -> Dict:
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "renamed": len(self.renamed)
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "added": [entry["url"] for entry in self.added],
+            "removed": [entry["url"] for entry in self.removed],
+            "renamed": [{"url": new["url"], "from": old["id"], "to": new["id"]} for old, new in self.renamed]
+        }
+
+
+def diff_snapshots(old: List[Dict], new: List[Dict]) -> ListingDiff:
+    """
+    比较两个按URL排序的快照，归并扫描，时间复杂度 O(n + m)
+    :param old: 上一次的快照条目列表
+    :param new: 本次的快照条目列表
+    """
+    diff = ListingDiff()
+    i, j = 0, 0
+    while i < len(old) and j < len(new):
+        old_entry, new_entry = old[i], new[j]
+        if old_entry["url"] == new_entry["url"]:
+            if old_entry["id"] != new_entry["id"]:
+                diff.renamed.append((old_entry, new_entry))
+            i += 1
+            j += 1
+        elif old_entry["url"] < new_entry["url"]:
+            diff.removed.append(old_entry)
+            i += 1
+        else:
+            diff.added.append(new_entry)
+            j += 1
+    diff.removed.extend(old[i:])
+    diff.added.extend(new[j:])
+    return diff
+
+
+class ListingSnapshotStore:
+    """
+    游戏列表快照存储
+
+    每次爬取的列表结果按URL排序后保存为一个快照文件，
+    文件中同时记录与上一次快照的差异。
+    """
+
+    def __init__(self, snapshot_dir="games/cache/listings", keep=30):
+        """
+        :param snapshot_dir: 快照目录
+        :param keep: 保留的快照数量
+        """
+        self.snapshot_dir = snapshot_dir
+        self.keep = max(1, keep)
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def build(games: List[Dict]) -> List[Dict]:
+        """由列表页解析结果生成排序后的快照条目，同一URL只保留一条"""
+        entries = {}
+        for game in games:
+            if game.get("url"):
+                entries[game["url"]] = {"url": game["url"], "id": game["id"], "title": game["title"]}
+        return [entries[url] for url in sorted(entries)]
+
+    def _snapshot_files(self) -> List[str]:
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        return sorted(name for name in os.listdir(self.snapshot_dir)
+                      if name.startswith("listing_") and name.endswith(".json"))
+
+    def load_latest(self) -> List[Dict]:
+        """读取最近一次快照，不存在时返回None"""
+        files = self._snapshot_files()
+        if not files:
+            return None
+        path = os.path.join(self.snapshot_dir, files[-1])
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["entries"]
+        except Exception as e:
+            self.logger.error(f"读取列表快照失败: {path} - {str(e)}")
+            return None
+
+    def save(self, entries: List[Dict], diff: ListingDiff = None) -> str:
+        """保存快照并清理过旧的快照，返回快照文件路径"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = os.path.join(self.snapshot_dir, f"listing_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        data = {
+            "createdAt": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "count": len(entries),
+            "diff": diff.to_dict() if diff else None,
+            "entries": entries
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        for name in self._snapshot_files()[:-self.keep]:
+            try:
+                os.remove(os.path.join(self.snapshot_dir, name))
+            except OSError as e:
+                self.logger.warning(f"删除旧快照失败: {name} - {str(e)}")
+        return path
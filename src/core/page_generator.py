@@ -0,0 +1,324 @@
+import hashlib
+import json
+import os
+import sys
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from urllib.parse import quote
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.core.index_builder import SORT_VIEWS
+from src.storage import create_store
+from src.storage.asset_pack import AssetVersions
+from src.utils.text import sanitize_id
+
+# 游戏页实际用到的info.json字段，其他字段变化不触发重建
+GAME_PAGE_FIELDS = ("title", "description", "developer", "category", "tags", "controls",
+                    "gameUrl", "thumbnailUrl", "previewVideoUrl", "screenshots", "addedDate")
+# 列表卡片用到的index.json字段
+CARD_FIELDS = ("id", "title", "category", "rating", "plays", "thumbnailUrl")
+
+
+def _digest(value) -> str:
+    data = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+# ---- 页面模板 ----
+# 渲染函数都是纯函数(上下文 -> HTML)，可以在进程池中执行
+
+def _layout(title: str, body: str, base: str) -> str:
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{escape(title)}</title>
+    <style>
+        body {{ margin: 0; background: #f0f0f0; font-family: Arial, sans-serif; }}
+        .header {{ background: #333; color: white; padding: 1rem; }}
+        .header a {{ color: white; text-decoration: none; }}
+        .main {{ max-width: 1100px; margin: 0 auto; padding: 1rem; }}
+        .cards {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 1rem; }}
+        .card {{ background: white; border-radius: 4px; overflow: hidden; color: #333; text-decoration: none; }}
+        .card img {{ width: 100%; aspect-ratio: 16 / 9; object-fit: cover; }}
+        .card div {{ padding: 0.5rem; }}
+        .game-frame {{ width: 100%; height: 600px; border: none; background: white; }}
+        .shots img {{ width: 32%; margin-right: 1%; aspect-ratio: 16 / 9; object-fit: cover; }}
+        .pager a {{ margin-right: 0.5rem; }}
+    </style>
+</head>
+<body>
+    <div class="header"><a href="{base}/index.html">Games</a></div>
+    <div class="main">
+{body}
+    </div>
+</body>
+</html>
+"""
+
+
+def _game_href(base: str, game_id: str) -> str:
+    return f"{base}/games/{quote(game_id)}.html"
+
+
+def _category_href(base: str, scope_id: str, page: int = 1) -> str:
+    return f"{base}/category/{quote(scope_id)}/{page}.html"
+
+
+def _cards(cards, base: str) -> str:
+    items = []
+    for card in cards:
+        items.append(
+            f'<a class="card" href="{_game_href(base, card["id"])}">'
+            f'<img src="{escape(card.get("thumbnailUrl") or "")}" alt="" loading="lazy">'
+            f'<div><strong>{escape(card.get("title") or card["id"])}</strong><br>'
+            f'{card.get("rating") or 0:.1f} ★ · {card.get("plays") or 0} plays</div></a>')
+    return '<div class="cards">' + "".join(items) + "</div>"
+
+
+def render_game_page(context: dict) -> str:
+    info, base = context["info"], context["base"]
+    tags = "".join(f"<li>{escape(tag)}</li>" for tag in info.get("tags") or [])
+    controls = info.get("controls")
+    if isinstance(controls, dict):
+        controls = "; ".join(f"{key}: {', '.join(value)}" for key, value in controls.items() if value)
+    category = info.get("category") or ""
+    frame = (f'<iframe class="game-frame" src="{escape(info["gameUrl"])}" allowfullscreen></iframe>'
+             if info.get("gameUrl") else "")
+    shots = "".join(f'<img src="{escape(url)}" alt="" loading="lazy">' for url in info.get("screenshots") or [])
+    body = f"""        <h1>{escape(info.get("title") or context["id"])}</h1>
+        {frame}
+        <div class="shots">{shots}</div>
+        <p><strong>开发者:</strong> {escape(info.get("developer") or "")}</p>
+        <p><strong>分类:</strong> <a href="{_category_href(base, sanitize_id(category))}">{escape(category)}</a></p>
+        <p>{escape(info.get("description") or "")}</p>
+        <h3>游戏控制说明</h3>
+        <p>{escape(controls or "暂无控制说明")}</p>
+        <ul>{tags}</ul>
+        <h3>同类游戏</h3>
+        {_cards(context["related"], base)}"""
+    return _layout(info.get("title") or context["id"], body, base)
+
+
+def render_category_page(context: dict) -> str:
+    base, page, pages = context["base"], context["page"], context["pages"]
+    pager = "".join(
+        f'<a href="{_category_href(base, context["scope"], n)}">{n}</a>' if n != page else f"<b>{n}</b>"
+        for n in range(1, pages + 1))
+    body = f"""        <h1>{escape(context["name"])} ({context["total"]})</h1>
+        {_cards(context["games"], base)}
+        <p class="pager">{pager}</p>"""
+    return _layout(context["name"], body, base)
+
+
+def render_home_page(context: dict) -> str:
+    base = context["base"]
+    categories = "".join(
+        f'<li><a href="{_category_href(base, scope["id"])}">{escape(scope["name"])}</a> ({scope["count"]})</li>'
+        for scope in context["categories"])
+    sections = "".join(f"<h2>{escape(title)}</h2>{_cards(cards, base)}" for title, cards in context["sections"])
+    body = f"""        <h1>All Games ({context["total"]})</h1>
+        {sections}
+        <h2>分类</h2>
+        <ul>{categories}</ul>"""
+    return _layout("Games", body, base)
+
+
+RENDERERS = {"game": render_game_page, "category": render_category_page, "home": render_home_page}
+
+
+def render_jobs(jobs):
+    """渲染并原子写入一批页面，jobs为[(模板名, 上下文, 输出路径)]"""
+    for template, context, path in jobs:
+        html = RENDERERS[template](context)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+    return len(jobs)
+
+
+class PageGenerator:
+    """
+    增量静态页面生成
+
+    由index.json和各游戏的info.json生成:
+    - games/<游戏ID>.html: 游戏页，依赖该游戏的info.json字段和同分类评分最高的若干游戏卡片
+    - category/<分类ID>/<页码>.html: 分类页(按评分排序)，依赖该页游戏的卡片和分页数
+    - index.html: 首页，依赖各榜单的游戏卡片和分类数量
+
+    每个输出记录其输入的指纹，未受影响的页面不会重新渲染。
+    缩略图、预览视频和截图使用带内容版本的URL(?v=<MD5>)，资源内容变化时引用它的页面随之重建。
+    只有本次变化的游戏(touched_ids)会重新读取info.json，其他游戏沿用上次记录的指纹。
+    """
+
+    def __init__(self, output_dir="games/site", metadata_dir="games/metadata", storage=None,
+                 base_url="/games/site", page_size=48, related_count=6, home_count=12,
+                 workers=None, pool_threshold=64, asset_versions=None):
+        """
+        :param output_dir: 页面输出目录
+        :param metadata_dir: 元数据目录(index.json所在目录)
+        :param storage: 元数据存储(CatalogStore)，默认为metadata_dir下的JSON目录
+        :param base_url: 页面之间链接使用的URL前缀
+        :param page_size: 分类页每页游戏数
+        :param related_count: 游戏页展示的同类游戏数
+        :param home_count: 首页每个榜单的游戏数
+        :param workers: 渲染进程数，默认为CPU数
+        :param pool_threshold: 需要渲染的页面超过该数量时才使用进程池
+        :param asset_versions: 资源URL版本(AssetVersions)，默认按games/assets计算
+        """
+        self.output_dir = output_dir
+        self.metadata_dir = metadata_dir
+        self.storage = storage or create_store("json", metadata_dir=metadata_dir)
+        self.base_url = base_url.rstrip("/")
+        self.page_size = page_size
+        self.related_count = related_count
+        self.home_count = home_count
+        self.workers = workers
+        self.pool_threshold = pool_threshold
+        self.asset_versions = asset_versions or AssetVersions()
+        self.state_file = os.path.join(output_dir, ".build_state.json")
+        self.logger = logging.getLogger(__name__)
+
+    def load_state(self):
+        """读取上次生成的状态，不存在或配置变化时返回None"""
+        if not os.path.exists(self.state_file):
+            return None
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception as e:
+            self.logger.warning(f"读取页面生成状态失败，将全量重建: {str(e)}")
+            return None
+        if state.get("config") != self._config():
+            return None
+        return state
+
+    def _config(self):
+        return {"base": self.base_url, "pageSize": self.page_size,
+                "related": self.related_count, "home": self.home_count}
+
+    def _load_index(self):
+        with open(os.path.join(self.metadata_dir, "index.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _page_info(self, game_id: str):
+        info = self.storage.get(game_id, "info") or {}
+        page_info = {field: info.get(field) for field in GAME_PAGE_FIELDS}
+        for field in ("thumbnailUrl", "previewVideoUrl"):
+            page_info[field] = self.asset_versions.url(page_info[field])
+        if page_info["screenshots"]:
+            page_info["screenshots"] = [self.asset_versions.url(url) for url in page_info["screenshots"]]
+        return page_info
+
+    def build(self, index=None, touched_ids=None, full=False):
+        """
+        生成受影响的页面
+        :param index: index.json的内容，None时从元数据目录读取
+        :param touched_ids: 本批次变化的游戏ID，None表示检查所有游戏的info.json
+        :param full: 忽略上次的状态，重新渲染全部页面
+        :return: 渲染的页面数量
+        """
+        start = time.time()
+        index = index if index is not None else self._load_index()
+        state = None if full else self.load_state()
+        if state is None:
+            state = {"inputs": {}, "outputs": {}}
+            touched_ids = None
+
+        games = [game for game in index.get("games", []) if not game.get("removed")]
+        cards = {game["id"]: dict({field: game.get(field) for field in CARD_FIELDS},
+                                  thumbnailUrl=self.asset_versions.url(game.get("thumbnailUrl")))
+                 for game in games}
+        by_rating = sorted(games, key=SORT_VIEWS["rating"], reverse=True)
+        scopes = {}
+        for game in by_rating:
+            if game.get("category"):
+                scope = scopes.setdefault(sanitize_id(game["category"]), {"name": game["category"], "ids": []})
+                scope["ids"].append(game["id"])
+
+        # 游戏页的info输入：变化的游戏重新读取，其余沿用上次的指纹
+        old_inputs = state["inputs"]
+        inputs, infos = {}, {}
+        for game_id in cards:
+            if touched_ids is None or game_id in touched_ids or game_id not in old_inputs:
+                infos[game_id] = self._page_info(game_id)
+                inputs[game_id] = _digest(infos[game_id])
+            else:
+                inputs[game_id] = old_inputs[game_id]
+
+        # 计算每个输出的依赖指纹，和上次不同的才渲染
+        planned = {}  # 相对路径 -> (模板名, 上下文生成函数, 依赖指纹)
+        for game in games:
+            game_id = game["id"]
+            scope = scopes.get(sanitize_id(game.get("category") or ""), {"ids": []})
+            related = [cards[rid] for rid in scope["ids"][:self.related_count + 1] if rid != game_id]
+            related = related[:self.related_count]
+            fingerprint = _digest([inputs[game_id], related])
+            planned[f"games/{game_id}.html"] = ("game", fingerprint, (game_id, related))
+
+        for scope_id, scope in scopes.items():
+            total = len(scope["ids"])
+            pages = max(1, (total + self.page_size - 1) // self.page_size)
+            for page in range(1, pages + 1):
+                page_cards = [cards[gid] for gid in scope["ids"][(page - 1) * self.page_size:page * self.page_size]]
+                context = {"scope": scope_id, "name": scope["name"], "page": page, "pages": pages,
+                           "total": total, "games": page_cards, "base": self.base_url}
+                planned[f"category/{scope_id}/{page}.html"] = ("category", _digest(context), context)
+
+        home = {
+            "total": len(games),
+            "sections": [(title, [cards[game["id"]] for game in
+                                  sorted(games, key=SORT_VIEWS[sort], reverse=True)[:self.home_count]])
+                         for title, sort in (("Top Rated", "rating"), ("Most Played", "plays"),
+                                             ("New Games", "added"))],
+            "categories": sorted(({"id": scope_id, "name": scope["name"], "count": len(scope["ids"])}
+                                  for scope_id, scope in scopes.items()), key=lambda item: -item["count"]),
+            "base": self.base_url,
+        }
+        planned["index.html"] = ("home", _digest(home), home)
+
+        old_outputs = state["outputs"]
+        jobs = []
+        for rel_path, (template, fingerprint, context) in planned.items():
+            path = os.path.join(self.output_dir, *rel_path.split("/"))
+            if old_outputs.get(rel_path) == fingerprint and os.path.exists(path):
+                continue
+            if template == "game":
+                game_id, related = context
+                info = infos.get(game_id) or self._page_info(game_id)
+                context = {"id": game_id, "info": info, "related": related, "base": self.base_url}
+            jobs.append((template, context, path))
+
+        rendered = self._render(jobs)
+
+        # 删除已下架游戏和已消失分类的页面
+        for rel_path in set(old_outputs) - set(planned):
+            path = os.path.join(self.output_dir, *rel_path.split("/"))
+            if os.path.exists(path):
+                os.remove(path)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self.state_file, "w", encoding="utf-8") as f:
+            json.dump({"config": self._config(), "inputs": inputs,
+                       "outputs": {rel_path: plan[1] for rel_path, plan in planned.items()}},
+                      f, separators=(",", ":"))
+        self.asset_versions.save()
+        self.logger.info(f"静态页面已更新: 渲染 {rendered}/{len(planned)} 个页面, 耗时 {time.time() - start:.2f}秒")
+        return rendered
+
+    def _render(self, jobs):
+        """页面较少时在当前进程渲染，否则分块提交到进程池"""
+        if len(jobs) < self.pool_threshold:
+            return render_jobs(jobs)
+        workers = self.workers or os.cpu_count() or 1
+        chunk_size = max(16, len(jobs) // (workers * 4))
+        chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        # 爬虫和守护进程中已有日志线程和工作线程，用spawn避免fork时复制锁的状态
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return sum(pool.map(render_jobs, chunks))
@@ -0,0 +1,308 @@
+import io
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import logging
+import tempfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.storage import create_store
+
+
+class CrawlProfiler:
+    """
+    爬虫性能分析
+
+    - CPU: 每个工作线程(以及主线程)各自一个cProfile，线程只在处理任务期间启用，结束后合并
+    - 阶段: 详情页的load/extract/assets/store各阶段累计耗时、线程CPU时间和内存增量
+    - 内存: tracemalloc记录listing/detail两个阶段的内存峰值；前snapshot_games个游戏在每个阶段前后
+      各拍一次快照，列出分配最多的代码行
+
+    tracemalloc统计的是整个进程，并发时阶段内存会混入其他线程的分配，需要精确归因时用 --workers 1。
+    输出目录中包含 report.txt(排序后的报告)、report.json、每个线程的 .prof 文件和合并后的 merged.prof，
+    .prof文件可用 python -m pstats 或 snakeviz 查看。
+    """
+
+    def __init__(self, output_dir: str = None, snapshot_games: int = 3, top: int = 30, trace_frames: int = 1):
+        """
+        :param output_dir: 输出目录，默认为 profile/<时间>
+        :param snapshot_games: 拍摄阶段内存快照的游戏数
+        :param top: 报告中列出的函数和代码行数量
+        :param trace_frames: tracemalloc记录的调用栈深度
+        """
+        self.output_dir = output_dir or os.path.join("profile", time.strftime("%Y%m%d_%H%M%S"))
+        self.snapshot_games = snapshot_games
+        self.top = top
+        self.trace_frames = trace_frames
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._profiles = {}  # 线程名 -> cProfile.Profile
+        self._local = threading.local()
+        self._stages = {}  # 阶段名 -> {count, wall, cpu, alloc, maxWall}
+        self._stage_allocations = {}  # 阶段名 -> [tracemalloc.StatisticDiff]
+        self._snapshot_ids = set()
+        self._phases = []  # [{name, wall, startMemory, endMemory, peakMemory}]
+        self._phase = None
+        self._started = None
+
+    # ---- 开始和结束 ----
+
+    def start(self):
+        self._started = time.time()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+        self._enable_thread_profile()
+
+    def stop(self) -> str:
+        """结束分析，写出报告，返回报告文件路径"""
+        self._close_phase()
+        self._disable_thread_profile()
+        tracemalloc.stop()
+        return self.write_report()
+
+    # ---- 线程CPU分析 ----
+
+    def _enable_thread_profile(self) -> bool:
+        name = threading.current_thread().name
+        with self._lock:
+            profile = self._profiles.get(name)
+            if profile is None:
+                profile = self._profiles[name] = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Python 3.12起同一时间只能有一个cProfile在运行，其余线程不做CPU分析
+            self.logger.debug(f"线程 {name} 无法启用cProfile: {str(e)}")
+            return False
+        self._local.profile = profile
+        return True
+
+    def _disable_thread_profile(self):
+        profile = getattr(self._local, "profile", None)
+        if profile is not None:
+            profile.disable()
+            self._local.profile = None
+
+    @contextmanager
+    def thread_scope(self):
+        """在当前线程中启用cProfile，同一线程的多次调用累计到同一个Profile"""
+        if getattr(self._local, "profile", None) is not None:
+            yield
+            return
+        enabled = self._enable_thread_profile()
+        try:
+            yield
+        finally:
+            if enabled:
+                self._disable_thread_profile()
+
+    # ---- 阶段统计 ----
+
+    def enter_phase(self, name: str):
+        """结束上一个爬取阶段并开始下一个，记录每个阶段的内存峰值"""
+        self._close_phase()
+        tracemalloc.reset_peak()
+        self._phase = {"name": name, "start": time.time(), "startMemory": tracemalloc.get_traced_memory()[0]}
+
+    def _close_phase(self):
+        if self._phase is None:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        phase = self._phase
+        self._phases.append({
+            "name": phase["name"],
+            "wall": round(time.time() - phase["start"], 3),
+            "startMemory": phase["startMemory"],
+            "endMemory": current,
+            "peakMemory": peak,
+        })
+        self._phase = None
+
+    @contextmanager
+    def stage(self, name: str, game_id: str = None):
+        """统计详情页处理的一个阶段"""
+        snapshot = None
+        if game_id is not None and self.snapshot_games:
+            with self._lock:
+                if game_id in self._snapshot_ids or len(self._snapshot_ids) < self.snapshot_games:
+                    self._snapshot_ids.add(game_id)
+                    snapshot = tracemalloc.take_snapshot()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            alloc = tracemalloc.get_traced_memory()[0] - memory_before
+            diffs = None
+            if snapshot is not None:
+                diffs = self._filter(tracemalloc.take_snapshot()).compare_to(self._filter(snapshot), "lineno")
+            with self._lock:
+                stats = self._stages.setdefault(name, {"count": 0, "wall": 0.0, "cpu": 0.0, "alloc": 0, "maxWall": 0.0})
+                stats["count"] += 1
+                stats["wall"] += wall
+                stats["cpu"] += cpu
+                stats["alloc"] += alloc
+                stats["maxWall"] = max(stats["maxWall"], wall)
+                if diffs:
+                    self._stage_allocations.setdefault(name, []).extend(diffs[:self.top])
+
+    @staticmethod
+    def _filter(snapshot):
+        """去掉tracemalloc自身和模块导入的分配"""
+        return snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ])
+
+    # ---- 报告 ----
+
+    def _merged_stats(self):
+        merged = None
+        for name, profile in sorted(self._profiles.items()):
+            try:
+                stats = pstats.Stats(profile)
+            except TypeError:
+                # 线程从未启用过cProfile
+                continue
+            stats.dump_stats(os.path.join(self.output_dir, f"thread-{name}.prof"))
+            if merged is None:
+                merged = stats
+            else:
+                merged.add(stats)
+        if merged is not None:
+            merged.dump_stats(os.path.join(self.output_dir, "merged.prof"))
+        return merged
+
+    def _top_functions(self, merged, sort_key: str) -> str:
+        buffer = io.StringIO()
+        merged.stream = buffer
+        merged.sort_stats(sort_key).print_stats(self.top)
+        lines = buffer.getvalue().splitlines()
+        # 去掉pstats输出开头的汇总信息，只保留表格
+        for i, line in enumerate(lines):
+            if line.strip().startswith("ncalls"):
+                return "\n".join(lines[i:])
+        return buffer.getvalue()
+
+    def _top_allocations(self, name: str):
+        totals = {}
+        for diff in self._stage_allocations.get(name, []):
+            frame = diff.traceback[0]
+            key = f"{frame.filename}:{frame.lineno}"
+            totals[key] = totals.get(key, 0) + diff.size_diff
+        return sorted(totals.items(), key=lambda item: -item[1])[:10]
+
+    def write_report(self) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        merged = self._merged_stats()
+        stages = {name: dict(stats, wall=round(stats["wall"], 4), cpu=round(stats["cpu"], 4),
+                             maxWall=round(stats["maxWall"], 4))
+                  for name, stats in self._stages.items()}
+        report = {
+            "elapsed": round(time.time() - (self._started or time.time()), 3),
+            "threads": sorted(self._profiles),
+            "phases": self._phases,
+            "stages": stages,
+            "allocations": {name: self._top_allocations(name) for name in self._stage_allocations},
+        }
+        with open(os.path.join(self.output_dir, "report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        lines = [f"=== 性能分析报告 (总耗时 {report['elapsed']:.1f}秒, {len(report['threads'])} 个线程) ===", ""]
+        if self._phases:
+            lines.append("--- 爬取阶段内存 ---")
+            lines.append(f"{'阶段':<10}{'耗时(秒)':>12}{'起始(MB)':>12}{'结束(MB)':>12}{'峰值(MB)':>12}")
+            for phase in self._phases:
+                lines.append(f"{phase['name']:<10}{phase['wall']:>12.2f}{phase['startMemory'] / 2**20:>12.1f}"
+                             f"{phase['endMemory'] / 2**20:>12.1f}{phase['peakMemory'] / 2**20:>12.1f}")
+            lines.append("")
+        if stages:
+            total_wall = sum(stats["wall"] for stats in stages.values()) or 1
+            lines.append("--- 详情页各阶段(按耗时排序) ---")
+            lines.append(f"{'阶段':<10}{'次数':>8}{'耗时(秒)':>12}{'占比':>8}{'平均(毫秒)':>12}{'最长(毫秒)':>12}"
+                         f"{'CPU(秒)':>10}{'内存增量(KB)':>14}")
+            for name, stats in sorted(stages.items(), key=lambda item: -item[1]["wall"]):
+                lines.append(f"{name:<10}{stats['count']:>8}{stats['wall']:>12.2f}{stats['wall'] / total_wall:>8.1%}"
+                             f"{stats['wall'] / stats['count'] * 1000:>12.1f}{stats['maxWall'] * 1000:>12.1f}"
+                             f"{stats['cpu']:>10.2f}{stats['alloc'] / 1024:>14.1f}")
+            lines.append("")
+        for name, allocations in report["allocations"].items():
+            if allocations:
+                lines.append(f"--- {name} 阶段分配最多的代码行(前{self.snapshot_games}个游戏) ---")
+                lines.extend(f"{size / 1024:>10.1f} KB  {where}" for where, size in allocations)
+                lines.append("")
+        if merged is not None:
+            lines.append("--- 函数自身耗时排名(tottime) ---")
+            lines.append(self._top_functions(merged, "tottime"))
+            lines.append("--- 函数累计耗时排名(cumulative) ---")
+            lines.append(self._top_functions(merged, "cumulative"))
+
+        report_file = os.path.join(self.output_dir, "report.txt")
+        with open(report_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        return report_file
+
+
+def profile_fixtures(paths, profiler: CrawlProfiler, repeat: int = 50, adapter=None) -> str:
+    """
+    用保存的离线页面分析爬虫，不启动浏览器、不访问网络
+
+    包含 Listed__Game 的页面作为列表页，解析后生成列表快照；其余页面作为详情页，
+    每个重复repeat次，按正常流程解析、写入元数据和索引(不下载资源)。
+    所有数据写入临时目录，不影响 games/ 下的真实数据。
+    :return: 报告文件路径
+    """
+    from src.core.crawler import GameCrawler
+    from src.sites import AddictingGamesAdapter
+
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    listings = [html for _, html in pages if "Listed__Game" in html]
+    details = [(name, html) for name, html in pages if "Listed__Game" not in html]
+
+    profiler.output_dir = os.path.abspath(profiler.output_dir)
+    cwd = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="crawler-profile-")
+    os.chdir(work_dir)
+    try:
+        crawler = GameCrawler(storage=create_store("json"), adapters=[adapter or AddictingGamesAdapter()])
+        adapter = crawler.adapters[0]
+        crawler.fetch_assets = False
+        crawler.extract_workers = 0  # 在当前线程中解析，cProfile才能统计到extract阶段
+        crawler.profiler = profiler
+        profiler.start()
+
+        profiler.enter_phase("listing")
+        for html in listings:
+            games = adapter.parse_listing(html)
+            crawler.diff_listing(adapter, games)
+            print(f"列表页: {len(games)} 个游戏")
+
+        profiler.enter_phase("detail")
+        batch = []
+        for i in range(repeat):
+            for name, html in details:
+                title = f"{name} {i}"
+                batch.append(crawler.save_game_detail(adapter, adapter.game_id(title), title, html))
+                if len(batch) >= 10:
+                    crawler.update_index(batch)
+                    batch = []
+        if batch:
+            crawler.update_index(batch)
+        print(f"详情页: {len(details)} 个页面 x {repeat} 次")
+    finally:
+        os.chdir(cwd)
+    return profiler.stop()
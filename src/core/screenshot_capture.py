@@ -0,0 +1,226 @@
+import io
+import os
+import sys
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.core.work_queue import BoundedWorkQueue
+from src.core.change_feed import ChangeFeed
+from src.core.embed_checker import BrowserPool, is_dead
+from src.core.page_generator import PageGenerator
+from src.storage import create_store
+
+ASSET_URL_PREFIX = "/games/assets/"
+FRAME_PREFIX = "frame-"
+
+
+def encode_webp(png_bytes: bytes, save_path: str, max_width: int = None, quality: int = 80) -> str:
+    """
+    把浏览器截图(PNG)缩放并编码为WebP，在进程池中执行
+    :return: 保存的文件路径
+    """
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(png_bytes))
+    if max_width and img.width > max_width:
+        img = img.resize((max_width, int(img.height * max_width / img.width)), Image.LANCZOS)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    # 先写临时文件再替换，中断时不会留下半个文件
+    tmp_path = save_path + ".tmp"
+    img.save(tmp_path, 'WEBP', quality=quality)
+    os.replace(tmp_path, save_path)
+    return save_path
+
+
+class ScreenshotCapture:
+    """
+    游戏截图采集
+
+    独立于元数据爬取运行：用无头浏览器池加载各游戏的gameUrl，在页面加载后的指定时间点截图，
+    截图交给进程池编码为WebP，浏览器线程不等待编码就继续加载下一个游戏。
+    结果保存在 games/assets/<游戏ID>/screenshots/frame-<序号>.webp，并写入info.json的screenshots字段。
+    已有完整截图的游戏默认跳过，嵌入检查判定失效的游戏不截图。
+    """
+
+    def __init__(self, metadata_dir="games/metadata", assets_dir="games/assets", storage=None, workers=2,
+                 offsets=(3, 8, 15), page_budget=30, viewport=(1280, 720), max_width=960, quality=80,
+                 encode_workers=None, force=False, change_feed=None):
+        """
+        :param metadata_dir: 元数据目录
+        :param assets_dir: 资源目录
+        :param storage: 元数据存储(CatalogStore)，默认为metadata_dir下的JSON目录
+        :param workers: 浏览器池大小，即同时加载的游戏数
+        :param offsets: 截图时间点(页面开始加载后的秒数)，截图数量等于时间点个数
+        :param page_budget: 单个游戏的时间预算(秒)，包括页面加载，超出预算的时间点不再截图
+        :param viewport: 浏览器窗口大小
+        :param max_width: 截图的最大宽度，超过时按比例缩小
+        :param quality: WebP质量
+        :param encode_workers: 编码进程数，默认为CPU核数
+        :param force: 为True时重新截取已有截图的游戏
+        :param change_feed: 变更事件流，默认使用 games/cache/feed
+        """
+        self.metadata_dir = metadata_dir
+        self.assets_dir = assets_dir
+        self.storage = storage or create_store("json", metadata_dir=metadata_dir)
+        self.workers = max(1, workers)
+        self.offsets = sorted(offset for offset in offsets if 0 <= offset <= page_budget)
+        self.page_budget = page_budget
+        self.viewport = viewport
+        self.max_width = max_width
+        self.quality = quality
+        self.encode_workers = encode_workers
+        self.force = force
+        self.change_feed = change_feed or ChangeFeed()
+        self.page_generator = PageGenerator(metadata_dir=metadata_dir, storage=self.storage)
+        self.logger = logging.getLogger(__name__)
+
+        self.counters = {"captured": 0, "skipped": 0, "failed": 0, "frames": 0}
+        self.counter_lock = threading.Lock()
+
+    def frame_path(self, game_id: str, number: int) -> str:
+        return os.path.join(self.assets_dir, game_id, "screenshots", f"{FRAME_PREFIX}{number:02d}.webp")
+
+    def has_screenshots(self, game_id: str, info: dict) -> bool:
+        """info中的截图数量符合配置且文件都存在"""
+        shots = info.get("screenshots") or []
+        if len(shots) < len(self.offsets):
+            return False
+        return all(shot.startswith(ASSET_URL_PREFIX) and
+                   os.path.isfile(os.path.join(self.assets_dir, shot[len(ASSET_URL_PREFIX):]))
+                   for shot in shots)
+
+    def load_targets(self):
+        """[(游戏ID, info)]，跳过没有嵌入地址、嵌入失效和已有截图的游戏"""
+        targets = []
+        for game_id, info in self.storage.scan("info"):
+            if not info.get("gameUrl") or is_dead(info.get("health")):
+                continue
+            if not self.force and self.has_screenshots(game_id, info):
+                self.counters["skipped"] += 1
+                continue
+            targets.append((game_id, info))
+        return targets
+
+    def capture_game(self, pool: BrowserPool, encoder: ProcessPoolExecutor, game_id: str, info: dict):
+        """
+        在浏览器中加载游戏并按时间点截图，截图提交到编码进程池
+        :return: [(序号, 编码任务的Future)]
+        """
+        os.makedirs(os.path.dirname(self.frame_path(game_id, 1)), exist_ok=True)
+        futures = []
+        with pool.driver() as driver:
+            driver.set_window_size(*self.viewport)
+            start = time.monotonic()
+            try:
+                driver.get(info["gameUrl"])
+            except Exception as e:
+                # 页面加载超时时游戏可能已经开始渲染，继续按时间点截图
+                self.logger.debug(f"加载游戏页面未完成: {game_id} - {str(e).splitlines()[0][:200]}")
+            try:
+                for number, offset in enumerate(self.offsets, 1):
+                    delay = offset - (time.monotonic() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                    if time.monotonic() - start > self.page_budget:
+                        self.logger.debug(f"超出单个游戏的时间预算，停止截图: {game_id}")
+                        break
+                    png = driver.get_screenshot_as_png()
+                    futures.append((number, encoder.submit(encode_webp, png, self.frame_path(game_id, number),
+                                                           self.max_width, self.quality)))
+            finally:
+                # 离开游戏页面，停止游戏的声音和CPU占用后再归还浏览器
+                driver.get("about:blank")
+        return futures
+
+    def capture(self):
+        """截取所有需要截图的游戏，返回截图更新的游戏ID"""
+        start_time = time.time()
+        targets = self.load_targets()
+        print(f"\n=== 游戏截图: 需要截图 {len(targets)} 个游戏, 每个 {len(self.offsets)} 张, "
+              f"跳过 {self.counters['skipped']} 个 ===")
+        if not targets or not self.offsets:
+            return []
+
+        pending = {}
+
+        def handle(target, futures, error):
+            game_id = target[0]
+            if error is not None:
+                self.logger.warning(f"截图失败: {game_id} - {str(error).splitlines()[0][:200]}")
+                with self.counter_lock:
+                    self.counters["failed"] += 1
+                return
+            with self.counter_lock:
+                pending[game_id] = (target[1], futures)
+
+        pool = BrowserPool(self.workers, page_load_timeout=self.page_budget)
+        # 浏览器线程运行时才会按需创建编码进程，用spawn避免在多线程进程中fork
+        encoder = ProcessPoolExecutor(max_workers=self.encode_workers, mp_context=multiprocessing.get_context("spawn"))
+        work_queue = BoundedWorkQueue(handler=lambda target: self.capture_game(pool, encoder, *target),
+                                      workers=self.workers, on_result=handle, name="screenshot-browser")
+        try:
+            for target in targets:
+                work_queue.put(target)
+            work_queue.join()
+        finally:
+            work_queue.close(wait=True)
+            pool.close()
+            # 等待剩余的编码任务完成
+            encoder.shutdown(wait=True)
+
+        updated = self.apply_screenshots(pending)
+        elapsed = time.time() - start_time
+        print(" | ".join(f"{key}: {value}" for key, value in self.counters.items()) + f" | 耗时: {elapsed:.1f}秒")
+        return updated
+
+    def apply_screenshots(self, pending) -> list:
+        """把编码成功的截图写入info.json，删除旧的多余截图，并更新静态页面"""
+        documents = []
+        updated = []
+        for game_id, (info, futures) in pending.items():
+            shots = []
+            for number, future in futures:
+                try:
+                    path = future.result()
+                except Exception as e:
+                    self.logger.warning(f"截图编码失败: {game_id} #{number} - {str(e)}")
+                    continue
+                shots.append(ASSET_URL_PREFIX + os.path.relpath(path, self.assets_dir).replace(os.sep, "/"))
+            self.counters["frames"] += len(shots)
+            if not shots:
+                self.counters["failed"] += 1
+                continue
+            self.counters["captured"] += 1
+            self._remove_stale_frames(game_id, shots)
+            if info.get("screenshots") != shots:
+                info["screenshots"] = shots
+                documents.append((game_id, "info", info))
+                # game.json是info.json的缓存副本，保持一致
+                if self.storage.exists(game_id, "game"):
+                    documents.append((game_id, "game", info))
+            self.change_feed.emit("assets_updated", game_id, assets=shots)
+            updated.append(game_id)
+
+        if documents:
+            self.storage.put_many(documents)
+            try:
+                self.page_generator.build(touched_ids=updated)
+            except Exception as e:
+                self.logger.error(f"生成静态页面失败: {str(e)}")
+        return updated
+
+    def _remove_stale_frames(self, game_id: str, shots):
+        """删除截图数量减少后留下的旧截图"""
+        shots_dir = os.path.dirname(self.frame_path(game_id, 1))
+        keep = {os.path.basename(shot) for shot in shots}
+        for name in os.listdir(shots_dir):
+            if name.startswith(FRAME_PREFIX) and name not in keep:
+                try:
+                    os.remove(os.path.join(shots_dir, name))
+                except OSError as e:
+                    self.logger.debug(f"删除旧截图失败: {name} - {str(e)}")
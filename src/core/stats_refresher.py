@@ -0,0 +1,262 @@
+import json
+import os
+import sys
+import time
+import logging
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.core.work_queue import BoundedWorkQueue
+from src.core.change_feed import ChangeFeed
+from src.core.index_builder import IndexBuilder
+from src.core.page_generator import PageGenerator
+from src.sites import SITE_ADAPTERS, create_adapter
+from src.storage import create_store
+from src.utils.http import create_session
+from src.utils.parser import extract_next_data, stats_from_page_props
+
+
+class StatsRefresher:
+    """
+    轻量统计数据刷新
+
+    不启动浏览器、不下载资源，只通过连接池HTTP请求获取详情页的
+    __NEXT_DATA__(优先使用Next.js的 /_next/data 接口)，
+    增量更新 stats.json 和 index.json 中的 rating/plays 字段。
+    请求地址和访问频率按游戏所属站点(info.json的site字段)的适配器确定。
+    """
+
+    STATS_FIELDS = ("rating", "ratingCount", "plays")
+
+    def __init__(self, progress_file="crawl_progress.json", metadata_dir="games/metadata",
+                 adapters=None, workers=32, max_age=3600,
+                 index_batch_size=200, change_feed=None, storage=None):
+        """
+        :param progress_file: 爬取进度文件，用于获取详情页URL
+        :param metadata_dir: 元数据目录
+        :param adapters: 站点适配器列表(可覆盖站点地址和频率限制)，其余站点按名称创建默认适配器
+        :param workers: 并发请求数
+        :param max_age: 统计数据在多少秒内检查过则跳过
+        :param index_batch_size: 每累计多少个变化写一次索引
+        :param change_feed: 变更事件流，默认使用 games/cache/feed
+        :param storage: 元数据存储(CatalogStore)，默认为metadata_dir下的JSON目录
+        """
+        self.progress_file = progress_file
+        self.metadata_dir = metadata_dir
+        self.index_file = os.path.join(metadata_dir, "index.json")
+        adapters = adapters or [create_adapter(name) for name in SITE_ADAPTERS]
+        self.adapters = {adapter.name: adapter for adapter in adapters}
+        self.adapter_lock = threading.Lock()
+        self.workers = workers
+        self.max_age = max_age
+        self.index_batch_size = index_batch_size
+        self.change_feed = change_feed or ChangeFeed()
+        self.storage = storage or create_store("json", metadata_dir=metadata_dir)
+        self.index_builder = IndexBuilder()
+        self.page_generator = PageGenerator(metadata_dir=metadata_dir, storage=self.storage)
+        self.logger = logging.getLogger(__name__)
+
+        self.session = create_session(pool_size=workers)
+        self.build_ids = {}  # 站点名 -> Next.js的buildId
+        self.build_id_lock = threading.Lock()
+        self.index_lock = threading.Lock()
+        self.pending_index = {}  # 游戏ID -> 待写入索引的统计数据
+        self.counters = {"checked": 0, "changed": 0, "skipped": 0, "failed": 0}
+        self.counter_lock = threading.Lock()
+
+    def load_targets(self):
+        """从进度文件中收集(详情页URL, 游戏ID)列表，ID未知时为None"""
+        if not os.path.exists(self.progress_file):
+            return []
+        try:
+            with open(self.progress_file, 'r', encoding='utf-8') as f:
+                progress = json.load(f)
+        except Exception as e:
+            self.logger.error(f"加载进度文件失败: {str(e)}")
+            return []
+
+        targets = {}
+        for url, record in progress.get("crawl_history", {}).items():
+            targets[url] = record.get("id")
+        for url in progress.get("processed_games", []):
+            targets.setdefault(url, None)
+        return list(targets.items())
+
+    def refresh(self):
+        """刷新全部游戏的统计数据，返回计数结果"""
+        targets = self.load_targets()
+        print(f"\n=== 统计数据刷新: {len(targets)} 个游戏 ===")
+        start_time = time.time()
+
+        work_queue = BoundedWorkQueue(
+            handler=self.refresh_game,
+            workers=self.workers,
+            on_result=self._handle_result,
+            name="stats-worker"
+        )
+        try:
+            for target in targets:
+                work_queue.put(target)
+            work_queue.join()
+        finally:
+            work_queue.close(wait=True)
+            self.flush_index()
+            self.session.close()
+
+        if self.counters["changed"]:
+            # 统计数据只影响排序和卡片，不需要重新读取任何info.json
+            try:
+                self.page_generator.build(touched_ids=())
+            except Exception as e:
+                self.logger.error(f"生成静态页面失败: {str(e)}")
+
+        elapsed = time.time() - start_time
+        print(f"检查: {self.counters['checked']} | 变化: {self.counters['changed']} | "
+              f"跳过: {self.counters['skipped']} | 失败: {self.counters['failed']} | 耗时: {elapsed:.1f}秒")
+        return self.counters
+
+    def refresh_game(self, target):
+        """刷新单个游戏的统计数据，数据有变化时返回(游戏ID, 统计数据)"""
+        url, game_id = target
+        if game_id and self._is_fresh(self._read_stats(game_id)):
+            self._count("skipped")
+            return None
+
+        info = self.storage.get(game_id, "info") if game_id else None
+        adapter = self.adapter_for(url, info)
+        page_props = self.fetch_page_props(url, adapter)
+        game = page_props.get("game") or {}
+        if not game_id and game.get("title"):
+            game_id = adapter.game_id(game["title"])
+        if not game_id or not self.storage.exists(game_id, "info"):
+            self._count("skipped")
+            return None
+
+        old_stats = self._read_stats(game_id) or {"id": game_id}
+        if self._is_fresh(old_stats):
+            self._count("skipped")
+            return None
+
+        new_values = stats_from_page_props(page_props)
+        stats = dict(old_stats)
+        stats.update(new_values)
+        stats["lastChecked"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        changes = {field: [old_stats.get(field), new_values[field]] for field in self.STATS_FIELDS
+                   if old_stats.get(field) != new_values[field]}
+        changed = bool(changes)
+        if changed:
+            stats["lastUpdated"] = time.strftime("%Y-%m-%d")
+
+        self.storage.put(game_id, "stats", stats)
+
+        self._count("checked")
+        if changed:
+            self._count("changed")
+            self.change_feed.emit("stats_changed", game_id, changes=changes)
+            return game_id, stats
+        return None
+
+    def adapter_for(self, url: str, info=None):
+        """按info.json的site字段找到游戏所属站点的适配器，没有site字段时按URL查找"""
+        site = (info or {}).get("site")
+        if site:
+            with self.adapter_lock:
+                if site not in self.adapters:
+                    self.adapters[site] = create_adapter(site)
+                return self.adapters[site]
+        for adapter in self.adapters.values():
+            if adapter.owns(url):
+                return adapter
+        return next(iter(self.adapters.values()))
+
+    def fetch_page_props(self, url: str, adapter) -> dict:
+        """获取详情页pageProps，优先请求 /_next/data 接口，失败时回退到完整HTML，请求按站点的频率限制发送"""
+        with self.build_id_lock:
+            build_id = self.build_ids.get(adapter.name)
+
+        if build_id:
+            path = urlparse(url).path.rstrip('/')
+            data_url = f"{adapter.base_url}/_next/data/{build_id}{path}.json"
+            with adapter.limiter.slot():
+                response = self.session.get(data_url, timeout=15)
+            if response.status_code == 200:
+                return response.json().get("pageProps", {})
+            # 站点重新部署后buildId会失效，清除后回退到HTML
+            self.logger.debug(f"数据接口不可用({response.status_code})，回退到HTML: {url}")
+            with self.build_id_lock:
+                if self.build_ids.get(adapter.name) == build_id:
+                    self.build_ids.pop(adapter.name, None)
+
+        with adapter.limiter.slot():
+            response = self.session.get(url, timeout=15)
+        response.raise_for_status()
+        data = extract_next_data(response.text)
+        if not data:
+            raise ValueError(f"页面中未找到__NEXT_DATA__: {url}")
+        with self.build_id_lock:
+            if data.get("buildId"):
+                self.build_ids.setdefault(adapter.name, data["buildId"])
+        return data.get("props", {}).get("pageProps", {})
+
+    def flush_index(self):
+        """把累计的统计变化写入index.json"""
+        with self.index_lock:
+            if not self.pending_index or not os.path.exists(self.index_file):
+                self.pending_index = {}
+                return
+            pending, self.pending_index = self.pending_index, {}
+            try:
+                with open(self.index_file, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+                updated = 0
+                for entry in index.get("games", []):
+                    stats = pending.get(entry.get("id"))
+                    if stats:
+                        entry["rating"] = stats["rating"]
+                        entry["plays"] = stats["plays"]
+                        updated += 1
+                index["lastUpdated"] = time.strftime("%Y-%m-%d")
+                with open(self.index_file, "w", encoding="utf-8") as f:
+                    json.dump(index, f, ensure_ascii=False, indent=2)
+                self.index_builder.build(index, pending.keys())
+                self.logger.info(f"索引统计数据已更新: {updated} 个游戏")
+            except Exception as e:
+                self.logger.error(f"更新索引统计数据失败: {str(e)}")
+
+    def _handle_result(self, target, result, error):
+        """工作线程结果回调"""
+        if error is not None:
+            self._count("failed")
+            self.logger.warning(f"刷新统计数据失败: {target[0]} - {str(error)}")
+            return
+        if not result:
+            return
+        game_id, stats = result
+        with self.index_lock:
+            self.pending_index[game_id] = stats
+            should_flush = len(self.pending_index) >= self.index_batch_size
+        if should_flush:
+            self.flush_index()
+
+    def _read_stats(self, game_id: str):
+        """读取统计数据，不存在或读取失败时返回None"""
+        try:
+            return self.storage.get(game_id, "stats")
+        except Exception:
+            return None
+
+    def _is_fresh(self, stats) -> bool:
+        """统计数据是否在max_age内检查过"""
+        if not stats or not self.max_age or not stats.get("lastChecked"):
+            return False
+        try:
+            checked = datetime.strptime(stats["lastChecked"], "%Y-%m-%d %H:%M:%S").timestamp()
+        except ValueError:
+            return False
+        return time.time() - checked < self.max_age
+
+    def _count(self, key: str):
+        with self.counter_lock:
+            self.counters[key] += 1
@@ -0,0 +1,144 @@
+import queue
+import threading
+import logging
+
+
+class BoundedWorkQueue:
+    """
+    有界生产者/消费者工作队列
+
+    - put() 在待处理窗口已满时阻塞，对生产者(游戏发现)形成背压
+    - 工作线程数可在运行时通过 resize() 调整
+    - 任务结果通过 on_result 回调逐个交付，不保留 Future 或结果集合
+    """
+
+    def __init__(self, handler, workers=5, max_pending=None, on_result=None,
+                 on_worker_exit=None, name="crawl-worker", poll_interval=0.5):
+        """
+        :param handler: 任务处理函数，签名为 handler(item) -> result
+        :param workers: 初始工作线程数
+        :param max_pending: 等待队列的最大长度，默认为工作线程数的2倍
+        :param on_result: 结果回调，签名为 on_result(item, result, error)，在工作线程中调用
+        :param on_worker_exit: 工作线程退出前在该线程内调用，用于释放线程本地资源
+        :param name: 工作线程名前缀
+        :param poll_interval: 工作线程空闲时检查关闭/缩容的间隔(秒)
+        """
+        self.handler = handler
+        self.on_result = on_result
+        self.on_worker_exit = on_worker_exit
+        self.name = name
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending or max(1, workers * 2)
+        self.logger = logging.getLogger(__name__)
+
+        self._queue = queue.Queue(maxsize=self.max_pending)
+        self._lock = threading.Lock()
+        self._workers = {}  # 线程ID -> Thread
+        self._target_workers = 0
+        self._worker_seq = 0
+        self._closed = False
+        self._active = 0  # 正在执行的任务数
+
+        self.resize(workers)
+
+    @property
+    def worker_count(self):
+        """当前存活的工作线程数"""
+        with self._lock:
+            return len(self._workers)
+
+    @property
+    def in_flight(self):
+        """等待中和执行中的任务总数"""
+        with self._lock:
+            return self._queue.qsize() + self._active
+
+    def put(self, item, timeout=None):
+        """提交任务，窗口已满时阻塞直到有空位"""
+        if self._closed:
+            raise RuntimeError("工作队列已关闭")
+        self._queue.put(item, timeout=timeout)
+
+    def resize(self, workers):
+        """调整工作线程数，缩容时空闲线程在取下一个任务前退出"""
+        workers = max(1, int(workers))
+        with self._lock:
+            self._target_workers = workers
+            missing = workers - len(self._workers)
+            for _ in range(max(0, missing)):
+                self._worker_seq += 1
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"{self.name}-{self._worker_seq}",
+                    daemon=True
+                )
+                thread.start()
+                self._workers[thread.ident] = thread
+        self.logger.info(f"工作线程数调整为: {workers}")
+
+    def join(self):
+        """等待所有已提交任务处理完成"""
+        self._queue.join()
+
+    def close(self, wait=True):
+        """停止接收任务并让工作线程在队列清空后退出"""
+        self._closed = True
+        if wait:
+            self._queue.join()
+            with self._lock:
+                threads = list(self._workers.values())
+            for thread in threads:
+                thread.join()
+
+    def _should_retire(self):
+        """检查当前线程是否应因缩容而退出，需在持有锁时调用"""
+        if len(self._workers) > self._target_workers:
+            self._workers.pop(threading.get_ident(), None)
+            return True
+        return False
+
+    def _worker_loop(self):
+        """工作线程主循环"""
+        retired = False
+        try:
+            while True:
+                with self._lock:
+                    if self._should_retire():
+                        retired = True
+                        break
+
+                try:
+                    item = self._queue.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    if self._closed:
+                        break
+                    continue
+
+                with self._lock:
+                    self._active += 1
+                result, error = None, None
+                try:
+                    result = self.handler(item)
+                except Exception as e:
+                    error = e
+                    self.logger.error(f"任务处理异常: {str(e)}")
+                finally:
+                    with self._lock:
+                        self._active -= 1
+
+                try:
+                    if self.on_result:
+                        self.on_result(item, result, error)
+                except Exception as e:
+                    self.logger.error(f"处理任务结果出错: {str(e)}")
+                finally:
+                    self._queue.task_done()
+        finally:
+            if not retired:
+                with self._lock:
+                    self._workers.pop(threading.get_ident(), None)
+            if self.on_worker_exit:
+                try:
+                    self.on_worker_exit()
+                except Exception as e:
+                    self.logger.error(f"工作线程退出清理出错: {str(e)}")
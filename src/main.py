@@ -1,21 +1,364 @@
 import os
 import sys
+import argparse
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from src.core.crawler import GameCrawler
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="游戏爬虫")
+    parser.add_argument("mode", nargs="?", default="crawl",
+                        choices=["crawl", "daemon", "refresh-stats", "check-embeds", "capture-screenshots", "feed", "build-index", "build-site", "verify", "repair", "serve-api",
+                                 "serve-static", "simulate-site", "faststart-videos", "find-duplicates", "convert-storage", "pack-assets", "unpack-assets", "compact-assets"],
+                        help="crawl: 完整爬取(默认); daemon: 按间隔重复爬取并提供本地控制接口; refresh-stats: 只刷新评分和游玩次数; "
+                             "check-embeds: 检查游戏嵌入地址是否可用; "
+                             "capture-screenshots: 在无头浏览器中截取游戏画面; "
+                             "feed: 输出变更事件; build-index: 全量重建分页索引; "
+                             "build-site: 生成静态页面(增量，--full全量); "
+                             "verify/repair: 检查目录完整性/修复并重建索引和进度; serve-api: 启动目录查询服务; "
+                             "serve-static: 启动静态文件服务; simulate-site: 启动本地模拟站点(用于规模测试); "
+                             "faststart-videos: 把已下载预览视频的moov移到文件开头; "
+                             "find-duplicates: 按缩略图感知哈希查找重复游戏; "
+                             "convert-storage: 在JSON目录和SQLite之间导入导出元数据; "
+                             "pack-assets/unpack-assets/compact-assets: 资源打包、还原为零散文件、清理无用数据")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="单次运行的时间预算(秒)，超出后不再提交新任务")
+    parser.add_argument("--recrawl-after", default=None,
+                        help="重新爬取超过此间隔未更新的已知游戏，如 7d、12h，默认只爬取新游戏")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="并发数，refresh-stats默认32")
+    parser.add_argument("--max-age", type=int, default=None,
+                        help="跳过在此秒数内已检查过的游戏，refresh-stats默认3600，check-embeds默认86400")
+    parser.add_argument("--browser", action="store_true",
+                        help="check-embeds同时在无头浏览器中加载并记录加载耗时")
+    parser.add_argument("--site-origin", default=None,
+                        help="check-embeds中嵌入游戏的站点地址，如https://games.example.com")
+    parser.add_argument("--shot-offsets", default="3,8,15",
+                        help="capture-screenshots的截图时间点(页面开始加载后的秒数)，逗号分隔，默认3,8,15")
+    parser.add_argument("--page-budget", type=float, default=30,
+                        help="capture-screenshots单个游戏的时间预算(秒)，默认30")
+    parser.add_argument("--force", action="store_true",
+                        help="capture-screenshots重新截取已有截图的游戏")
+    parser.add_argument("--offset", type=int, default=0,
+                        help="feed从该偏移量开始读取")
+    parser.add_argument("--follow", action="store_true",
+                        help="feed读完后继续等待新事件")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="服务监听地址")
+    parser.add_argument("--port", type=int, default=None,
+                        help="服务监听端口，serve-api默认8001，serve-static默认8000，simulate-site默认8002，daemon控制接口默认8003")
+    parser.add_argument("--dev", action="store_true",
+                        help="serve-static使用开发模式，所有响应都要求重新验证")
+    parser.add_argument("--full", action="store_true",
+                        help="build-site忽略上次的生成状态，重新渲染全部页面")
+    parser.add_argument("--storage", default="json", choices=["json", "sqlite"],
+                        help="元数据存储方式，默认json(games/metadata目录)，sqlite为games/catalog.db")
+    parser.add_argument("--to", default=None, choices=["json", "sqlite"],
+                        help="convert-storage的目标存储")
+    parser.add_argument("--profile", action="store_true",
+                        help="crawl时进行性能分析(各线程cProfile、各阶段耗时和tracemalloc内存)，报告保存在profile/<时间>/")
+    parser.add_argument("--fixture", default=None,
+                        help="与--profile同时使用，用逗号分隔的离线页面代替浏览器，如game_detail.html")
+    parser.add_argument("--repeat", type=int, default=50,
+                        help="--fixture时每个详情页重复处理的次数，默认50")
+    parser.add_argument("--sites", default="addictinggames",
+                        help="要爬取的站点，多个站点用逗号分隔，各站点并发加载列表、共用浏览器池和存储")
+    parser.add_argument("--base-url", default=None,
+                        help="覆盖站点地址，如指向simulate-site启动的模拟站点 http://127.0.0.1:8002")
+    parser.add_argument("--rps", type=float, default=None,
+                        help="覆盖站点的每秒请求数限制，对模拟站点测试时可以调高")
+    parser.add_argument("--sim-games", type=int, default=10000,
+                        help="simulate-site第0代的游戏数，默认10000")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="simulate-site的随机种子，相同种子生成相同的目录")
+    parser.add_argument("--generation", type=int, default=0,
+                        help="simulate-site启动时的目录代数，每一代按--churn比例上下架和改名")
+    parser.add_argument("--churn", type=float, default=0.02,
+                        help="simulate-site每一代上下架的游戏比例，默认0.02")
+    parser.add_argument("--latency", default="50,200",
+                        help="simulate-site响应延迟的中位数和P95(毫秒)，逗号分隔，默认50,200")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="simulate-site详情页和资源返回500的比例")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="simulate-site详情页和资源返回429的比例")
+    parser.add_argument("--threshold", type=int, default=6,
+                        help="find-duplicates判定为重复的最大汉明距离(0-64)，默认6")
+    parser.add_argument("--bands", type=int, default=None,
+                        help="find-duplicates分段索引的段数，0为整体比较，默认按目录大小自动选择")
+    parser.add_argument("--interval", default=None,
+                        help="daemon两轮爬取的间隔，如 30m、6h、1d，默认读取config/crawler_config.py中的interval")
+    return parser.parse_args()
+
+def refresh_stats(args):
+    from src.core.stats_refresher import StatsRefresher
+    from src.storage import create_store
+    refresher = StatsRefresher(adapters=create_adapters(args), workers=args.workers or 32,
+                               max_age=args.max_age if args.max_age is not None else 3600,
+                               storage=create_store(args.storage))
+    refresher.refresh()
+
+def check_embeds(args):
+    from src.core.embed_checker import EmbedChecker
+    from src.storage import create_store
+    checker = EmbedChecker(storage=create_store(args.storage), workers=args.workers or 32,
+                           ttl=args.max_age if args.max_age is not None else 24 * 3600,
+                           browser=args.browser, site_origin=args.site_origin)
+    checker.check()
+
+def capture_screenshots(args):
+    from src.core.screenshot_capture import ScreenshotCapture
+    from src.storage import create_store
+    offsets = [float(offset) for offset in args.shot_offsets.split(",") if offset.strip()]
+    capture = ScreenshotCapture(storage=create_store(args.storage), workers=args.workers or 2, offsets=offsets,
+                                page_budget=args.page_budget, force=args.force)
+    capture.capture()
+
+def print_feed(args):
+    import json
+    from src.core.change_feed import ChangeFeed
+    feed = ChangeFeed()
+    if args.follow:
+        for event, next_offset in feed.tail(args.offset):
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+    else:
+        events, next_offset = feed.read(args.offset, limit=sys.maxsize)
+        for event in events:
+            print(json.dumps(event, ensure_ascii=False))
+        print(f"next_offset={next_offset}", file=sys.stderr)
+
+def build_index():
+    import json
+    from src.core.index_builder import IndexBuilder
+    with open("games/metadata/index.json", "r", encoding="utf-8") as f:
+        index = json.load(f)
+    written = IndexBuilder().build(index)
+    print(f"分页索引已重建，写入 {written} 个分页")
+
+def convert_storage(args):
+    from src.storage import create_store, copy_store
+    target_backend = args.to or ("sqlite" if args.storage == "json" else "json")
+    if target_backend == args.storage:
+        print("源存储和目标存储相同，无需转换")
+        return
+    source, target = create_store(args.storage), create_store(target_backend)
+    try:
+        copied = copy_store(source, target)
+    finally:
+        source.close()
+        target.close()
+    print(f"已从 {args.storage} 复制 {copied} 个文档到 {target_backend}")
+
+def pack_assets(mode):
+    from src.storage import AssetPack
+    pack = AssetPack()
+    try:
+        if mode == "pack-assets":
+            counters = pack.pack_directory("games/assets")
+            print(f"资源已打包: 新增 {counters['added']} | 更新 {counters['updated']} | "
+                  f"未变 {counters['unchanged']} | 删除 {counters['removed']}")
+        elif mode == "unpack-assets":
+            print(f"已还原 {pack.export('games/assets')} 个资源文件")
+        else:
+            result = pack.compact()
+            print(f"资源包已压缩: {result['before']} -> {result['after']} 字节")
+    finally:
+        pack.close()
+
+def build_site(args):
+    from src.core.page_generator import PageGenerator
+    from src.storage import create_store
+    rendered = PageGenerator(storage=create_store(args.storage), workers=args.workers).build(full=args.full)
+    print(f"静态页面已生成，渲染 {rendered} 个页面")
+
+def verify_catalog(args):
+    from src.core.catalog_verifier import CatalogVerifier
+    from src.storage import create_store
+    verifier = CatalogVerifier(storage=create_store(args.storage), workers=args.workers or 16)
+    report = verifier.repair() if args.mode == "repair" else verifier.verify()
+    print(f"\n=== 目录检查: {report['games']} 个游戏 (扫描 {report['scanned']}, 未变化 {report['cached']}) ===")
+    for kind in ("orphaned", "missing", "truncated", "inconsistent"):
+        print(f"{kind}: {report['summary'].get(kind, 0)}")
+    for issue in report["issues"][:20]:
+        print(f"  [{issue['kind']}] {issue['gameId'] or '-'} {issue['target']}: {issue['detail']}")
+    if len(report["issues"]) > 20:
+        print(f"  ... 完整报告见 {verifier.report_file}")
+    if args.mode == "repair":
+        print(f"已重建索引和进度文件，{len(report['recrawl'])} 个游戏将在下次爬取时重新抓取")
+    return report
+
+def simulate_site(args):
+    from src.server.site_simulator import serve
+    median, p95 = (float(value) / 1000 for value in args.latency.split(","))
+    serve(host=args.host, port=args.port or 8002, games=args.sim_games, seed=args.seed,
+          generation=args.generation, churn=args.churn, latency=(median, p95),
+          error_rate=args.error_rate, throttle_rate=args.throttle_rate)
+
+def faststart_videos(args):
+    import glob
+    from src.utils.mp4 import faststart_files, VIDEO_SUFFIXES
+    paths = [path for path in glob.glob(os.path.join("games/assets", "*", "preview.*"))
+             if os.path.splitext(path)[1].lower() in VIDEO_SUFFIXES]
+    counters = faststart_files(paths, workers=args.workers or 4)
+    print(f"预览视频faststart: 改写 {counters['rewritten']} | 无需处理 {counters['unchanged']} | "
+          f"失败 {counters['failed']}")
+
+def find_duplicates(args):
+    from src.core.duplicate_finder import DuplicateFinder
+    from src.storage import create_store
+    finder = DuplicateFinder(storage=create_store(args.storage), threshold=args.threshold, bands=args.bands,
+                             workers=args.workers)
+    report = finder.find()
+    print(f"\n=== 重复游戏: {report['games']} 个游戏, {len(report['clusters'])} 组重复 "
+          f"({report['method']}, 查找耗时 {report['searchSeconds']}秒) ===")
+    for cluster in report["clusters"][:20]:
+        print(f"  [距离<={cluster['maxDistance']}] {', '.join(cluster['ids'])}")
+    if len(report["clusters"]) > 20:
+        print(f"  ... 完整报告见 {finder.report_file}")
+
+def create_adapters(args):
+    from dataclasses import replace
+    from src.sites import SITE_ADAPTERS, create_adapter
+    adapters = []
+    for name in (name.strip() for name in args.sites.split(",")):
+        if not name:
+            continue
+        options = {"base_url": args.base_url}
+        if args.rps and name in SITE_ADAPTERS:
+            options["rate_limit"] = replace(SITE_ADAPTERS[name].rate_limit, requests_per_second=args.rps,
+                                            burst=max(1, int(args.rps)))
+        adapters.append(create_adapter(name, **options))
+    if args.base_url and len(adapters) > 1:
+        raise ValueError("--base-url只能用于单个站点")
+    return adapters
+
+def run_daemon(args):
+    from config.crawler_config import CRAWLER_CONFIG
+    from src.core.crawler import GameCrawler
+    from src.core.daemon import parse_interval, serve
+    from src.storage import create_store
+    interval = parse_interval(args.interval or CRAWLER_CONFIG["interval"])
+    crawler = GameCrawler(storage=create_store(args.storage), adapters=create_adapters(args))
+    crawler.time_budget = args.time_budget
+    if args.recrawl_after:
+        crawler.recrawl_after = parse_interval(args.recrawl_after)
+    if args.workers:
+        crawler.set_concurrency(args.workers)
+    serve(crawler, interval, host=args.host, port=args.port or 8003)
+
+def profile_fixtures(args):
+    from src.core.profiler import CrawlProfiler, profile_fixtures as run
+    paths = [path.strip() for path in args.fixture.split(",") if path.strip()]
+    report_file = run(paths, CrawlProfiler(), repeat=args.repeat)
+    with open(report_file, "r", encoding="utf-8") as f:
+        print(f.read())
+    print(f"\n性能分析报告: {report_file}")
 
 def main():
+    args = parse_args()
+    from src.utils.log import setup_logging
+    setup_logging()
+    if args.mode == "build-index":
+        build_index()
+        sys.exit(0)
+    if args.mode in ("verify", "repair"):
+        report = verify_catalog(args)
+        sys.exit(1 if args.mode == "verify" and report["issues"] else 0)
+    if args.mode == "build-site":
+        build_site(args)
+        sys.exit(0)
+    if args.mode in ("pack-assets", "unpack-assets", "compact-assets"):
+        pack_assets(args.mode)
+        sys.exit(0)
+    if args.mode == "convert-storage":
+        convert_storage(args)
+        sys.exit(0)
+    if args.mode == "serve-static":
+        from src.server.static_server import serve as serve_static
+        try:
+            serve_static(host=args.host, port=args.port or 8000, dev=args.dev)
+        except KeyboardInterrupt:
+            print("\n静态文件服务已停止")
+        sys.exit(0)
+    if args.mode == "serve-api":
+        from src.server.query_server import serve
+        from src.storage import create_store
+        try:
+            serve(host=args.host, port=args.port or 8001, storage=create_store(args.storage))
+        except KeyboardInterrupt:
+            print("\n查询服务已停止")
+        sys.exit(0)
+    if args.mode == "feed":
+        try:
+            print_feed(args)
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+    if args.mode == "check-embeds":
+        try:
+            check_embeds(args)
+        except KeyboardInterrupt:
+            print("\n用户中断嵌入检查")
+        sys.exit(0)
+    if args.mode == "capture-screenshots":
+        try:
+            capture_screenshots(args)
+        except KeyboardInterrupt:
+            print("\n用户中断截图")
+        sys.exit(0)
+    if args.mode == "find-duplicates":
+        find_duplicates(args)
+        sys.exit(0)
+    if args.mode == "faststart-videos":
+        faststart_videos(args)
+        sys.exit(0)
+    if args.mode == "simulate-site":
+        try:
+            simulate_site(args)
+        except KeyboardInterrupt:
+            print("\n模拟站点已停止")
+        sys.exit(0)
+    if args.mode == "daemon":
+        run_daemon(args)
+        print("守护模式已退出")
+        sys.exit(0)
+    if args.mode == "refresh-stats":
+        try:
+            refresh_stats(args)
+        except KeyboardInterrupt:
+            print("\n用户中断统计数据刷新")
+        sys.exit(0)
+
+    if args.profile and args.fixture:
+        profile_fixtures(args)
+        sys.exit(0)
+
+    from src.core.crawler import GameCrawler
+    from src.storage import create_store
+    crawler = None
+    profiler = None
     try:
-        crawler = GameCrawler()
+        adapters = create_adapters(args)
+        crawler = GameCrawler(storage=create_store(args.storage), adapters=adapters)
+        crawler.time_budget = args.time_budget
+        if args.recrawl_after:
+            from src.core.daemon import parse_interval
+            crawler.recrawl_after = parse_interval(args.recrawl_after)
+        if args.workers:
+            crawler.set_concurrency(args.workers)
+        if args.profile:
+            from src.core.profiler import CrawlProfiler
+            profiler = crawler.profiler = CrawlProfiler()
+            profiler.start()
         crawler.crawl()
     except KeyboardInterrupt:
         print("\n用户中断爬虫运行")
     except Exception as e:
         print(f"\n爬虫运行出错: {str(e)}")
     finally:
-        if hasattr(crawler, 'driver'):
-            crawler.driver.quit()
+        if crawler:
+            crawler.close_driver()
+        if profiler:
+            print(f"性能分析报告: {profiler.stop()}")
         print("爬虫运行完成,程序退出!")
         sys.exit(0)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1 +1 @@
- 
\ No newline at end of file
+from src.models.game import Record, Game, GameStats, GameComments, Comment, SchemaError, dumps, loads
@@ -1,44 +1,306 @@
-from dataclasses import dataclass
-from typing import List, Optional
-from datetime import datetime
-
-class Game:
-    def __init__(self, title: str, url: str, thumbnail: str = None, video: str = None):
-        self.title = title
-        self.url = url
-        self.thumbnail = thumbnail
-        self.video = video
-        
-    def __str__(self):
-        return f"Game(title='{self.title}', url='{self.url}')"
-        
-    def __repr__(self):
-        return self.__str__()
-
-@dataclass
-class Game:
-    id: str                     # 游戏唯一标识符
-    title: str                  # 游戏标题
-    url: str                    # 游戏链接
-    thumbnail_url: str          # 缩略图URL
-    category: str               # 主分类
-    tags: List[str] = None      # 标签列表
-    description: str = ""       # 游戏描述
-    rating: float = 0.0         # 评分
-    plays: int = 0             # 游玩次数
-    added_date: str = None     # 添加日期
-    
-    def to_dict(self) -> dict:
-        """转换为字典格式"""
-        return {
-            "id": self.id,
-            "title": self.title,
-            "url": self.url,
-            "thumbnailUrl": self.thumbnail_url,
-            "category": self.category,
-            "tags": self.tags or [],
-            "description": self.description,
-            "rating": self.rating,
-            "plays": self.plays,
-            "addedDate": self.added_date or datetime.now().strftime("%Y-%m-%d")
-        } 
\ No newline at end of file
+import json
+import marshal
+from typing import Dict, List
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，缺失时使用标准库json
+    orjson = None
+
+NoneType = type(None)
+TEXT = (str,)
+OPTIONAL_TEXT = (str, NoneType)
+NUMBER = (int, float)
+COUNT = (int,)
+TEXT_LIST = (list,)
+
+# pack()输出的格式版本，字段定义变化时递增
+PACK_VERSION = 1
+
+
+class SchemaError(ValueError):
+    """记录不符合字段定义"""
+
+
+def _slots(fields) -> tuple:
+    return tuple(name for name, _, _ in fields) + ("extra",)
+
+
+class Record:
+    """
+    带__slots__的记录基类
+
+    子类用FIELDS定义字段: ((字段名, 允许的类型, 默认值), ...)，字段名就是JSON中的键名，
+    序列化时不需要转换键名。字段之外的键(如health、lastChecked)保存在extra中，读写后原样保留。
+    记录同时支持字典式访问(record["title"]、get、in、遍历键)，可以直接交给按字典处理游戏数据的代码。
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+    # 嵌套记录列表的字段: {字段名: 记录类型}
+    NESTED = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._names = tuple(name for name, _, _ in cls.FIELDS)
+        cls._name_set = frozenset(cls._names)
+
+    def __init__(self, **values):
+        for name, _, default in self.FIELDS:
+            if name in values:
+                value = values.pop(name)
+            elif isinstance(default, (list, dict)):
+                # 可变默认值每个实例单独复制
+                value = type(default)(default)
+            else:
+                value = default
+            setattr(self, name, value)
+        self.extra = values or None
+
+    # ---- 字典式访问 ----
+
+    def __getitem__(self, key: str):
+        if key in self._name_set:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key in self._name_set:
+            setattr(self, key, value)
+        elif self.extra is None:
+            self.extra = {key: value}
+        else:
+            self.extra[key] = value
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._name_set or bool(self.extra and key in self.extra)
+
+    def __iter__(self):
+        yield from self._names
+        if self.extra:
+            yield from self.extra
+
+    def keys(self) -> List[str]:
+        return list(self)
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def __len__(self) -> int:
+        return len(self._names) + len(self.extra or ())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            other = other.to_dict()
+        if not isinstance(other, dict):
+            return NotImplemented
+        return self.to_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        identity = getattr(self, "id", None)
+        return f"{self.__class__.__name__}(id={identity!r})"
+
+    # ---- 校验与转换 ----
+
+    @classmethod
+    def from_dict(cls, data: Dict, validate: bool = True) -> "Record":
+        """
+        从字典创建记录，缺少的字段使用默认值
+        :param data: 字典(如读取的info.json)
+        :param validate: 是否校验字段类型，不符合时抛出SchemaError
+        """
+        values = dict(data)
+        for name, record_type in cls.NESTED.items():
+            items = values.get(name)
+            if isinstance(items, list):
+                values[name] = [item if isinstance(item, Record) else record_type.from_dict(item, validate)
+                                for item in items]
+        record = cls(**values)
+        if validate:
+            record.validate()
+        return record
+
+    def validate(self) -> "Record":
+        """检查各字段的类型，返回自身，不符合时抛出SchemaError"""
+        for name, kinds, _ in self.FIELDS:
+            value = getattr(self, name)
+            # bool是int的子类，计数和评分字段不接受布尔值
+            if not isinstance(value, kinds) or (isinstance(value, bool) and bool not in kinds):
+                expected = "/".join(kind.__name__ for kind in kinds)
+                raise SchemaError(f"{self.__class__.__name__}.{name} 应为 {expected}，实际为 "
+                                  f"{type(value).__name__}: {value!r:.80}")
+            if kinds is TEXT_LIST and not all(isinstance(item, (str, Record)) for item in value):
+                raise SchemaError(f"{self.__class__.__name__}.{name} 中包含非字符串元素")
+        self.check()
+        return self
+
+    def check(self):
+        """子类的附加校验(取值范围等)"""
+
+    def to_dict(self) -> Dict:
+        """转换为字典，字段按定义顺序排列，extra中的键在最后"""
+        data = {name: getattr(self, name) for name in self._names}
+        for name in self.NESTED:
+            items = data[name]
+            if items:
+                data[name] = [item.to_dict() if isinstance(item, Record) else item for item in items]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def copy(self) -> "Record":
+        return self.__class__.from_dict(self.to_dict(), validate=False)
+
+    # ---- 序列化 ----
+
+    def to_json(self, indent: bool = False) -> str:
+        return dumps(self, indent)
+
+    @classmethod
+    def from_json(cls, text, validate: bool = True) -> "Record":
+        return cls.from_dict(loads(text), validate)
+
+    def pack(self) -> bytes:
+        """
+        紧凑的二进制格式(marshal)，只包含字段值和extra，不含键名，
+        适合缓存和进程间传递，不适合长期保存(不同Python版本之间不保证兼容)
+        """
+        values = tuple(getattr(self, name) for name in self._names)
+        for index, name in enumerate(self._names):
+            if name in self.NESTED and values[index]:
+                nested = [item.pack() if isinstance(item, Record) else marshal.dumps(item) for item in values[index]]
+                values = values[:index] + (nested,) + values[index + 1:]
+        return marshal.dumps((PACK_VERSION, values, self.extra))
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "Record":
+        version, values, extra = marshal.loads(data)
+        if version != PACK_VERSION or len(values) != len(cls._names):
+            raise SchemaError(f"{cls.__name__} 的二进制格式版本不匹配")
+        fields = dict(zip(cls._names, values))
+        for name, record_type in cls.NESTED.items():
+            if fields.get(name):
+                fields[name] = [record_type.unpack(item) for item in fields[name]]
+        return cls(**fields, **(extra or {}))
+
+
+def _default(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"无法序列化 {type(value).__name__}")
+
+
+def dumps(data, indent: bool = False) -> str:
+    """
+    序列化为JSON字符串，记录和字典都可以，非ASCII字符不转义
+    安装orjson时使用orjson，否则使用标准库json。两者解析结果相同，但文本不保证逐字节一致：
+    浮点数的表示可能不同，NaN/Infinity在orjson中输出为null，orjson不接受非字符串的键
+    :param indent: 是否按2个空格缩进(JSON目录存储的文件格式)
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_INDENT_2 if indent else 0).decode("utf-8")
+    if indent:
+        return json.dumps(data, ensure_ascii=False, indent=2, default=_default)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def loads(text):
+    """解析JSON字符串或字节串"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+class Comment(Record):
+    """一条玩家评论"""
+
+    FIELDS = (
+        ("id", TEXT, ""),
+        ("user", TEXT, ""),
+        ("content", TEXT, ""),
+        ("rating", NUMBER, 0),
+        ("date", TEXT, ""),
+    )
+    __slots__ = _slots(FIELDS)
+
+
+class GameComments(Record):
+    """comments.json: 一个游戏的评论列表"""
+
+    FIELDS = (
+        ("id", TEXT, ""),
+        ("comments", (list,), []),
+        ("lastUpdated", TEXT, ""),
+    )
+    NESTED = {"comments": Comment}
+    __slots__ = _slots(FIELDS)
+
+    def check(self):
+        for comment in self.comments:
+            if isinstance(comment, Record):
+                comment.validate()
+            else:
+                Comment.from_dict(comment)
+
+
+class GameStats(Record):
+    """stats.json: 评分、评分人数和游玩次数"""
+
+    FIELDS = (
+        ("id", TEXT, ""),
+        ("plays", COUNT, 0),
+        ("rating", NUMBER, 0),
+        ("ratingCount", COUNT, 0),
+        ("lastUpdated", TEXT, ""),
+    )
+    __slots__ = _slots(FIELDS)
+
+    def check(self):
+        if not 0 <= self.rating <= 5:
+            raise SchemaError(f"GameStats.rating 超出范围: {self.rating}")
+        if self.plays < 0 or self.ratingCount < 0:
+            raise SchemaError(f"GameStats 计数为负数: plays={self.plays}, ratingCount={self.ratingCount}")
+
+
+class Game(Record):
+    """
+    游戏信息，对应info.json/game.json
+
+    列表页解析出的游戏卡片也使用这个类型，此时只有id、title、url、thumbnailUrl、previewVideoUrl有值。
+    """
+
+    FIELDS = (
+        ("id", TEXT, ""),
+        ("title", TEXT, ""),
+        ("url", OPTIONAL_TEXT, None),  # 游戏的嵌入地址(列表页卡片中为详情页地址)
+        ("description", TEXT, ""),
+        ("developer", TEXT, ""),
+        ("category", TEXT, ""),
+        ("tags", TEXT_LIST, []),
+        ("controls", TEXT, ""),
+        ("thumbnailUrl", TEXT, ""),
+        ("previewUrl", TEXT, ""),
+        ("previewVideoUrl", TEXT, ""),
+        ("screenshots", TEXT_LIST, []),
+        ("features", TEXT_LIST, []),
+        ("device", (dict,), {"mobile": True, "desktop": True}),
+        ("addedDate", TEXT, ""),
+        ("lastUpdated", TEXT, ""),
+        ("gameUrl", OPTIONAL_TEXT, None),
+        ("site", TEXT, ""),
+    )
+    __slots__ = _slots(FIELDS)
+
+    def check(self):
+        if not self.id or not self.title:
+            raise SchemaError(f"Game 缺少id或标题: id={self.id!r}, title={self.title!r}")
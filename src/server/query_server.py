@@ -0,0 +1,450 @@
+import json
+import os
+import re
+import sys
+import time
+import bisect
+import logging
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.core.change_feed import ChangeFeed
+from src.core.index_builder import added_sort_key
+from src.storage import create_store
+
+WORD_PATTERN = re.compile(r"\w+")
+SORT_FIELDS = ("rating", "plays", "added", "title")
+DESCENDING_FIELDS = ("rating", "plays", "added")
+
+
+def _trigrams(text: str):
+    """标题的三元组集合"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class Catalog:
+    """
+    内存目录索引
+
+    启动时一次性读取元数据目录，构建:
+    - 标签和分类的倒排索引(ID -> 游戏位置集合)
+    - 标题单词的有序前缀表和三元组(trigram)索引
+    - 按评分、游玩次数、发布日期、标题预排序的(排序键, 位置)数组，增量更新时二分插入
+    之后根据变更事件流只重新加载发生变化的游戏。
+    """
+
+    def __init__(self, metadata_dir="games/metadata", cache_size=1024, storage=None):
+        """
+        :param metadata_dir: 元数据目录(index.json所在目录)
+        :param cache_size: 查询结果缓存的条目数
+        :param storage: 元数据存储(CatalogStore)，默认为metadata_dir下的JSON目录
+        """
+        self.metadata_dir = metadata_dir
+        self.storage = storage or create_store("json", metadata_dir=metadata_dir)
+        self.cache_size = cache_size
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        """清空全部索引"""
+        self.records = []        # 位置 -> 游戏记录
+        self.positions = {}      # 游戏ID -> 位置
+        self.removed = set()     # 已下架或已删除的位置
+        self.tag_index = {}      # 小写标签 -> 位置集合
+        self.category_index = {}  # 小写分类 -> 位置集合
+        self.trigram_index = {}  # 标题三元组 -> 位置集合
+        self.words = []          # 有序的(标题单词, 位置)列表，用于前缀查询
+        self.orders = {}         # 排序字段 -> 升序排列的(排序键, 位置)数组
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.generation = 0
+
+    # ---- 加载 ----
+
+    def _read_json(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _load_record(self, game_id: str, info=None, stats=None):
+        """读取单个游戏的查询记录，info/stats已读取时直接使用"""
+        info = info or self.storage.get(game_id, "info")
+        if not info:
+            return None
+        stats = stats or self.storage.get(game_id, "stats") or {}
+        return {
+            "id": game_id,
+            "title": info.get("title", game_id),
+            "category": info.get("category", ""),
+            "tags": info.get("tags", []),
+            "rating": stats.get("rating", 0) or 0,
+            "ratingCount": stats.get("ratingCount", 0) or 0,
+            "plays": stats.get("plays", 0) or 0,
+            "thumbnailUrl": info.get("thumbnailUrl", ""),
+            "previewVideoUrl": info.get("previewVideoUrl", ""),
+            "added": info.get("addedDate", ""),
+        }
+
+    def load(self):
+        """全量加载元数据目录"""
+        start = time.time()
+        removed_ids = set()
+        index = self._read_json(os.path.join(self.metadata_dir, "index.json")) or {}
+        for game in index.get("games", []):
+            if game.get("removed"):
+                removed_ids.add(game["id"])
+
+        with self.lock:
+            self._reset()
+            # 两次顺序扫描，SQLite存储下各是一次查询
+            all_stats = dict(self.storage.scan("stats"))
+            for game_id, info in self.storage.scan("info"):
+                record = self._load_record(game_id, info, all_stats.get(game_id, {}))
+                if record:
+                    self._add(record, index_words=False)
+                    if game_id in removed_ids:
+                        self.removed.add(self.positions[game_id])
+            self.words.sort()
+            self._rebuild_orders()
+        self.logger.info(f"目录已加载: {len(self.records)} 个游戏, 耗时 {time.time() - start:.2f}秒")
+
+    def _add(self, record, index_words=True):
+        """把记录加入各索引，需在持有锁时调用"""
+        pos = self.positions.get(record["id"])
+        if pos is None:
+            pos = len(self.records)
+            self.records.append(record)
+            self.positions[record["id"]] = pos
+        else:
+            self.records[pos] = record
+        for tag in record["tags"]:
+            self.tag_index.setdefault(tag.lower(), set()).add(pos)
+        if record["category"]:
+            self.category_index.setdefault(record["category"].lower(), set()).add(pos)
+        title = record["title"].lower()
+        for gram in _trigrams(title):
+            self.trigram_index.setdefault(gram, set()).add(pos)
+        for word in set(WORD_PATTERN.findall(title)):
+            if index_words:
+                bisect.insort(self.words, (word, pos))
+            else:
+                self.words.append((word, pos))
+
+    def _remove(self, pos):
+        """把位置从各索引中移除，需在持有锁时调用"""
+        record = self.records[pos]
+        for tag in record["tags"]:
+            self.tag_index.get(tag.lower(), set()).discard(pos)
+        if record["category"]:
+            self.category_index.get(record["category"].lower(), set()).discard(pos)
+        title = record["title"].lower()
+        for gram in _trigrams(title):
+            self.trigram_index.get(gram, set()).discard(pos)
+        for word in set(WORD_PATTERN.findall(title)):
+            i = bisect.bisect_left(self.words, (word, pos))
+            if i < len(self.words) and self.words[i] == (word, pos):
+                del self.words[i]
+
+    def sort_key(self, field: str, pos: int):
+        """游戏在指定排序字段上的排序键"""
+        record = self.records[pos]
+        if field == "rating":
+            return (record["rating"], record["ratingCount"])
+        if field == "added":
+            return added_sort_key(record["added"])
+        if field == "title":
+            return record["title"].lower()
+        return record[field]
+
+    def _rebuild_orders(self):
+        """全量重建预排序数组，需在持有锁时调用"""
+        for field in SORT_FIELDS:
+            self.orders[field] = sorted((self.sort_key(field, pos), pos) for pos in range(len(self.records)))
+        self._invalidate()
+
+    def _invalidate(self):
+        self._cache.clear()
+        self.generation += 1
+
+    def reload_games(self, game_ids, removed_ids=(), added_ids=()):
+        """
+        增量重新加载部分游戏，排序数组通过二分查找原地更新
+        :param game_ids: 内容变化的游戏
+        :param removed_ids: 下架的游戏
+        :param added_ids: 新上架或重新上架的游戏，只有这些游戏会清除下架标记，其余变化保持原有状态
+        """
+        added_ids = set(added_ids)
+        with self.lock:
+            for game_id in set(game_ids) | set(removed_ids):
+                pos = self.positions.get(game_id)
+                if pos is not None:
+                    for field in SORT_FIELDS:
+                        order = self.orders[field]
+                        i = bisect.bisect_left(order, (self.sort_key(field, pos), pos))
+                        if i < len(order) and order[i][1] == pos:
+                            del order[i]
+                    self._remove(pos)
+                record = None if game_id in removed_ids else self._load_record(game_id)
+                if record:
+                    is_new = pos is None
+                    self._add(record)
+                    pos = self.positions[game_id]
+                    if is_new or game_id in added_ids:
+                        self.removed.discard(pos)
+                elif pos is not None:
+                    self.removed.add(pos)
+                if pos is not None:
+                    for field in SORT_FIELDS:
+                        bisect.insort(self.orders[field], (self.sort_key(field, pos), pos))
+            self._invalidate()
+
+    # ---- 查询 ----
+
+    def _title_matches(self, text: str):
+        """标题查询：单个短词用前缀表，其余用三元组索引求交后校验子串"""
+        text = text.lower().strip()
+        if len(text) < 3 and WORD_PATTERN.fullmatch(text):
+            result = set()
+            i = bisect.bisect_left(self.words, (text, -1))
+            while i < len(self.words) and self.words[i][0].startswith(text):
+                result.add(self.words[i][1])
+                i += 1
+            return result
+
+        grams = sorted((self.trigram_index.get(gram, set()) for gram in _trigrams(text)), key=len)
+        if not grams:
+            # 不足三个字符且不是单词时逐条匹配
+            return {pos for pos, record in enumerate(self.records) if text in record["title"].lower()}
+        candidates = set(grams[0])
+        for posting in grams[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return {pos for pos in candidates if text in self.records[pos]["title"].lower()}
+
+    def query(self, q=None, category=None, tags=(), sort="rating", page=1, page_size=24):
+        """
+        分页查询
+        :param q: 标题关键词
+        :param category: 分类名称
+        :param tags: 必须同时包含的标签
+        :param sort: 排序字段，见SORT_FIELDS
+        :param page: 页码(从1开始)
+        :param page_size: 每页数量
+        """
+        sort = sort if sort in SORT_FIELDS else "rating"
+        page = max(1, int(page))
+        page_size = max(1, min(int(page_size), 200))
+        tags = tuple(sorted(tag.lower() for tag in tags if tag))
+        cache_key = (q or "", (category or "").lower(), tags, sort, page, page_size)
+
+        with self.lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+
+            filters = []
+            if category:
+                filters.append(self.category_index.get(category.lower(), set()))
+            for tag in tags:
+                filters.append(self.tag_index.get(tag, set()))
+            if q:
+                filters.append(self._title_matches(q))
+
+            offset = (page - 1) * page_size
+            if filters:
+                filters.sort(key=len)
+                matched = set(filters[0])
+                for posting in filters[1:]:
+                    matched &= posting
+                matched -= self.removed
+                total = len(matched)
+                # 结果集较小时直接排序，否则沿预排序数组扫描
+                if total * 32 < len(self.records):
+                    ordered = sorted(matched, key=lambda pos: (self.sort_key(sort, pos), pos),
+                                     reverse=sort in DESCENDING_FIELDS)
+                    selected = ordered[offset:offset + page_size]
+                else:
+                    selected = self._scan(sort, matched.__contains__, offset, page_size)
+            else:
+                total = len(self.records) - len(self.removed)
+                selected = self._scan(sort, lambda pos: pos not in self.removed, offset, page_size)
+
+            result = {
+                "total": total,
+                "page": page,
+                "pages": (total + page_size - 1) // page_size,
+                "sort": sort,
+                "games": [self.records[pos] for pos in selected]
+            }
+            self._cache[cache_key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return result
+
+    def _scan(self, sort, accept, offset, limit):
+        """沿预排序数组扫描，取出第offset条之后满足条件的limit条"""
+        order = self.orders[sort]
+        entries = reversed(order) if sort in DESCENDING_FIELDS else iter(order)
+        selected = []
+        skipped = 0
+        for _, pos in entries:
+            if not accept(pos):
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            selected.append(pos)
+            if len(selected) >= limit:
+                break
+        return selected
+
+    def get(self, game_id: str):
+        with self.lock:
+            pos = self.positions.get(game_id)
+            if pos is None or pos in self.removed:
+                return None
+            return self.records[pos]
+
+    def facets(self):
+        """分类和标签的游戏数量"""
+        with self.lock:
+            live = lambda posting: len(posting - self.removed)
+            return {
+                "categories": sorted(({"name": self.records[next(iter(p))]["category"], "count": live(p)}
+                                      for p in self.category_index.values() if live(p)),
+                                     key=lambda item: -item["count"]),
+                "tags": sorted(({"name": tag, "count": live(p)} for tag, p in self.tag_index.items() if live(p)),
+                               key=lambda item: -item["count"]),
+            }
+
+    def search_text(self, text: str, limit=50):
+        """在描述和评论中全文检索(SQLite存储使用FTS5)，返回仍在目录中的游戏记录"""
+        if not text:
+            raise ValueError("缺少检索词")
+        ids = self.storage.search(text, limit=limit)
+        return {"q": text, "games": [record for record in map(self.get, ids) if record]}
+
+    def status(self):
+        with self.lock:
+            return {
+                "games": len(self.records) - len(self.removed),
+                "generation": self.generation,
+                "cacheEntries": len(self._cache),
+                "cacheHits": self.cache_hits,
+                "cacheMisses": self.cache_misses,
+            }
+
+
+class CatalogFollower(threading.Thread):
+    """跟踪变更事件流，把爬虫写入的变化增量应用到Catalog"""
+
+    def __init__(self, catalog: Catalog, feed: ChangeFeed, poll_interval=2.0, offset=None):
+        """
+        :param offset: 开始读取的事件流位置，应在加载目录之前取得，加载期间写入的事件不会丢失；默认为当前末尾
+        """
+        super().__init__(name="catalog-follower", daemon=True)
+        self.catalog = catalog
+        self.feed = feed
+        self.poll_interval = poll_interval
+        self.offset = feed.end_offset() if offset is None else offset
+        self.logger = logging.getLogger(__name__)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                events, self.offset = self.feed.read(self.offset)
+                if events:
+                    changed = {e["gameId"] for e in events if e["type"] != "game_removed"}
+                    removed = {e["gameId"] for e in events if e["type"] == "game_removed"}
+                    added = {e["gameId"] for e in events if e["type"] == "game_added"}
+                    self.catalog.reload_games(changed - removed, removed, added - removed)
+                    self.logger.info(f"目录增量更新: {len(changed)} 个变化, {len(removed)} 个下架")
+                    continue
+            except Exception as e:
+                self.logger.error(f"应用变更事件失败: {str(e)}")
+            self._stop_event.wait(self.poll_interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """
+    查询接口:
+    - GET /api/games?q=&category=&tags=a,b&sort=rating&page=1&size=24
+    - GET /api/games/<id>
+    - GET /api/search?q=  (描述和评论全文检索)
+    - GET /api/facets
+    - GET /api/status
+    """
+
+    catalog = None
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        arg = lambda name, default=None: params.get(name, [default])[0]
+        try:
+            if parsed.path == "/api/games":
+                tags = [tag for value in params.get("tags", []) for tag in value.split(",")]
+                result = self.catalog.query(q=arg("q"), category=arg("category"), tags=tags,
+                                            sort=arg("sort", "rating"), page=arg("page", 1),
+                                            page_size=arg("size", 24))
+                self._send_json(200, result)
+            elif parsed.path.startswith("/api/games/"):
+                record = self.catalog.get(parsed.path[len("/api/games/"):])
+                self._send_json(200 if record else 404, record or {"error": "not found"})
+            elif parsed.path == "/api/search":
+                self._send_json(200, self.catalog.search_text(arg("q"), limit=min(int(arg("limit", 50)), 200)))
+            elif parsed.path == "/api/facets":
+                self._send_json(200, self.catalog.facets())
+            elif parsed.path == "/api/status":
+                self._send_json(200, self.catalog.status())
+            else:
+                self._send_json(404, {"error": "not found"})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+
+
+def serve(host="127.0.0.1", port=8001, metadata_dir="games/metadata", storage=None):
+    """加载目录并启动查询服务"""
+    catalog = Catalog(metadata_dir, storage=storage)
+    feed = ChangeFeed()
+    # 在加载前记录事件流位置，加载期间写入的变化之后会被补上
+    offset = feed.end_offset()
+    catalog.load()
+    follower = CatalogFollower(catalog, feed, offset=offset)
+    follower.start()
+
+    QueryRequestHandler.catalog = catalog
+    server = ThreadingHTTPServer((host, port), QueryRequestHandler)
+    print(f"查询服务已启动: http://{host}:{port}/api/games")
+    try:
+        server.serve_forever()
+    finally:
+        follower.stop()
+        server.server_close()
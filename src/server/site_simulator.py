@@ -0,0 +1,413 @@
+import html
+import json
+import math
+import os
+import sys
+import time
+import zlib
+import random
+import struct
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, unquote
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.utils.text import sanitize_id
+
+ADJECTIVES = ("Turbo", "Pixel", "Crystal", "Shadow", "Mega", "Tiny", "Cosmic", "Neon", "Rusty", "Lucky",
+              "Frozen", "Wild", "Silent", "Golden", "Crazy", "Happy", "Iron", "Super", "Hyper", "Retro")
+NOUNS = ("Goblin", "Rocket", "Mahjong", "Puzzle", "Dragon", "Tower", "Racer", "Farm", "Ninja", "Castle",
+         "Bubble", "Zombie", "Pirate", "Garden", "Robot", "Island", "Jelly", "Knight", "Slime", "Tank")
+ACTIONS = ("Rush", "Quest", "Mania", "Defense", "Blast", "Saga", "Escape", "Builder", "Frenzy", "Run",
+           "Match", "Legends", "Adventure", "Arena", "Dash", "Tycoon", "Party", "Wars", "Jump", "Merge")
+GENRES = (("puzzle", "Puzzle"), ("action", "Action"), ("strategy", "Strategy"), ("sports", "Sports"),
+          ("adventure", "Adventure"), ("casual", "Casual"), ("shooting", "Shooting"), ("io", ".io"))
+TAGS = ("HTML5", "Easy", "Hard", "Multiplayer", "Mahjong", "Match 3", "Physics", "Pixel", "Idle", "Racing",
+        "Brain Teasers & Quizzes", "Mobile", "Keyboard", "Mouse", "Cute", "Horror", "Retro", "Space")
+DEVELOPERS = ("Neon Games", "Pixel Forge", "Blue Owl Studio", "Kiwi Labs", "Moonbit", "Tiny Anvil")
+USERS = ("SmashLemon", "GamerGirl22", "xXSniperXx", "puzzlefan", "MrBones", "lilcat", "Dragonslayer", "bob")
+REVIEWS_GOOD = ("Really fun, played it for hours", "Great game!", "It's okay, a bit tricky though",
+                "Love the graphics", "Best puzzle game on the site")
+REVIEWS_BAD = ("Too hard", "Doesn't load on my phone", "Boring after level 3", "Too many ads")
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+LISTING_CSS = ("body{font-family:sans-serif;margin:0}.Listed{display:flex;flex-wrap:wrap}"
+               ".Listed__Game{width:200px;height:140px;margin:8px}")
+LISTING_SCRIPT = """<script>
+(function () {
+  var page = 1, loading = false, done = %s;
+  function more() {
+    if (loading || done) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 600) return;
+    loading = true;
+    fetch("/all-games/page/" + (page + 1)).then(function (r) {
+      if (!r.ok) throw new Error(r.status);
+      return r.text();
+    }).then(function (text) {
+      page++;
+      if (!text.trim()) { done = true; return; }
+      document.getElementById("listing").insertAdjacentHTML("beforeend", text);
+    }).catch(function () {}).then(function () { loading = false; });
+  }
+  window.addEventListener("scroll", more);
+})();
+</script>"""
+
+
+class SimulatedGame:
+    """模拟站点中的一个游戏，所有内容由(种子, 编号)确定，同一配置下每次生成的内容相同"""
+
+    __slots__ = ("index", "slug", "genre", "genre_name", "title", "seed")
+
+    def __init__(self, seed: int, index: int):
+        rng = random.Random(seed * 1000003 + index)
+        self.index = index
+        self.seed = rng.getrandbits(32)
+        self.title = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.choice(ACTIONS)} {index}"
+        self.genre, self.genre_name = rng.choice(GENRES)
+        self.slug = sanitize_id(self.title).replace("_", "-")
+
+    def path(self) -> str:
+        return f"/{self.genre}/{self.slug}"
+
+
+class SimulatedCatalog:
+    """
+    模拟目录及其在各代(generation)之间的变化
+
+    第0代有size个游戏；之后每一代按churn比例下架一部分游戏、上架同样数量的新游戏，
+    并给一部分游戏改名(标题加" Remastered"，游戏ID随之变化)。评分人数和浏览量随代数增长。
+    """
+
+    def __init__(self, size=10000, seed=1, churn=0.02, generation=0):
+        self.size = size
+        self.seed = seed
+        self.churn = churn
+        self.lock = threading.Lock()
+        self.set_generation(generation)
+
+    def set_generation(self, generation: int):
+        """从第0代开始逐代计算目录，10万个游戏约需1-2秒"""
+        present = list(range(self.size))
+        renamed = {}
+        next_index = self.size
+        for current in range(1, generation + 1):
+            rng = random.Random(self.seed * 7919 + current)
+            count = int(len(present) * self.churn)
+            removed = set(rng.sample(range(len(present)), count)) if count else set()
+            present = [index for pos, index in enumerate(present) if pos not in removed]
+            present.extend(range(next_index, next_index + count))
+            next_index += count
+            for pos in rng.sample(range(len(present)), count // 4):
+                renamed.setdefault(present[pos], current)
+
+        games = [SimulatedGame(self.seed, index) for index in present]
+        # 新游戏排在列表前面，与真实站点的"最新"排序一致
+        games.sort(key=lambda game: -game.index)
+        with self.lock:
+            self.generation = generation
+            self.games = games
+            self.renamed = renamed
+            self.by_path = {game.path(): game for game in games}
+            self.by_slug = {game.slug: game for game in games}
+
+    def advance(self) -> int:
+        self.set_generation(self.generation + 1)
+        return self.generation
+
+    def title(self, game: SimulatedGame) -> str:
+        return game.title + (" Remastered" if game.index in self.renamed else "")
+
+    def details(self, game: SimulatedGame) -> dict:
+        """详情页展示的数据"""
+        rng = random.Random(game.seed)
+        generation = self.generation
+        votes = rng.randint(0, 5000) + generation * rng.randint(0, 40)
+        percent = rng.randint(20, 98)
+        year = 2012 + rng.randint(0, 12)
+        reviews = []
+        for _ in range(rng.randint(0, 8)):
+            positive = rng.random() < percent / 100
+            reviews.append({
+                "user": rng.choice(USERS),
+                "date": f"{rng.randint(2, 11)} months ago",
+                "content": rng.choice(REVIEWS_GOOD if positive else REVIEWS_BAD),
+                "positive": positive,
+            })
+        return {
+            "title": self.title(game),
+            "description": (f"{self.title(game)} is a {game.genre_name.lower()} game. "
+                            + " ".join(rng.choice(REVIEWS_GOOD).rstrip("!.") + "." for _ in range(rng.randint(2, 6)))),
+            "instructions": "Use the mouse to play. Press P to pause.",
+            "developer": rng.choice(DEVELOPERS),
+            "released": f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {year}",
+            "tags": rng.sample(TAGS, rng.randint(1, 4)),
+            "percent": percent,
+            "votes": votes,
+            "views": rng.randint(100, 2000000) + generation * rng.randint(0, 5000),
+            "reviews": reviews,
+            "hasVideo": rng.random() < 0.8,
+        }
+
+
+def synthetic_png(seed: int, size: int = 64) -> bytes:
+    """按种子生成的渐变色PNG，不依赖Pillow"""
+    rng = random.Random(seed)
+    base = [rng.randint(0, 255) for _ in range(3)]
+    step = [rng.randint(1, 4) for _ in range(3)]
+    rows = b"".join(
+        b"\x00" + bytes((base[c] + step[c] * (x + y)) % 256 for x in range(size) for c in range(3))
+        for y in range(size))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+
+def synthetic_mp4(seed: int, size_kb: int = 64) -> bytes:
+    """
+    结构完整的MP4(ftyp、mdat、moov)，moov在文件末尾，与未优化的上传视频相同，
+    stco中的块偏移量指向mdat的数据。内容不是可播放的视频。
+    """
+    length = max(1, size_kb) * 1024
+    payload = random.Random(seed).getrandbits(length * 8).to_bytes(length, "big")
+    ftyp = _box(b"ftyp", b"isom" + struct.pack(">I", 512) + b"isomiso2mp41")
+    mdat = _box(b"mdat", payload)
+    chunks = 4
+    chunk_size = len(payload) // chunks
+    offsets = [len(ftyp) + 8 + i * chunk_size for i in range(chunks)]
+    stco = _box(b"stco", struct.pack(">II", 0, chunks) + b"".join(struct.pack(">I", o) for o in offsets))
+    stsz = _box(b"stsz", struct.pack(">III", 0, chunk_size, chunks))
+    stsc = _box(b"stsc", struct.pack(">IIIII", 0, 1, 1, 1, 1))
+    stbl = _box(b"stbl", stsc + stsz + stco)
+    minf = _box(b"minf", stbl)
+    mdhd = _box(b"mdhd", struct.pack(">IIIIIHH", 0, 0, 0, 1000, 1000 * chunks, 0, 0))
+    mdia = _box(b"mdia", mdhd + minf)
+    trak = _box(b"trak", mdia)
+    mvhd = _box(b"mvhd", struct.pack(">IIIII", 0, 0, 0, 1000, 1000 * chunks) + b"\x00" * 80)
+    moov = _box(b"moov", mvhd + trak)
+    return ftyp + mdat + moov
+
+
+class SiteSimulator:
+    """
+    addictinggames结构的本地模拟站点，用于在不访问真实站点的情况下测试大目录下的爬取耗时、内存和索引
+
+    - /all-games: 无限滚动的 .Listed__Game 列表，滚动到底部时由页面脚本加载 /all-games/page/<n>
+    - /<分类>/<游戏>: 详情页，包含 __NEXT_DATA__、评分、评论
+    - /assets/<游戏>/thumbnail.png、/assets/<游戏>/preview.mp4: 缩略图和预览视频
+    - /embed/<游戏>: 嵌入页面
+    - /_sim/status、/_sim/advance: 查看请求统计、进入下一代目录(模拟两次爬取之间的上下架和改名)
+    """
+
+    def __init__(self, games=10000, seed=1, generation=0, churn=0.02, page_size=60,
+                 latency=(0.05, 0.2), error_rate=0.0, throttle_rate=0.0, video_kb=64):
+        """
+        :param games: 第0代的游戏数
+        :param seed: 随机种子，相同种子生成相同的目录
+        :param generation: 启动时的目录代数
+        :param churn: 每一代上下架的游戏比例，其中四分之一比例的游戏改名
+        :param page_size: 列表每次加载的游戏数
+        :param latency: 响应延迟(秒)的(中位数, P95)，按对数正态分布抽样，(0, 0)表示没有延迟
+        :param error_rate: 详情页和资源返回500的比例
+        :param throttle_rate: 详情页和资源返回429的比例
+        :param video_kb: 预览视频的大小(KB)
+        """
+        self.catalog = SimulatedCatalog(games, seed, churn, generation)
+        self.page_size = max(1, page_size)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.video_kb = video_kb
+        self.logger = logging.getLogger(__name__)
+        self.counters = {}
+        self.counter_lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    # ---- 请求处理 ----
+
+    def count(self, kind: str, status: int):
+        key = f"{kind}:{status}"
+        with self.counter_lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def delay(self) -> float:
+        median, p95 = self.latency
+        if median <= 0:
+            return 0
+        sigma = math.log(max(p95, median) / median) / 1.645
+        with self._rng_lock:
+            return self._rng.lognormvariate(math.log(median), sigma)
+
+    def failure(self):
+        """按配置的比例返回模拟的失败状态码，正常时返回None"""
+        with self._rng_lock:
+            roll = self._rng.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+    def route(self, path: str):
+        """
+        :return: (类型, 状态码, Content-Type, 响应内容)
+        """
+        catalog = self.catalog
+        if path in ("/all-games", "/all-games/"):
+            return "listing", 200, "text/html; charset=utf-8", self.render_listing().encode("utf-8")
+        if path.startswith("/all-games/page/"):
+            try:
+                page = int(path.rsplit("/", 1)[1])
+            except ValueError:
+                return "listing", 404, "text/plain", b"not found"
+            return "listing", 200, "text/html; charset=utf-8", self.render_tiles(page).encode("utf-8")
+        if path == "/_sim/status":
+            return "control", 200, "application/json", json.dumps(self.status()).encode("utf-8")
+        if path == "/_sim/advance":
+            catalog.advance()
+            return "control", 200, "application/json", json.dumps(self.status()).encode("utf-8")
+
+        parts = path.strip("/").split("/")
+        if len(parts) == 3 and parts[0] == "assets":
+            game = catalog.by_slug.get(parts[1])
+            if game is None:
+                return "asset", 404, "text/plain", b"not found"
+            failed = self.failure()
+            if failed:
+                return "asset", failed, "text/plain", b"simulated failure"
+            if parts[2] == "thumbnail.png":
+                return "asset", 200, "image/png", synthetic_png(game.seed)
+            if parts[2] == "preview.mp4":
+                return "asset", 200, "video/mp4", synthetic_mp4(game.seed, self.video_kb)
+            return "asset", 404, "text/plain", b"not found"
+        if len(parts) == 2 and parts[0] == "embed":
+            game = catalog.by_slug.get(parts[1])
+            if game is None:
+                return "embed", 404, "text/plain", b"not found"
+            body = (f"<!DOCTYPE html><html><head><title>{html.escape(catalog.title(game))}</title></head>"
+                    f"<body style=\"margin:0;background:#222\"><canvas width=\"800\" height=\"600\"></canvas></body></html>")
+            return "embed", 200, "text/html; charset=utf-8", body.encode("utf-8")
+        game = catalog.by_path.get(path.rstrip("/"))
+        if game is None:
+            return "detail", 404, "text/html; charset=utf-8", b"<html><body><h1>Page not found</h1></body></html>"
+        failed = self.failure()
+        if failed:
+            return "detail", failed, "text/html; charset=utf-8", b"<html><body><h1>Try again later</h1></body></html>"
+        return "detail", 200, "text/html; charset=utf-8", self.render_detail(game).encode("utf-8")
+
+    def status(self) -> dict:
+        with self.counter_lock:
+            counters = dict(self.counters)
+        return {"generation": self.catalog.generation, "games": len(self.catalog.games), "requests": counters}
+
+    # ---- 页面 ----
+
+    def render_tiles(self, page: int) -> str:
+        games = self.catalog.games[(page - 1) * self.page_size:page * self.page_size]
+        return "".join(
+            f'<div class="Listed__Game"><a class="Listed__Game__Inner" href="{game.path()}">'
+            f'{html.escape(self.catalog.title(game))}</a></div>' for game in games)
+
+    def render_listing(self) -> str:
+        done = "true" if len(self.catalog.games) <= self.page_size else "false"
+        return (f"<!DOCTYPE html><html><head><title>All Games</title><style>{LISTING_CSS}</style></head><body>"
+                f'<h1>All Games</h1><div class="Listed" id="listing">{self.render_tiles(1)}</div>'
+                + LISTING_SCRIPT % done + "</body></html>")
+
+    def render_detail(self, game: SimulatedGame) -> str:
+        data = self.catalog.details(game)
+        title = html.escape(data["title"])
+        video = f"/assets/{game.slug}/preview.mp4" if data["hasVideo"] else None
+        next_data = {
+            "props": {"pageProps": {
+                "game": {
+                    "title": data["title"],
+                    "path": game.path(),
+                    "thumbnailUrl": f"/assets/{game.slug}/thumbnail.png",
+                    "videoThumbnailUrl": video,
+                    "rating": str(data["percent"]),
+                    "totalVotes": str(data["votes"]),
+                    "embedUrl": f"/embed/{game.slug}",
+                    "developer": data["developer"],
+                    "instructions": data["instructions"],
+                },
+                "reviews": [{"user": review["user"], "body": review["content"]} for review in data["reviews"]],
+                "pageViews": f"{data['views']:,}",
+            }},
+            "page": "/[genre]/[slug]",
+        }
+        rating = round(1 + data["percent"] * 4 / 100, 1)
+        tags = "".join(f'<a class="CategoryTag" href="/tag/{sanitize_id(tag)}"><span class="CategoryTag__Label">'
+                       f'<span>{html.escape(tag)}</span></span></a>' for tag in data["tags"])
+        reviews = "".join(
+            f'<div class="Flex GameReview {"GameReview--positive" if review["positive"] else "GameReview--negative"}">'
+            f'<div class="Flex GameReview__Author"><a class="RouterLink" href="/users/{review["user"]}">'
+            f'{html.escape(review["user"])}</a></div><p class="GameReview__Subject">{review["date"]}</p>'
+            f'<p>{html.escape(review["content"])}</p></div>' for review in data["reviews"])
+        return (
+            f"<!DOCTYPE html><html><head><title>{title} - Play {title} Online</title></head><body>"
+            f'<div class="GamePage"><h1>{title}</h1>'
+            f'<iframe class="PlayFrame" src="/embed/{game.slug}" width="800" height="600"></iframe>'
+            f'<img alt="{title} Thumbnail" src="/assets/{game.slug}/thumbnail.png"/>'
+            f'<div class="Flex GPRatingUi__Rating"><button aria-label="Game Rating" type="button">'
+            f'<span><span>{rating}</span></span></button></div>'
+            f'<div class="Flex GamePage__Game__RatingStats">{data["votes"]}<br/>Ratings</div>'
+            f'<a class="CategoryTag" href="/{game.genre}-games"><span class="CategoryTag__Label">'
+            f'<span>{html.escape(game.genre_name)}</span></span></a>'
+            f'<div class="GamePage__Tags">{tags}</div>'
+            f'<div class="Block GPDescription__GameMeta">'
+            f'<div><strong>Release Date</strong><span>{data["released"]}</span></div>'
+            f'<div><strong>Developer</strong><span>{html.escape(data["developer"])}</span></div></div>'
+            f'<div class="Content"><h4>Game Description</h4><div><p>{html.escape(data["description"])}</p></div>'
+            f'<h4>Instructions</h4><p>{html.escape(data["instructions"])}</p>'
+            + (f'<h4>{title} Gameplay</h4><div><video><source src="{video}" type="video/mp4"/></video></div>'
+               if video else "")
+            + f'</div><div class="GameReviews">{reviews}</div></div>'
+            f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>'
+            "</body></html>")
+
+
+class SimulatorRequestHandler(BaseHTTPRequestHandler):
+    simulator = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        simulator = self.simulator
+        delay = simulator.delay()
+        if delay:
+            time.sleep(delay)
+        kind, status, content_type, body = simulator.route(unquote(urlparse(self.path).path))
+        simulator.count(kind, status)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+
+
+def serve(host="127.0.0.1", port=8002, **options):
+    """启动模拟站点，options见SiteSimulator"""
+    simulator = SiteSimulator(**options)
+    SimulatorRequestHandler.simulator = simulator
+    server = ThreadingHTTPServer((host, port), SimulatorRequestHandler)
+    server.daemon_threads = True
+    print(f"模拟站点已启动: http://{host}:{port}/all-games (第 {simulator.catalog.generation} 代, "
+          f"{len(simulator.catalog.games)} 个游戏)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
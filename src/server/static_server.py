@@ -0,0 +1,297 @@
+import hashlib
+import os
+import re
+import sys
+import time
+import logging
+import mimetypes
+import posixpath
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, unquote, parse_qs
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.storage.asset_pack import AssetPack
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+ASSET_PREFIX = "/games/assets/"
+# 只对外提供games/目录，其中爬虫的缓存和状态文件不发布
+SERVED_PREFIX = "/games/"
+PRIVATE_PREFIXES = ("/games/cache/",)
+# 预压缩版本，按优先顺序协商
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_SUFFIXES = (".json", ".html", ".js", ".css")
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("video/mp4", ".mp4")
+mimetypes.add_type("application/json", ".json")
+
+
+class HashCache:
+    """按(路径, 大小, 修改时间)缓存文件的MD5，文件变化后自动失效"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, stat) -> str:
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._entries.get(key)
+            if digest:
+                self._entries.move_to_end(key)
+                return digest
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(chunk)
+        digest = md5.hexdigest()
+        with self._lock:
+            self._entries[key] = digest
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return digest
+
+
+class StaticFile:
+    """一次响应要发送的文件区域：文件路径、文件内偏移量、长度及响应头信息"""
+
+    __slots__ = ("path", "offset", "length", "etag", "mtime", "content_type", "encoding")
+
+    def __init__(self, path, offset, length, etag, mtime, content_type, encoding=None):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.etag = etag
+        self.mtime = mtime
+        self.content_type = content_type
+        self.encoding = encoding
+
+
+class StaticRequestHandler(BaseHTTPRequestHandler):
+    """
+    静态文件服务:
+    - Range请求返回206，支持If-Range
+    - 由资源MD5生成强ETag，支持If-None-Match返回304
+    - 游戏资源带内容版本(?v=<MD5>)时按不可变资源长期缓存，否则缓存一天，元数据每次协商
+    - JSON/HTML存在.br/.gz预压缩版本时按Accept-Encoding返回
+    - 文件内容通过sendfile发送，资源目录中没有的文件从资源包(games/packs)读取
+    - 只提供games/下的文件(不含games/cache和隐藏文件)，其余路径返回404
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "GameStatic/1.0"
+
+    root = "."
+    dev = False
+    pack = None
+    hashes = HashCache()
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    # ---- 定位文件 ----
+
+    def _resolve(self, url_path: str):
+        """把URL路径转换为根目录下的文件路径，不在games/下、指向隐藏文件或越出根目录时返回None"""
+        path = posixpath.normpath(unquote(url_path))
+        if not (path + "/").startswith(SERVED_PREFIX) or (path + "/").startswith(PRIVATE_PREFIXES):
+            return None
+        if any(part.startswith(".") for part in path.split("/")):
+            return None
+        full_path = os.path.join(self.root, *[part for part in path.split("/") if part])
+        if os.path.isdir(full_path):
+            full_path = os.path.join(full_path, "index.html")
+        return full_path
+
+    def _find(self, url_path: str):
+        """查找要发送的文件，优先使用客户端可接受的预压缩版本"""
+        full_path = self._resolve(url_path)
+        if full_path is None:
+            return None
+        content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/json":
+            content_type += "; charset=utf-8"
+
+        if os.path.isfile(full_path):
+            stat = os.stat(full_path)
+            if full_path.endswith(COMPRESSIBLE_SUFFIXES):
+                accepted = self._accepted_encodings()
+                for encoding, suffix in ENCODINGS:
+                    if encoding not in accepted:
+                        continue
+                    try:
+                        variant = os.stat(full_path + suffix)
+                    except FileNotFoundError:
+                        continue
+                    # 原文件比预压缩版本新时说明预压缩版本已过期
+                    if variant.st_mtime >= stat.st_mtime:
+                        digest = self.hashes.get(full_path + suffix, variant)
+                        return StaticFile(full_path + suffix, 0, variant.st_size, f'"{digest}-{encoding}"',
+                                          variant.st_mtime, content_type, encoding)
+            digest = self.hashes.get(full_path, stat)
+            return StaticFile(full_path, 0, stat.st_size, f'"{digest}"', stat.st_mtime, content_type)
+
+        if self.pack is not None and url_path.startswith(ASSET_PREFIX):
+            key = unquote(url_path[len(ASSET_PREFIX):])
+            entry = self.pack.stat(key)
+            if entry:
+                segment_path, offset, length = self.pack.locate(key)
+                return StaticFile(segment_path, offset, length, f'"{entry.md5}"',
+                                  entry.mtime or time.time(), content_type)
+        return None
+
+    def _accepted_encodings(self):
+        header = self.headers.get("Accept-Encoding", "")
+        accepted = set()
+        for part in header.split(","):
+            name, _, params = part.strip().partition(";")
+            quality = params.strip().replace(" ", "")
+            if quality.startswith("q="):
+                try:
+                    if float(quality[2:]) <= 0:
+                        continue
+                except ValueError:
+                    continue
+            accepted.add(name.strip().lower())
+        return accepted
+
+    # ---- 响应 ----
+
+    def _cache_control(self, url_path: str, query: str, static: StaticFile) -> str:
+        if self.dev:
+            return "no-cache"
+        if url_path.startswith(ASSET_PREFIX):
+            # 分页索引和静态页面引用的资源URL带内容MD5(?v=)，与当前内容一致时URL对应的内容永不改变；
+            # 不带版本或版本已过期时资源仍可能被重新下载替换，过期后通过ETag重新验证
+            if parse_qs(query).get("v") == [static.etag.strip('"')]:
+                return "public, max-age=31536000, immutable"
+            return "public, max-age=86400"
+        return "no-cache"
+
+    def _parse_range(self, header: str, length: int):
+        """
+        解析单个字节范围，返回(起始, 结束)闭区间；不支持的格式返回None(按完整内容响应)，
+        无法满足时返回False
+        """
+        match = RANGE_PATTERN.match(header.strip())
+        if not match:
+            return None
+        first, last = match.groups()
+        if not first and not last:
+            return None
+        if not first:
+            suffix = int(last)
+            if suffix == 0:
+                return False
+            return max(0, length - suffix), length - 1
+        start = int(first)
+        end = min(int(last), length - 1) if last else length - 1
+        if start >= length or start > end:
+            return False
+        return start, end
+
+    def _serve(self, send_body: bool):
+        parsed = urlparse(self.path)
+        static = self._find(parsed.path)
+        if static is None:
+            self._send_error(404, "Not Found")
+            return
+
+        common = {
+            "ETag": static.etag,
+            "Last-Modified": formatdate(static.mtime, usegmt=True),
+            "Cache-Control": self._cache_control(parsed.path, parsed.query, static),
+        }
+        if parsed.path.endswith(COMPRESSIBLE_SUFFIXES):
+            common["Vary"] = "Accept-Encoding"
+        if static.encoding:
+            common["Content-Encoding"] = static.encoding
+        else:
+            common["Accept-Ranges"] = "bytes"
+
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match and (if_none_match.strip() == "*" or static.etag in
+                              [tag.strip() for tag in if_none_match.split(",")]):
+            self._send_headers(304, common)
+            return
+
+        status, start, length = 200, 0, static.length
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and not static.encoding and (not if_range or if_range.strip() == static.etag):
+            byte_range = self._parse_range(range_header, static.length)
+            if byte_range is False:
+                self._send_headers(416, dict(common, **{"Content-Range": f"bytes */{static.length}",
+                                                        "Content-Length": "0"}))
+                return
+            if byte_range:
+                start, end = byte_range
+                status, length = 206, end - start + 1
+                common["Content-Range"] = f"bytes {start}-{end}/{static.length}"
+
+        common["Content-Type"] = static.content_type
+        common["Content-Length"] = str(length)
+        self._send_headers(status, common)
+        if send_body and length:
+            self._sendfile(static.path, static.offset + start, length)
+
+    def _send_headers(self, status: int, headers: dict):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status == 304:
+            self.send_header("Content-Length", "0")
+        self.end_headers()
+        self.wfile.flush()
+
+    def _sendfile(self, path: str, offset: int, count: int):
+        """使用sendfile发送文件区域，平台不支持时socket.sendfile会退回普通读写"""
+        try:
+            with open(path, "rb") as f:
+                self.connection.sendfile(f, offset, count)
+        except (BrokenPipeError, ConnectionResetError):
+            # 播放器拖动进度条时经常主动断开连接
+            self.close_connection = True
+
+    def _send_error(self, status: int, message: str):
+        body = message.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+
+
+def serve(host="127.0.0.1", port=8000, root=".", dev=False, pack_dir="games/packs"):
+    """
+    启动静态文件服务
+    :param root: 站点根目录(包含games/的目录)，只有其中的games/会对外提供
+    :param dev: 开发模式，所有响应都要求客户端重新验证
+    :param pack_dir: 资源包目录，存在时资源目录中找不到的文件从资源包读取
+    """
+    StaticRequestHandler.root = os.path.abspath(root)
+    StaticRequestHandler.dev = dev
+    pack_path = os.path.join(root, pack_dir)
+    if os.path.exists(os.path.join(pack_path, "index.log")):
+        StaticRequestHandler.pack = AssetPack(pack_path)
+
+    server = ThreadingHTTPServer((host, port), StaticRequestHandler)
+    server.daemon_threads = True
+    print(f"静态文件服务已启动: http://{host}:{port}/games/test.html ({'开发' if dev else '生产'}模式)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if StaticRequestHandler.pack is not None:
+            StaticRequestHandler.pack.close()
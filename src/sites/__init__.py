@@ -0,0 +1,13 @@
+from src.sites.base import SiteAdapter, RateLimitProfile, RateLimiter, extract_detail_page
+from src.sites.addictinggames import AddictingGamesAdapter
+
+SITE_ADAPTERS = {
+    AddictingGamesAdapter.name: AddictingGamesAdapter,
+}
+
+
+def create_adapter(name: str, **kwargs) -> SiteAdapter:
+    """按站点名创建适配器"""
+    if name not in SITE_ADAPTERS:
+        raise ValueError(f"未知的站点: {name}，可选: {', '.join(SITE_ADAPTERS)}")
+    return SITE_ADAPTERS[name](**kwargs)
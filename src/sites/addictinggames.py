@@ -0,0 +1,216 @@
+import json
+import time
+from typing import Dict, List
+
+from src.models.game import GameStats, GameComments, Comment
+from src.sites.base import SiteAdapter, RateLimitProfile
+from src.utils.parser import stats_from_page_props
+
+
+class AddictingGamesAdapter(SiteAdapter):
+    """
+    addictinggames.com
+
+    列表页 /all-games 为无限滚动的 .Listed__Game 卡片；详情页是Next.js页面，
+    嵌入地址、预览视频和浏览量在 __NEXT_DATA__ 中，其余信息从页面元素解析。
+    游戏ID不加前缀，沿用原有的 games/metadata/<游戏ID>/ 目录。
+    """
+
+    name = "addictinggames"
+    base_url = "https://www.addictinggames.com"
+    listing_path = "/all-games"
+    namespace = None
+    rate_limit = RateLimitProfile(requests_per_second=2.0, burst=5, max_concurrency=5)
+    detail_ready_selector = ".Content h4, .GamePage__Tags, iframe.PlayFrame"
+
+    CARD_SELECTOR = "div.Listed__Game a.Listed__Game__Inner"
+    SCROLL_MAX_NO_CHANGE = 3  # 连续3次没有新内容就认为加载完成
+
+    # ---- 列表 ----
+
+    def discover(self, driver) -> List[Dict]:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        with self.limiter.slot():
+            driver.get(self.listing_url)
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, "Listed__Game")))
+        self.scroll_to_load_all_games(driver)
+        return self.parse_listing(driver.page_source)
+
+    def parse_listing(self, html: str) -> List[Dict]:
+        """解析列表页中的游戏卡片"""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        games = []
+        for element in soup.select(self.CARD_SELECTOR):
+            try:
+                title = element.text.strip()
+                url = self.absolute_url(element.get('href', ''))
+                if not title or not url:
+                    continue
+                games.append({"title": title, "url": url, "id": self.game_id(title), "site": self.name})
+            except Exception as e:
+                self.logger.error(f"解析游戏元素时出错: {str(e)}")
+        return games
+
+    def scroll_to_load_all_games(self, driver):
+        """滚动页面加载所有游戏"""
+        from selenium.webdriver.common.by import By
+        from tqdm import tqdm
+
+        last_height = driver.execute_script("return document.body.scrollHeight")
+        games_count = 0
+        no_change_count = 0
+
+        pbar = tqdm(desc=f"加载游戏列表({self.name})", unit="个")
+        while True:
+            # 滚动到页面底部
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+
+            try:
+                # 如果游戏数量没有变化，等待新游戏加载或超时
+                current_count = len(driver.find_elements(By.CSS_SELECTOR, '.Listed__Game'))
+                if current_count == games_count:
+                    start_time = time.time()
+                    while time.time() - start_time < 3:  # 最多等待3秒
+                        if len(driver.find_elements(By.CSS_SELECTOR, '.Listed__Game')) > current_count:
+                            break
+                        # 短暂等待，避免过度消耗CPU
+                        time.sleep(0.2)
+            except Exception as e:
+                self.logger.debug(f"等待新游戏加载时出错: {str(e)}")
+
+            current_games = len(driver.find_elements(By.CSS_SELECTOR, '.Listed__Game'))
+            if current_games > games_count:
+                pbar.update(current_games - games_count)
+                games_count = current_games
+                no_change_count = 0
+            else:
+                no_change_count += 1
+
+            if no_change_count >= self.SCROLL_MAX_NO_CHANGE:
+                break
+
+            # 检查新的页面高度
+            new_height = driver.execute_script("return document.body.scrollHeight")
+            if new_height == last_height:
+                no_change_count += 1
+            else:
+                last_height = new_height
+                no_change_count = 0
+
+        pbar.close()
+        self.logger.info(f"页面滚动完成，共加载 {games_count} 个游戏")
+
+    # ---- 详情 ----
+
+    def extract_detail(self, html: str, game_id: str, title: str) -> Dict:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # 嵌入地址、视频和浏览量在Next.js的页面数据中
+        page_props = {}
+        game_data = {}
+        next_data = soup.find('script', {'id': '__NEXT_DATA__'})
+        if next_data and next_data.string:
+            try:
+                page_props = json.loads(next_data.string).get('props', {}).get('pageProps', {})
+                game_data = page_props.get('game', {}) or {}
+            except Exception as e:
+                self.logger.error(f"解析JavaScript数据时出错: {str(e)}")
+        game_url = self.absolute_url(game_data.get('embedUrl', '')) or None
+
+        info = self.new_info(game_id, title, game_url)
+
+        description = soup.select_one('.Content h4:-soup-contains("Game Description") + div p')
+        if description:
+            info.description = description.text.strip()
+
+        category = soup.select_one('.CategoryTag__Label span')
+        if category:
+            info.category = category.text.strip()
+
+        tags = soup.select('.GamePage__Tags a .CategoryTag__Label span')
+        info.tags = [tag.text.strip() for tag in tags if tag.text.strip()]
+
+        # 开发者和发布日期
+        for item in soup.select('.GPDescription__GameMeta div'):
+            label = item.find('strong')
+            if not label:
+                continue
+            label_text = label.text.strip()
+            value = item.text.replace(label_text, '').strip()
+            if 'Developer' in label_text:
+                info.developer = value
+            elif 'Release Date' in label_text:
+                info.addedDate = value
+
+        # 游戏说明作为控制说明
+        instructions = soup.select_one('.Content h4:-soup-contains("Instructions") + p')
+        if instructions:
+            info.controls = instructions.text.strip()
+
+        stats = GameStats(id=game_id, lastUpdated=time.strftime("%Y-%m-%d"))
+        rating_elem = soup.select_one('.GPRatingUi__Rating button span span')
+        if rating_elem:
+            stats.rating = float(rating_elem.text.strip())
+        rating_stats = soup.select_one('.GamePage__Game__RatingStats')
+        if rating_stats:
+            count = rating_stats.text.strip().split('\n')[0]
+            stats.ratingCount = int(count.replace("Ratings", "").strip())
+        # 页面浏览量作为游玩次数
+        if page_props:
+            stats.plays = stats_from_page_props(page_props)["plays"]
+
+        comments = GameComments(id=game_id, lastUpdated=time.strftime("%Y-%m-%d"))
+        for review in soup.select('.GameReview'):
+            try:
+                author = review.select_one('.GameReview__Author a')
+                date = review.select_one('.GameReview__Subject')
+                content = review.select_one('p:not(.GameReview__Subject)')
+                rating = 5 if 'GameReview--positive' in review.get('class', []) else 1
+                if author and date and content:
+                    comments.comments.append(Comment(
+                        id=f"{game_id}_{len(comments.comments)}",
+                        user=author.text.strip(),
+                        content=content.text.strip(),
+                        rating=rating,
+                        date=date.text.strip()
+                    ))
+            except Exception as e:
+                self.logger.error(f"解析评论时出错: {str(e)}")
+
+        return {
+            "info": info.validate(),
+            "stats": stats.validate(),
+            "comments": comments.validate(),
+            "assets": self.resolve_assets(soup, page_props)
+        }
+
+    def resolve_assets(self, soup, page_props: Dict) -> Dict[str, str]:
+        assets = {}
+        thumbnail = soup.select_one('img[alt$="Thumbnail"]')
+        if thumbnail:
+            src = thumbnail.get('src', '')
+            # Next.js图片优化地址，取srcset中分辨率最高的一项
+            if src.startswith('/_next/image'):
+                srcset = thumbnail.get('srcset', '').split(',')
+                if srcset and srcset[-1].strip():
+                    src = srcset[-1].strip().split(' ')[0]
+            if src:
+                assets["thumbnail"] = self.absolute_url(src)
+
+        video_url = (page_props.get('game') or {}).get('videoThumbnailUrl')
+        if not video_url:
+            # 页面数据中没有时，从Gameplay标题下的video标签获取
+            header = soup.find('h4', string=lambda text: bool(text) and text.strip().endswith('Gameplay'))
+            video_div = header.find_next('div') if header else None
+            source = video_div.select_one('video source') if video_div else None
+            video_url = source.get('src') if source else None
+        if video_url:
+            assets["preview"] = self.absolute_url(video_url)
+        return assets
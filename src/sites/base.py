@@ -0,0 +1,152 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from src.models.game import Game
+from src.utils.text import sanitize_id
+
+
+@dataclass
+class RateLimitProfile:
+    """站点的访问频率限制"""
+    requests_per_second: float = 1.0  # 平均每秒请求数
+    burst: int = 3                    # 允许的突发请求数
+    max_concurrency: int = 5          # 同时访问该站点的最大页面数
+
+
+class RateLimiter:
+    """
+    令牌桶限速，同一站点的所有工作线程共用一个实例
+
+    多个站点共用一个浏览器池时，每个站点按自己的频率访问，互不影响。
+    """
+
+    def __init__(self, profile: RateLimitProfile):
+        self.profile = profile
+        self._tokens = float(profile.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, profile.max_concurrency))
+
+    def wait(self):
+        """阻塞直到取得一个令牌"""
+        rate = self.profile.requests_per_second
+        if not rate or rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.profile.burst, self._tokens + (now - self._updated) * rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / rate
+            time.sleep(delay)
+
+    @contextmanager
+    def slot(self):
+        """占用一个并发名额并取得令牌，用于包住一次页面访问"""
+        with self._slots:
+            self.wait()
+            yield
+
+
+class SiteAdapter:
+    """
+    站点适配器接口
+
+    站点相关的全部逻辑都放在适配器中，爬虫本身只负责调度、浏览器池、资源下载和存储:
+    - discover(): 加载列表页，返回游戏列表
+    - extract_detail(): 从详情页HTML中解析info/stats/comments
+    - resolve_assets(): 找出缩略图、预览视频等资源的绝对地址
+    - rate_limit: 访问频率限制
+
+    namespace不为空时游戏ID带 "<namespace>__" 前缀，多个站点的数据共用同一个存储而互不冲突。
+    """
+
+    name = ""
+    base_url = ""
+    listing_path = "/"
+    namespace = None
+    rate_limit = RateLimitProfile()
+    detail_ready_selector = "body"  # 详情页加载完成的标志元素
+
+    def __init__(self, base_url: str = None, rate_limit: RateLimitProfile = None):
+        """
+        :param base_url: 覆盖默认的站点地址，用于镜像站点或本地模拟站点
+        :param rate_limit: 覆盖默认的访问频率限制
+        """
+        if base_url:
+            self.base_url = base_url.rstrip("/")
+        if rate_limit:
+            self.rate_limit = rate_limit
+        self.limiter = RateLimiter(self.rate_limit)
+        self.logger = logging.getLogger(f"{__name__}.{self.name}")
+
+    @property
+    def listing_url(self) -> str:
+        return self.base_url + self.listing_path
+
+    def game_id(self, title: str) -> str:
+        """由游戏标题生成存储中使用的游戏ID"""
+        game_id = sanitize_id(title)
+        return f"{self.namespace}__{game_id}" if self.namespace else game_id
+
+    def absolute_url(self, url: str) -> str:
+        """把站内相对地址转换为绝对地址"""
+        if not url:
+            return url
+        if url.startswith("//"):
+            return "https:" + url
+        if url.startswith("/"):
+            return self.base_url + url
+        return url
+
+    def owns(self, url: str) -> bool:
+        """URL是否属于该站点"""
+        return urlparse(url).netloc == urlparse(self.base_url).netloc
+
+    def discover(self, driver) -> List[Dict]:
+        """
+        加载列表页并返回游戏列表
+        :return: [{"title", "url", "id", "site"}]
+        """
+        raise NotImplementedError
+
+    def extract_detail(self, html: str, game_id: str, title: str) -> Dict:
+        """
+        解析详情页
+        :return: {"info": Game, "stats": GameStats, "comments": GameComments,
+                  "assets": {"thumbnail": url, "preview": url}}，三个记录均已通过校验(不符合时抛出SchemaError)
+        """
+        raise NotImplementedError
+
+    def resolve_assets(self, soup, page_props: Dict) -> Dict[str, str]:
+        """资源类型 -> 资源的绝对地址，没有的资源不返回"""
+        return {}
+
+    def new_info(self, game_id: str, title: str, game_url: str) -> Game:
+        """info.json的默认结构"""
+        return Game(id=game_id, title=title, url=game_url, lastUpdated=time.strftime("%Y-%m-%d"),
+                    gameUrl=game_url, site=self.name)
+
+
+_process_adapters = {}  # 解析进程内按(适配器类, 站点地址)缓存的适配器实例
+
+
+def extract_detail_page(adapter_class, base_url: str, html: str, game_id: str, title: str) -> Dict:
+    """
+    解析详情页的纯函数(HTML进，记录出)，供解析进程池调用
+    适配器带有锁，不能跨进程传递，每个进程按类和站点地址只创建一次
+    :return: 与SiteAdapter.extract_detail相同
+    """
+    key = (adapter_class, base_url)
+    adapter = _process_adapters.get(key)
+    if adapter is None:
+        adapter = _process_adapters[key] = adapter_class(base_url=base_url)
+    return adapter.extract_detail(html, game_id, title)
@@ -0,0 +1,15 @@
+from src.storage.base import CatalogStore, DOCUMENT_KINDS, copy_store
+from src.storage.json_store import JsonTreeStore
+from src.storage.sqlite_store import SqliteStore
+from src.storage.asset_pack import AssetPack, AssetVersions
+
+STORAGE_BACKENDS = ("json", "sqlite")
+
+
+def create_store(backend: str = "json", metadata_dir="games/metadata", db_path="games/catalog.db") -> CatalogStore:
+    """按名称创建元数据存储"""
+    if backend == "json":
+        return JsonTreeStore(metadata_dir)
+    if backend == "sqlite":
+        return SqliteStore(db_path)
+    raise ValueError(f"未知的存储类型: {backend}")
@@ -0,0 +1,474 @@
+import hashlib
+import json
+import mmap
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows下没有fcntl，只保证进程内的写入互斥
+    fcntl = None
+
+
+class PackEntry:
+    """索引中的一条记录：资源在哪个分段的哪个位置"""
+
+    __slots__ = ("segment", "offset", "length", "md5", "mtime")
+
+    def __init__(self, segment: int, offset: int, length: int, md5: str, mtime: float = 0):
+        self.segment = segment
+        self.offset = offset
+        self.length = length
+        self.md5 = md5
+        self.mtime = mtime
+
+    def to_record(self, key: str) -> Dict:
+        return {"k": key, "s": self.segment, "o": self.offset, "n": self.length, "h": self.md5, "m": self.mtime}
+
+
+class AssetPack:
+    """
+    资源打包存储
+
+    把 games/assets/<游戏ID>/ 下的零散文件追加写入少量大分段文件(segment-<编号>.pack)，
+    另有一个只追加的索引日志(index.log)，每行记录 资源路径 -> (分段, 偏移量, 长度, MD5)。
+    内容相同的资源只保存一份；资源更新后旧内容成为无用数据，由compact()清理。
+    读取时通过mmap按字节范围直接返回分段中的数据，不需要逐个打开文件。
+    """
+
+    SEGMENT_PREFIX = "segment-"
+    SEGMENT_SUFFIX = ".pack"
+
+    def __init__(self, pack_dir="games/packs", max_segment_bytes=256 * 1024 * 1024, refresh_interval=1.0):
+        """
+        :param pack_dir: 打包目录
+        :param max_segment_bytes: 单个分段文件的大小上限
+        :param refresh_interval: 读取时检查索引是否被其他进程更新的最小间隔(秒)
+        """
+        self.pack_dir = pack_dir
+        self.max_segment_bytes = max_segment_bytes
+        self.refresh_interval = refresh_interval
+        self.index_file = os.path.join(pack_dir, "index.log")
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._maps = {}          # 分段编号 -> (mmap, 映射长度)
+        self._reset()
+        self.refresh()
+
+    def _reset(self):
+        self.entries = {}        # 资源路径 -> PackEntry
+        self.by_hash = {}        # MD5 -> PackEntry，用于内容去重
+        self._index_inode = None
+        self._index_size = 0
+        self._checked_at = 0
+
+    # ---- 索引 ----
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.pack_dir, f"{self.SEGMENT_PREFIX}{segment:06d}{self.SEGMENT_SUFFIX}")
+
+    def segments(self):
+        """已有的分段编号，升序"""
+        if not os.path.isdir(self.pack_dir):
+            return []
+        result = []
+        for name in os.listdir(self.pack_dir):
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.SEGMENT_SUFFIX):
+                number = name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]
+                if number.isdigit():
+                    result.append(int(number))
+        return sorted(result)
+
+    def _apply(self, record: Dict):
+        key = record["k"]
+        if record.get("d"):
+            self.entries.pop(key, None)
+            return
+        entry = PackEntry(record["s"], record["o"], record["n"], record["h"], record.get("m", 0))
+        self.entries[key] = entry
+        self.by_hash[entry.md5] = entry
+
+    def refresh(self):
+        """
+        重新读取索引日志：文件被compact替换时全量重读，只是追加了新记录时只读新增部分
+        """
+        with self._lock:
+            self._checked_at = time.time()
+            try:
+                stat = os.stat(self.index_file)
+            except FileNotFoundError:
+                if self._index_inode is not None:
+                    self._reset()
+                return
+            if stat.st_ino != self._index_inode or stat.st_size < self._index_size:
+                self._reset()
+                self._close_maps()
+            if stat.st_size == self._index_size:
+                return
+            with open(self.index_file, "rb") as f:
+                f.seek(self._index_size)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # 写入中的半行，下次再读
+                    self._index_size += len(line)
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError):
+                        self.logger.warning(f"跳过损坏的索引记录: {line[:100]!r}")
+            self._index_inode = stat.st_ino
+
+    def _maybe_refresh(self):
+        if time.time() - self._checked_at >= self.refresh_interval:
+            self.refresh()
+
+    # ---- 写入 ----
+
+    @contextmanager
+    def _writer(self):
+        """写入期间持有进程内锁和跨进程文件锁"""
+        with self._lock:
+            os.makedirs(self.pack_dir, exist_ok=True)
+            lock_file = open(os.path.join(self.pack_dir, ".lock"), "a")
+            try:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self.refresh()
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+    def _append_blob(self, data: bytes) -> Tuple[int, int]:
+        """在最后一个分段末尾追加数据，超过大小上限时开始新分段，返回(分段编号, 偏移量)"""
+        segments = self.segments()
+        segment = segments[-1] if segments else 0
+        path = self._segment_path(segment)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size and size + len(data) > self.max_segment_bytes:
+            segment, size = segment + 1, 0
+            path = self._segment_path(segment)
+        with open(path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return segment, size
+
+    def _append_index(self, records):
+        lines = b"".join((json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8") for record in records)
+        with open(self.index_file, "ab") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self.refresh()
+
+    def _store(self, key: str, data: bytes, mtime: float = 0) -> Dict:
+        """在持有写锁时保存一个资源，返回待写入索引的记录；内容未变化时返回None"""
+        md5 = hashlib.md5(data).hexdigest()
+        current = self.entries.get(key)
+        if current and current.md5 == md5:
+            if current.mtime == mtime:
+                return None
+            return dict(current.to_record(key), m=mtime)
+        existing = self.by_hash.get(md5)
+        if existing and existing.length == len(data):
+            segment, offset = existing.segment, existing.offset
+        else:
+            segment, offset = self._append_blob(data)
+        return PackEntry(segment, offset, len(data), md5, mtime).to_record(key)
+
+    def put(self, key: str, data: bytes, mtime: float = 0) -> bool:
+        """
+        写入一个资源
+        :param key: 资源路径，如 "10_mahjong/thumbnail.jpg"
+        :return: 内容是否有变化
+        """
+        with self._writer():
+            record = self._store(key, data, mtime)
+            if record:
+                self._append_index([record])
+            return record is not None
+
+    def delete(self, key: str):
+        with self._writer():
+            if key in self.entries:
+                self._append_index([{"k": key, "d": 1}])
+
+    def pack_directory(self, assets_dir="games/assets", prune=True) -> Dict:
+        """
+        把零散资源目录同步到打包存储，大小和修改时间未变的文件直接跳过
+        :param assets_dir: 资源根目录
+        :param prune: 是否从索引中删除目录中已不存在的资源
+        :return: 统计数据
+        """
+        counters = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+        with self._writer():
+            records = []
+            for root, _, files in os.walk(assets_dir):
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    key = os.path.relpath(path, assets_dir).replace(os.sep, "/")
+                    seen.add(key)
+                    stat = os.stat(path)
+                    current = self.entries.get(key)
+                    if current and current.length == stat.st_size and current.mtime == stat.st_mtime:
+                        counters["unchanged"] += 1
+                        continue
+                    with open(path, "rb") as f:
+                        record = self._store(key, f.read(), stat.st_mtime)
+                    if record:
+                        records.append(record)
+                        # 同一批次内的相同内容也要能去重
+                        self._apply(record)
+                        counters["updated" if current else "added"] += 1
+                    else:
+                        counters["unchanged"] += 1
+            if prune:
+                for key in set(self.entries) - seen:
+                    records.append({"k": key, "d": 1})
+                    counters["removed"] += 1
+            if records:
+                self._append_index(records)
+        return counters
+
+    # ---- 读取 ----
+
+    def __contains__(self, key: str) -> bool:
+        self._maybe_refresh()
+        return key in self.entries
+
+    def keys(self):
+        self._maybe_refresh()
+        return sorted(self.entries)
+
+    def stat(self, key: str) -> Optional[PackEntry]:
+        """资源的索引记录，不存在时返回None"""
+        self._maybe_refresh()
+        return self.entries.get(key)
+
+    def locate(self, key: str) -> Optional[Tuple[str, int, int]]:
+        """资源所在的(分段文件路径, 偏移量, 长度)，可用于os.sendfile"""
+        entry = self.stat(key)
+        if not entry:
+            return None
+        return self._segment_path(entry.segment), entry.offset, entry.length
+
+    def _map(self, segment: int, needed: int) -> mmap.mmap:
+        """分段文件的只读映射，分段被追加后映射长度不够时重新映射"""
+        mapped = self._maps.get(segment)
+        if mapped and mapped[1] >= needed:
+            return mapped[0]
+        with open(self._segment_path(segment), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < needed:
+                raise IOError(f"分段文件被截断: {self._segment_path(segment)}")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[segment] = (mm, size)
+        return mm
+
+    def read_range(self, key: str, start: int = 0, end: int = None) -> Optional[memoryview]:
+        """
+        读取资源的字节范围[start, end)，返回分段映射上的memoryview，不复制数据
+        :return: 资源不存在时返回None
+        """
+        entry = self.stat(key)
+        if not entry:
+            return None
+        end = entry.length if end is None else min(end, entry.length)
+        start = max(0, min(start, end))
+        with self._lock:
+            mm = self._map(entry.segment, entry.offset + entry.length)
+        return memoryview(mm)[entry.offset + start:entry.offset + end]
+
+    def read(self, key: str) -> Optional[bytes]:
+        view = self.read_range(key)
+        return bytes(view) if view is not None else None
+
+    def _close_maps(self):
+        for mm, _ in self._maps.values():
+            try:
+                mm.close()
+            except BufferError:
+                pass  # 仍有memoryview引用时交给垃圾回收
+        self._maps = {}
+
+    def close(self):
+        with self._lock:
+            self._close_maps()
+
+    # ---- 维护 ----
+
+    def garbage_bytes(self) -> int:
+        """分段文件中不再被引用的字节数"""
+        live = {(entry.segment, entry.offset): entry.length for entry in self.entries.values()}
+        total = sum(os.path.getsize(self._segment_path(segment)) for segment in self.segments())
+        return total - sum(live.values())
+
+    def compact(self) -> Dict:
+        """
+        只保留仍被引用的内容，按资源路径顺序重写到新的分段中，然后替换索引并删除旧分段
+        :return: 统计数据
+        """
+        with self._writer():
+            old_segments = self.segments()
+            before = sum(os.path.getsize(self._segment_path(segment)) for segment in old_segments)
+            next_segment = (old_segments[-1] + 1) if old_segments else 0
+
+            moved = {}  # (旧分段, 旧偏移量) -> (新分段, 新偏移量)
+            records = []
+            segment, size = next_segment, 0
+            out = None
+            try:
+                for key in sorted(self.entries):
+                    entry = self.entries[key]
+                    location = (entry.segment, entry.offset)
+                    if location not in moved:
+                        if out is None or (size and size + entry.length > self.max_segment_bytes):
+                            if out is not None:
+                                out.close()
+                                segment, size = segment + 1, 0
+                            out = open(self._segment_path(segment), "wb")
+                        out.write(self._map(entry.segment, entry.offset + entry.length)
+                                  [entry.offset:entry.offset + entry.length])
+                        moved[location] = (segment, size)
+                        size += entry.length
+                    new_segment, new_offset = moved[location]
+                    records.append(PackEntry(new_segment, new_offset, entry.length, entry.md5,
+                                             entry.mtime).to_record(key))
+                if out is not None:
+                    out.flush()
+                    os.fsync(out.fileno())
+            finally:
+                if out is not None:
+                    out.close()
+
+            tmp_path = self.index_file + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.index_file)
+
+            self._close_maps()
+            for old in old_segments:
+                os.remove(self._segment_path(old))
+            self.refresh()
+            after = sum(os.path.getsize(self._segment_path(s)) for s in self.segments())
+        self.logger.info(f"资源包已压缩: {before} -> {after} 字节")
+        return {"before": before, "after": after, "assets": len(records)}
+
+    def export(self, output_dir="games/assets") -> int:
+        """
+        把打包存储还原为零散文件，内容相同的已有文件不重写
+        :return: 写入的文件数
+        """
+        written = 0
+        for key in self.keys():
+            entry = self.entries[key]
+            path = os.path.join(output_dir, *key.split("/"))
+            if os.path.exists(path) and os.path.getsize(path) == entry.length \
+                    and _file_md5(path) == entry.md5:
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self.read_range(key))
+            os.replace(tmp_path, path)
+            if entry.mtime:
+                os.utime(path, (entry.mtime, entry.mtime))
+            written += 1
+        return written
+
+
+class AssetVersions:
+    """
+    资源URL的内容版本
+
+    把 /games/assets/<路径> 转换为 /games/assets/<路径>?v=<内容MD5>，生成的分页索引和静态页面使用带版本的URL，
+    静态文件服务对版本与当前内容一致的请求返回不可变的长期缓存头，资源更新后URL随之变化。
+    零散文件的MD5按(大小, 修改时间)缓存在cache_file中，只存在于资源包中的资源直接使用包索引中的MD5。
+    """
+
+    URL_PREFIX = "/games/assets/"
+
+    def __init__(self, assets_dir="games/assets", pack_dir="games/packs",
+                 cache_file="games/cache/asset_versions.json"):
+        """
+        :param assets_dir: 资源根目录
+        :param pack_dir: 资源包目录，存在索引时使用其中的MD5
+        :param cache_file: 零散文件MD5的缓存文件
+        """
+        self.assets_dir = assets_dir
+        self.pack_dir = pack_dir
+        self.cache_file = cache_file
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._cache = None       # 资源路径 -> [大小, 修改时间(ns), MD5]
+        self._dirty = False
+        self._pack = None
+
+    def _load(self):
+        if self._cache is not None:
+            return
+        self._cache = {}
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    self._cache = json.load(f)
+            except Exception as e:
+                self.logger.warning(f"读取资源版本缓存失败: {str(e)}")
+        if os.path.exists(os.path.join(self.pack_dir, "index.log")):
+            self._pack = AssetPack(self.pack_dir)
+
+    def version(self, key: str) -> Optional[str]:
+        """资源(相对于资源根目录的路径)的内容MD5，资源不存在时返回None"""
+        path = os.path.join(self.assets_dir, *key.split("/"))
+        with self._lock:
+            self._load()
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                entry = self._pack.stat(key) if self._pack is not None else None
+                return entry.md5 if entry else None
+            cached = self._cache.get(key)
+            if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                return cached[2]
+        digest = _file_md5(path)
+        with self._lock:
+            self._cache[key] = [stat.st_size, stat.st_mtime_ns, digest]
+            self._dirty = True
+        return digest
+
+    def url(self, url: str) -> str:
+        """返回带内容版本的资源URL，不是本地资源或资源不存在时原样返回"""
+        if not url or not url.startswith(self.URL_PREFIX) or "?" in url:
+            return url
+        digest = self.version(url[len(self.URL_PREFIX):])
+        return f"{url}?v={digest}" if digest else url
+
+    def save(self):
+        """把新计算的MD5写回缓存文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._cache, separators=(",", ":"))
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        tmp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.cache_file)
+
+
+def _file_md5(path: str) -> str:
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
@@ -0,0 +1,98 @@
+import hashlib
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.models.game import dumps
+
+# 每个游戏保存的文档类型，对应JSON目录结构中的 <类型>.json
+DOCUMENT_KINDS = ("info", "game", "stats", "comments")
+
+
+class CatalogStore:
+    """
+    游戏元数据存储接口
+
+    每个游戏有若干类型的JSON文档(见DOCUMENT_KINDS)，
+    不同实现只决定文档的落盘方式，调用方读写的数据格式完全相同。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__module__)
+
+    def get(self, game_id: str, kind: str) -> Optional[Dict]:
+        """读取文档，不存在时返回None"""
+        raise NotImplementedError
+
+    def put(self, game_id: str, kind: str, data: Dict):
+        """写入文档，data可以是字典或src.models中的记录(Game、GameStats等)"""
+        raise NotImplementedError
+
+    def put_many(self, documents):
+        """批量写入[(游戏ID, 类型, 文档)]"""
+        for game_id, kind, data in documents:
+            self.put(game_id, kind, data)
+
+    def exists(self, game_id: str, kind: str = "info") -> bool:
+        return self.get(game_id, kind) is not None
+
+    def delete(self, game_id: str):
+        """删除游戏的全部文档"""
+        raise NotImplementedError
+
+    def game_ids(self) -> List[str]:
+        """全部游戏ID，按ID排序"""
+        raise NotImplementedError
+
+    def scan(self, kind: str) -> Iterator[Tuple[str, Dict]]:
+        """按游戏ID顺序遍历某一类型的全部文档，产出(游戏ID, 文档)"""
+        for game_id in self.game_ids():
+            data = self.get(game_id, kind)
+            if data is not None:
+                yield game_id, data
+
+    def versions(self, game_id: str) -> Dict[str, str]:
+        """
+        游戏各文档的版本标识(类型 -> 标识)，文档内容变化时标识随之变化，用于判断缓存的检查结果是否过期
+        默认实现为文档内容的MD5
+        """
+        result = {}
+        for kind in DOCUMENT_KINDS:
+            data = self.get(game_id, kind)
+            if data is not None:
+                result[kind] = hashlib.md5(dumps(data).encode("utf-8")).hexdigest()
+        return result
+
+    def search(self, text: str, limit: int = 50) -> List[str]:
+        """按标题、描述和评论全文检索，返回游戏ID列表"""
+        text = text.lower()
+        result = []
+        for game_id, info in self.scan("info"):
+            haystack = f"{info.get('title', '')} {info.get('description', '')}".lower()
+            if text in haystack:
+                result.append(game_id)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def close(self):
+        pass
+
+
+def copy_store(source: CatalogStore, target: CatalogStore, kinds=DOCUMENT_KINDS, batch_size=500) -> int:
+    """
+    把source中的全部文档复制到target，用于JSON目录与SQLite之间的导入导出
+    :return: 复制的文档数量
+    """
+    copied = 0
+    batch = []
+    for kind in kinds:
+        for game_id, data in source.scan(kind):
+            batch.append((game_id, kind, data))
+            if len(batch) >= batch_size:
+                target.put_many(batch)
+                copied += len(batch)
+                batch = []
+    if batch:
+        target.put_many(batch)
+        copied += len(batch)
+    return copied
@@ -0,0 +1,79 @@
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.models.game import dumps, loads
+from src.storage.base import CatalogStore, DOCUMENT_KINDS
+
+
+class JsonTreeStore(CatalogStore):
+    """
+    JSON目录存储(默认)
+
+    games/metadata/<游戏ID>/<类型>.json，与前端直接读取的目录结构一致。
+    """
+
+    def __init__(self, metadata_dir="games/metadata"):
+        super().__init__()
+        self.metadata_dir = metadata_dir
+
+    def _path(self, game_id: str, kind: str) -> str:
+        return os.path.join(self.metadata_dir, game_id, f"{kind}.json")
+
+    def get(self, game_id: str, kind: str) -> Optional[Dict]:
+        path = self._path(game_id, kind)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return loads(f.read())
+        except Exception as e:
+            self.logger.warning(f"读取文档失败: {path} - {str(e)}")
+            return None
+
+    def put(self, game_id: str, kind: str, data: Dict):
+        path = self._path(game_id, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先完整序列化，再写入临时文件后替换，中断时或并发读取时不会看到被截断的文档
+        text = dumps(data, indent=True)
+        tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def exists(self, game_id: str, kind: str = "info") -> bool:
+        return os.path.exists(self._path(game_id, kind))
+
+    def versions(self, game_id: str) -> Dict[str, str]:
+        """文件的大小和修改时间，不读取内容；无法解析的文件也有标识"""
+        result = {}
+        for kind in DOCUMENT_KINDS:
+            try:
+                stat = os.stat(self._path(game_id, kind))
+            except FileNotFoundError:
+                continue
+            result[kind] = f"{stat.st_size}:{stat.st_mtime_ns}"
+        return result
+
+    def delete(self, game_id: str):
+        for kind in DOCUMENT_KINDS:
+            path = self._path(game_id, kind)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def game_ids(self) -> List[str]:
+        if not os.path.isdir(self.metadata_dir):
+            return []
+        return sorted(name for name in os.listdir(self.metadata_dir)
+                      if os.path.isdir(os.path.join(self.metadata_dir, name)))
+
+    def scan(self, kind: str) -> Iterator[Tuple[str, Dict]]:
+        for game_id in self.game_ids():
+            if os.path.exists(self._path(game_id, kind)):
+                data = self.get(game_id, kind)
+                if data is not None:
+                    yield game_id, data
@@ -0,0 +1,148 @@
+import os
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.models.game import dumps, loads
+from src.storage.base import CatalogStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    game_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL DEFAULT (julianday('now')),
+    PRIMARY KEY (game_id, kind)
+) WITHOUT ROWID;
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+    game_id UNINDEXED, title, description, comments, tokenize='unicode61'
+);
+"""
+
+
+class SqliteStore(CatalogStore):
+    """
+    SQLite存储
+
+    全部文档保存在一个数据库文件中，整库扫描是一次顺序读取。
+    标题、描述和评论内容同步写入FTS5全文索引(SQLite未编译FTS5时退化为逐条匹配)。
+    """
+
+    def __init__(self, db_path="games/catalog.db"):
+        super().__init__()
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._connections = []  # 所有线程打开的连接，close()时统一关闭
+        self._connections_lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError as e:
+            self.logger.warning(f"SQLite不支持FTS5，全文检索将逐条匹配: {str(e)}")
+            self.has_fts = False
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """每个线程使用独立连接，已被close()关闭的连接会重新打开"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            with self._connections_lock:
+                if conn in self._connections:
+                    return conn
+        # 允许close()在其他线程关闭本连接，连接本身仍只由所属线程使用
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._connections_lock:
+            self._connections.append(conn)
+        self._local.conn = conn
+        return conn
+
+    def get(self, game_id: str, kind: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT data FROM documents WHERE game_id = ? AND kind = ?", (game_id, kind)).fetchone()
+        return loads(row[0]) if row else None
+
+    def put(self, game_id: str, kind: str, data: Dict):
+        self.put_many([(game_id, kind, data)])
+
+    def put_many(self, documents):
+        """在一个事务中写入多个文档"""
+        conn = self._conn()
+        with self._write_lock:
+            for game_id, kind, data in documents:
+                conn.execute(
+                    "INSERT INTO documents (game_id, kind, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT(game_id, kind) DO UPDATE SET data = excluded.data, updated_at = julianday('now')",
+                    (game_id, kind, dumps(data)))
+                if self.has_fts and kind in ("info", "comments"):
+                    self._update_fts(conn, game_id, kind, data)
+            conn.commit()
+
+    def _update_fts(self, conn, game_id: str, kind: str, data: Dict):
+        """更新全文索引中该游戏的一行，需在写锁内调用"""
+        row = conn.execute("SELECT title, description, comments FROM search WHERE game_id = ?",
+                           (game_id,)).fetchone()
+        title, description, comments = row if row else ("", "", "")
+        if kind == "info":
+            title, description = data.get("title", ""), data.get("description", "")
+        else:
+            comments = "\n".join(comment.get("content", "") for comment in data.get("comments", []))
+        conn.execute("DELETE FROM search WHERE game_id = ?", (game_id,))
+        conn.execute("INSERT INTO search (game_id, title, description, comments) VALUES (?, ?, ?, ?)",
+                     (game_id, title, description, comments))
+
+    def exists(self, game_id: str, kind: str = "info") -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM documents WHERE game_id = ? AND kind = ?", (game_id, kind)).fetchone() is not None
+
+    def versions(self, game_id: str) -> Dict[str, str]:
+        """一次查询取出游戏的全部文档，按存储的JSON文本计算MD5，不解析JSON"""
+        rows = self._conn().execute("SELECT kind, data FROM documents WHERE game_id = ?", (game_id,))
+        return {kind: hashlib.md5(data.encode("utf-8")).hexdigest() for kind, data in rows}
+
+    def delete(self, game_id: str):
+        conn = self._conn()
+        with self._write_lock:
+            conn.execute("DELETE FROM documents WHERE game_id = ?", (game_id,))
+            if self.has_fts:
+                conn.execute("DELETE FROM search WHERE game_id = ?", (game_id,))
+            conn.commit()
+
+    def game_ids(self) -> List[str]:
+        return [row[0] for row in self._conn().execute(
+            "SELECT DISTINCT game_id FROM documents ORDER BY game_id")]
+
+    def scan(self, kind: str) -> Iterator[Tuple[str, Dict]]:
+        cursor = self._conn().execute(
+            "SELECT game_id, data FROM documents WHERE kind = ? ORDER BY game_id", (kind,))
+        for game_id, data in cursor:
+            yield game_id, loads(data)
+
+    def search(self, text: str, limit: int = 50) -> List[str]:
+        if not self.has_fts:
+            return super().search(text, limit)
+        # 每个词按前缀匹配，引号避免FTS查询语法注入
+        terms = " ".join('"' + term.replace('"', '""') + '"*' for term in text.split())
+        if not terms:
+            return []
+        rows = self._conn().execute(
+            "SELECT game_id FROM search WHERE search MATCH ? ORDER BY rank LIMIT ?", (terms, limit))
+        return [row[0] for row in rows]
+
+    def close(self):
+        """关闭所有线程打开的连接"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local.conn = None
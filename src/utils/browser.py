@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+import subprocess
+from typing import Optional
+
+DRIVER_CACHE_FILE = "games/cache/chromedriver.json"
+
+# 所有无头浏览器共用的启动参数
+CHROME_ARGS = (
+    "--headless=new",
+    "--disable-gpu",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--log-level=3",
+)
+
+BROWSER_CANDIDATES = (
+    "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+)
+
+logger = logging.getLogger(__name__)
+_resolved_path = None
+_resolve_lock = threading.Lock()
+
+
+def _binary_version(path: str) -> Optional[str]:
+    """运行 <程序> --version 取得版本号，如 "Google Chrome 124.0.6367.91" -> "124.0.6367.91" """
+    try:
+        output = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    for word in output.split():
+        if word[:1].isdigit() and "." in word:
+            return word
+    return None
+
+
+def _major(version: Optional[str]) -> Optional[str]:
+    return version.split(".")[0] if version else None
+
+
+def find_browser() -> Optional[str]:
+    """本机Chrome/Chromium的路径，CHROME_BINARY环境变量优先"""
+    for candidate in (os.environ.get("CHROME_BINARY"),) + BROWSER_CANDIDATES:
+        if not candidate:
+            continue
+        path = candidate if os.path.isabs(candidate) else shutil.which(candidate)
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+def _load_cache(cache_file: str) -> dict:
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_file: str, record: dict):
+    try:
+        os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+        tmp_path = cache_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, cache_file)
+    except OSError as e:
+        logger.warning(f"保存chromedriver缓存失败: {str(e)}")
+
+
+def _validate_cached(record: dict) -> bool:
+    """
+    离线检查缓存的chromedriver是否可用: 文件存在且可执行，并且与本机浏览器的主版本号一致。
+    浏览器文件的路径和修改时间没变时不重新读取浏览器版本。
+    """
+    path = record.get("path")
+    if not path or not os.path.isfile(path) or not os.access(path, os.X_OK):
+        return False
+    browser = find_browser()
+    if not browser:
+        # 找不到浏览器时无法比较版本，交给启动时报错
+        return True
+    mtime = os.path.getmtime(browser)
+    if record.get("browserPath") == browser and record.get("browserMtime") == mtime:
+        return True
+    browser_version = _binary_version(browser)
+    if _major(browser_version) != _major(record.get("driverVersion")):
+        logger.info(f"浏览器版本已变为 {browser_version}，缓存的chromedriver {record.get('driverVersion')} 不再适用")
+        return False
+    record.update(browserPath=browser, browserMtime=mtime, browserVersion=browser_version)
+    return True
+
+
+def resolve_chromedriver(cache_file: str = DRIVER_CACHE_FILE) -> str:
+    """
+    取得chromedriver路径
+
+    同一进程只解析一次；解析结果保存在cache_file中，之后的运行离线校验通过即可直接使用，
+    只有缓存缺失或浏览器升级后才调用webdriver_manager联网下载。设置CHROMEDRIVER_PATH环境变量时直接使用该路径。
+    """
+    global _resolved_path
+    if os.environ.get("CHROMEDRIVER_PATH"):
+        return os.environ["CHROMEDRIVER_PATH"]
+    with _resolve_lock:
+        if _resolved_path:
+            return _resolved_path
+
+        record = _load_cache(cache_file)
+        if record and _validate_cached(record):
+            _save_cache(cache_file, record)
+            _resolved_path = record["path"]
+            return _resolved_path
+
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        start = time.time()
+        path = ChromeDriverManager().install()
+        browser = find_browser()
+        record = {
+            "path": path,
+            "driverVersion": _binary_version(path),
+            "browserPath": browser,
+            "browserMtime": os.path.getmtime(browser) if browser else None,
+            "browserVersion": _binary_version(browser) if browser else None,
+            "resolvedAt": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        _save_cache(cache_file, record)
+        logger.info(f"已解析chromedriver {record['driverVersion']}: {path}，耗时 {time.time() - start:.1f}秒")
+        _resolved_path = path
+        return path
+
+
+def create_chrome_driver(extra_args=(), page_load_timeout: int = None):
+    """
+    启动一个无头Chrome
+    :param extra_args: 额外的启动参数
+    :param page_load_timeout: 页面加载超时时间(秒)
+    """
+    # selenium只在真正需要浏览器时导入
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    chrome_options = Options()
+    for arg in CHROME_ARGS + tuple(extra_args):
+        chrome_options.add_argument(arg)
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+    driver = webdriver.Chrome(service=Service(resolve_chromedriver()), options=chrome_options)
+    if page_load_timeout:
+        driver.set_page_load_timeout(page_load_timeout)
+    return driver
@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# 通过extra传入、会作为独立字段写入JSON日志的字段
+STRUCTURED_FIELDS = ("game_id", "stage", "duration", "site", "url")
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON，便于按game_id/stage等字段查询"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    DEBUG日志按调用位置限速，每个位置每秒最多rate条，超出的丢弃
+
+    被丢弃的条数记在同一位置下一条通过的日志的suppressed字段中。
+    INFO及以上级别不受影响。
+    """
+
+    def __init__(self, rate: float = 20, burst: int = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._buckets = {}  # (文件, 行号, 阶段) -> [令牌数, 上次更新时间, 已丢弃条数]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or not self.rate:
+            return True
+        key = (record.pathname, record.lineno, getattr(record, "stage", None))
+        now = record.created
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed, bucket[2] = bucket[2], 0
+        return True
+
+
+def setup_logging(log_dir: str = "logs", filename: str = "crawler.log", console_level=logging.INFO,
+                  max_bytes: int = 20 * 1024 * 1024, backup_count: int = 5, debug_rate: float = 20):
+    """
+    配置日志：根日志器只挂一个QueueHandler，由后台线程写文件和控制台，工作线程不等待磁盘I/O
+
+    重复调用不会重复添加处理器。
+    :param log_dir: 日志目录
+    :param filename: 日志文件名，内容为JSON Lines，按大小轮转
+    :param console_level: 控制台日志级别
+    :param max_bytes: 单个日志文件的最大字节数
+    :param backup_count: 保留的轮转文件数
+    :param debug_rate: 每个调用位置每秒最多记录的DEBUG日志条数，0表示不限制
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        os.makedirs(log_dir, exist_ok=True)
+
+        # 文件处理器 - 详细日志，JSON格式
+        file_handler = RotatingFileHandler(os.path.join(log_dir, filename), maxBytes=max_bytes,
+                                           backupCount=backup_count, encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        file_handler.setLevel(logging.DEBUG)
+
+        # 控制台处理器 - 只显示关键信息
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        console_handler.setLevel(console_level)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        # 在入队前限速，被丢弃的日志不占用队列
+        queue_handler.addFilter(RateLimitFilter(debug_rate))
+
+        root = logging.getLogger()
+        root.setLevel(logging.DEBUG)
+        root.addHandler(queue_handler)
+
+        _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """写完队列中剩余的日志并停止后台线程"""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        for handler in list(logging.getLogger().handlers):
+            if isinstance(handler, QueueHandler):
+                logging.getLogger().removeHandler(handler)
+
+
+@contextmanager
+def log_stage(logger: logging.Logger, stage: str, game_id: str = None, level=logging.DEBUG):
+    """记录一个处理阶段的耗时，日志带game_id/stage/duration字段"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = round(time.perf_counter() - start, 4)
+        logger.log(level, f"{stage} 完成, 耗时 {duration:.3f}秒",
+                   extra={"game_id": game_id, "stage": stage, "duration": duration})
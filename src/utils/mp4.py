@@ -0,0 +1,201 @@
+import os
+import struct
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 包含stco/co64的容器box，moov内只需要沿这条路径查找块偏移表
+CONTAINER_TYPES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+VIDEO_SUFFIXES = (".mp4", ".m4v", ".mov")
+COPY_CHUNK = 1024 * 1024
+MAX_MOOV_SIZE = 64 * 1024 * 1024  # moov需要整个读入内存，超过这个大小的文件不处理
+
+
+class Mp4Error(ValueError):
+    """文件不是可识别的MP4结构"""
+
+
+def iter_boxes(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int, int]]:
+    """
+    遍历[start, end)范围内的box，只读取box头
+    :return: 产出(类型, box起始偏移, box总长度, 头长度)
+    """
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        size, kind = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                raise Mp4Error(f"box {kind!r} 的64位长度不完整")
+            size = struct.unpack(">Q", large)[0]
+            header_size = 16
+        elif size == 0:
+            # 长度为0表示延伸到文件末尾
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise Mp4Error(f"box {kind!r} 长度无效: {size} (偏移 {offset})")
+        yield kind, offset, size, header_size
+        offset += size
+
+
+def top_level_boxes(path: str) -> List[Tuple[bytes, int, int, int]]:
+    with open(path, "rb") as f:
+        return list(iter_boxes(f, 0, os.path.getsize(path)))
+
+
+def needs_faststart(boxes) -> bool:
+    """
+    moov在所有mdat之后时需要移动
+    分片MP4(moof)和moov夹在多个mdat之间的文件不处理
+    """
+    kinds = [box[0] for box in boxes]
+    if b"moov" not in kinds or b"mdat" not in kinds or b"moof" in kinds:
+        return False
+    last_mdat = len(kinds) - 1 - kinds[::-1].index(b"mdat")
+    return kinds.index(b"moov") > last_mdat
+
+
+def _patch_offsets(data: bytes, delta: int, use_co64: bool) -> bytes:
+    """
+    重建一段box序列，stco/co64中的块偏移量加上delta，use_co64为True时把stco改写为co64
+    只展开CONTAINER_TYPES中的容器，其他box原样复制
+    """
+    out = []
+    offset = 0
+    while offset + 8 <= len(data):
+        size, kind = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+        if size == 1:
+            if offset + 16 > len(data):
+                raise Mp4Error(f"moov中的box {kind!r} 的64位长度不完整")
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = len(data) - offset
+        if size < header_size or offset + size > len(data):
+            raise Mp4Error(f"moov中的box {kind!r} 长度无效")
+        body = data[offset + header_size:offset + size]
+
+        if kind in CONTAINER_TYPES:
+            body = _patch_offsets(body, delta, use_co64)
+            out.append(struct.pack(">I4s", 8 + len(body), kind) + body)
+        elif kind in (b"stco", b"co64"):
+            if len(body) < 8:
+                raise Mp4Error(f"{kind.decode('latin-1')}缺少表头")
+            version_flags, count = struct.unpack_from(">II", body, 0)
+            width = "I" if kind == b"stco" else "Q"
+            if len(body) < 8 + count * struct.calcsize(f">{width}"):
+                raise Mp4Error(f"{kind.decode('latin-1')}的块偏移表不完整: {count} 项")
+            entries = struct.unpack_from(f">{count}{width}", body, 8)
+            entries = [entry + delta for entry in entries]
+            if kind == b"stco" and not use_co64:
+                if entries and max(entries) > 0xFFFFFFFF:
+                    raise OverflowError("块偏移量超出stco的32位范围")
+                table, new_kind = struct.pack(f">{count}I", *entries), b"stco"
+            else:
+                table, new_kind = struct.pack(f">{count}Q", *entries), b"co64"
+            body = struct.pack(">II", version_flags, count) + table
+            out.append(struct.pack(">I4s", 8 + len(body), new_kind) + body)
+        elif kind == b"cmov":
+            raise Mp4Error("不支持压缩的moov")
+        else:
+            out.append(data[offset:offset + size])
+        offset += size
+    return b"".join(out)
+
+
+def relocated_moov(moov: bytes, header_size: int) -> bytes:
+    """
+    生成移动到mdat之前的moov：媒体数据整体后移moov的长度，块偏移量加上同样的值
+    moov本身的长度可能因stco改写为co64而变化，因此反复计算直到稳定
+    :param moov: 原moov box的完整字节
+    :param header_size: 原moov box的头长度
+    """
+    body = moov[header_size:]
+    use_co64 = False
+    size = len(moov)
+    while True:
+        try:
+            new_body = _patch_offsets(body, size, use_co64)
+        except OverflowError:
+            use_co64 = True
+            continue
+        except struct.error as e:
+            # 其余无法按格式解析或写回的数据，与结构错误一样由调用方按无法识别的MP4处理
+            raise Mp4Error(f"moov数据无效: {str(e)}")
+        new_moov = struct.pack(">I4s", 8 + len(new_body), b"moov") + new_body
+        if len(new_moov) == size:
+            return new_moov
+        size = len(new_moov)
+
+
+def _copy_range(src: BinaryIO, dst: BinaryIO, start: int, length: int):
+    src.seek(start)
+    remaining = length
+    while remaining > 0:
+        chunk = src.read(min(COPY_CHUNK, remaining))
+        if not chunk:
+            raise Mp4Error("文件在复制过程中被截断")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def faststart(path: str) -> bool:
+    """
+    把moov移动到mdat之前(faststart)，使浏览器读到文件开头就能开始播放
+
+    只把moov读入内存，其余数据按块流式复制到临时文件后替换原文件，中断时原文件不受影响。
+    :return: 是否改写了文件，已经是faststart或不是MP4时返回False
+    """
+    boxes = top_level_boxes(path)
+    if not needs_faststart(boxes):
+        return False
+    moov_index = next(i for i, box in enumerate(boxes) if box[0] == b"moov")
+    first_mdat = next(i for i, box in enumerate(boxes) if box[0] == b"mdat")
+    _, moov_offset, moov_size, header_size = boxes[moov_index]
+    if moov_size > MAX_MOOV_SIZE:
+        raise Mp4Error(f"moov过大: {moov_size} 字节")
+
+    tmp_path = path + ".faststart.tmp"
+    try:
+        with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+            src.seek(moov_offset)
+            moov = src.read(moov_size)
+            new_moov = relocated_moov(moov, header_size)
+            for index, (kind, offset, size, _) in enumerate(boxes):
+                if index == first_mdat:
+                    dst.write(new_moov)
+                if index != moov_index:
+                    _copy_range(src, dst, offset, size)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True
+
+
+def faststart_files(paths: Iterable[str], workers: int = 4) -> Dict[str, int]:
+    """
+    在线程池中对多个文件执行faststart，文件读写期间不占用GIL
+    :return: 统计 {"rewritten", "unchanged", "failed"}
+    """
+    counters = {"rewritten": 0, "unchanged": 0, "failed": 0}
+
+    def run(path):
+        try:
+            return "rewritten" if faststart(path) else "unchanged"
+        except (OSError, Mp4Error) as e:
+            logger.warning(f"faststart处理失败: {path} - {str(e)}")
+            return "failed"
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="faststart") as pool:
+        for result in pool.map(run, paths):
+            counters[result] += 1
+    return counters
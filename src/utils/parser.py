@@ -1,145 +1,142 @@
-from bs4 import BeautifulSoup
 import re
-from typing import List, Dict
+import json
+from typing import List, Dict, Optional
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from src.models.game import Game
+from src.utils.text import sanitize_id
 import logging
 
+NEXT_DATA_PATTERN = re.compile(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+
+
+def extract_next_data(html_content: str) -> Optional[Dict]:
+    """
+    从页面HTML中提取__NEXT_DATA__数据，不构建DOM树
+    :param html_content: HTML内容
+    :return: 解析后的JSON数据，未找到时返回None
+    """
+    match = NEXT_DATA_PATTERN.search(html_content)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+
+def rating_from_percent(percent) -> float:
+    """
+    将__NEXT_DATA__中的百分制好评率换算为页面显示的5分制评分
+    页面上的评分为 1 + 4 × 好评率，例如 80 -> 4.2
+    """
+    try:
+        return round(1 + float(percent) * 4 / 100, 1)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _parse_count(value) -> int:
+    """解析可能带千分位的计数，失败时返回0"""
+    try:
+        return int(str(value).replace(',', '').strip())
+    except (TypeError, ValueError):
+        return 0
+
+
+def stats_from_page_props(page_props: Dict) -> Dict:
+    """
+    从详情页的pageProps中提取统计数据
+    :param page_props: __NEXT_DATA__.props.pageProps
+    :return: 包含rating、ratingCount、plays的字典
+    """
+    game = page_props.get('game') or {}
+    votes = _parse_count(game.get('totalVotes'))
+    return {
+        "rating": rating_from_percent(game.get('rating')) if votes else 0,
+        "ratingCount": votes,
+        "plays": _parse_count(page_props.get('pageViews'))
+    }
+
 class HtmlParser:
-    def __init__(self):
+    """通用的游戏卡片解析，供旧版Crawler使用，站点爬取由src/sites中的适配器负责"""
+
+    # 依次尝试的卡片选择器，使用第一个能匹配到元素的
+    CARD_SELECTORS = (
+        'div.Flex.Flex--fit > a.GameTile.AgGameTile',
+        'a.GameThumbLinkDesktop',
+        'a.GameThumbLinkMobile',
+        'div.GameThumb',
+        'div.game-thumb',
+    )
+    TITLE_SELECTORS = ('.GameTile__Description', 'div.GameThumbTitleContainer', 'div.title', 'h2', 'h3')
+    THUMBNAIL_SELECTORS = ('img.GameTileVideoThumbnail__Poster', 'img.GameThumbImage', 'img')
+
+    def __init__(self, base_url: str = "https://www.addictinggames.com"):
         self.logger = logging.getLogger(__name__)
-        self.base_url = "https://www.addictinggames.com"
+        self.base_url = base_url.rstrip('/')
 
     def parse_game_cards(self, html_content: str) -> List[Game]:
         """
         解析游戏卡片
         :param html_content: HTML内容
-        :return: 游戏列表
-        """
-        try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            print(f"开始解析HTML内容,长度: {len(html_content)}")
-            
-            # 使用更精确的选择器
-            selector = 'div.Flex.Flex--fit > a.GameTile.AgGameTile'
-            game_elements = soup.select(selector)
-            print(f"\n使用选择器 '{selector}' 找到 {len(game_elements)} 个元素")
-            
-            if game_elements:
-                # 打印第一个元素的HTML结构
-                print(f"\n第一个游戏卡片的HTML结构:")
-                print(game_elements[0].prettify())
-            
-            games = []
-            for element in game_elements:
-                try:
-                    # 获取游戏标题
-                    title_element = element.select_one('.GameTile__Description')
-                    if title_element:
-                        title = title_element.text.strip()
-                        print(f"\n找到游戏: {title}")
-                    else:
-                        print("未找到标题元素")
-                        continue
-                        
-                    # 获取游戏URL
-                    url = element.get('href')
-                    if url:
-                        url = url if url.startswith('http') else self.base_url + url
-                        print(f"URL: {url}")
-                    else:
-                        print("未找到URL")
-                        continue
-                        
-                    # 获取缩略图
-                    thumbnail_element = element.select_one('img.GameTileVideoThumbnail__Poster')
-                    thumbnail = thumbnail_element.get('src') if thumbnail_element else None
-                    if thumbnail:
-                        print(f"缩略图: {thumbnail}")
-                    else:
-                        print("未找到缩略图")
-                    
-                    # 获取视频源
-                    video_element = element.select_one('video.GameTileVideoThumbnail__Video source')
-                    video = video_element.get('src') if video_element else None
-                    if video:
-                        print(f"视频源: {video}")
-                    else:
-                        print("未找到视频源")
-                    
-                    # 创建游戏对象
-                    game = Game(
-                        title=title,
-                        url=url,
-                        thumbnail=thumbnail,
-                        video=video
-                    )
-                    games.append(game)
-                    
-                except Exception as e:
-                    print(f"解析游戏卡片时出错: {str(e)}")
-                    continue
-            
-            print(f"\n总共找到 {len(games)} 个游戏")
-            return games
-            
-        except Exception as e:
-            print(f"解析HTML时出错: {str(e)}")
-            return []
-
-    def parse_game_list(self, html_content: str) -> List[Game]:
-        """
-        解析游戏列表
-        :param html_content: HTML内容
-        :return: 游戏列表
+        :return: 游戏列表，每个游戏只有id、title、url(详情页地址)、thumbnailUrl、previewVideoUrl
         """
-        return self.parse_game_cards(html_content)
+        from bs4 import BeautifulSoup
 
-    def parse_game_cards(self, html_content: str) -> List[Dict]:
-        """
-        解析游戏卡片数据
-        :param html_content: HTML内容
-        :return: 游戏卡片列表
-        """
         soup = BeautifulSoup(html_content, 'html.parser')
-        games = []
-
-        # 打印HTML内容的一部分用于调试
-        print("HTML content preview:", html_content[:1000])
+        cards = []
+        for selector in self.CARD_SELECTORS:
+            cards = soup.select(selector)
+            if cards:
+                self.logger.debug(f"使用选择器 '{selector}' 找到 {len(cards)} 个游戏卡片")
+                break
 
-        # 尝试不同的选择器
-        game_cards = soup.find_all('a', class_='GameThumbLinkDesktop') or \
-                    soup.find_all('a', class_='GameThumbLinkMobile') or \
-                    soup.find_all('div', class_='GameThumb') or \
-                    soup.find_all('div', class_='game-thumb')
-
-        print(f"找到{len(game_cards)}个游戏卡片")
-
-        for card in game_cards:
+        games = []
+        for card in cards:
             try:
-                # 尝试不同的选择器组合来获取游戏信息
-                title_elem = card.find('div', class_='GameThumbTitleContainer') or \
-                           card.find('div', class_='title') or \
-                           card.find('h2') or \
-                           card.find('h3')
-                
-                img_elem = card.find('img', class_='GameThumbImage') or \
-                          card.find('img')
-                
-                video_elem = card.find('video')
-
-                game = {
-                    'title': title_elem.text.strip() if title_elem else "未知游戏",
-                    'url': card.get('href', '') if card.name == 'a' else card.find('a').get('href', '') if card.find('a') else "",
-                    'thumbnail': img_elem['src'] if img_elem and 'src' in img_elem.attrs else "",
-                    'video': video_elem.find('source')['src'] if video_elem and video_elem.find('source') else ""
-                }
-                games.append(game)
-                print(f"解析到游戏: {game['title']}")
+                game = self.parse_card(card)
             except Exception as e:
                 self.logger.error(f"解析游戏卡片时出错: {str(e)}")
                 continue
+            if game is not None:
+                games.append(game)
+        self.logger.info(f"解析到 {len(games)} 个游戏")
+        return games
 
-        return games 
\ No newline at end of file
+    def parse_card(self, card) -> Optional[Game]:
+        """解析单个游戏卡片，缺少标题或地址时返回None"""
+        title_elem = self._select_first(card, self.TITLE_SELECTORS)
+        link = card if card.name == 'a' else card.find('a')
+        url = link.get('href', '') if link else ''
+        if not title_elem or not title_elem.text.strip() or not url:
+            return None
+        title = title_elem.text.strip()
+        url = url if url.startswith('http') else self.base_url + url
+
+        thumbnail = self._select_first(card, self.THUMBNAIL_SELECTORS)
+        video = card.select_one('video source')
+        return Game(
+            id=sanitize_id(title),  # 与站点适配器的game_id相同，按标题生成
+            title=title,
+            url=url,
+            thumbnailUrl=thumbnail.get('src', '') if thumbnail else '',
+            previewVideoUrl=video.get('src', '') if video else '',
+        ).validate()
+
+    @staticmethod
+    def _select_first(element, selectors):
+        for selector in selectors:
+            found = element.select_one(selector)
+            if found:
+                return found
+        return None
+
+    def parse_game_list(self, html_content: str) -> List[Game]:
+        """
+        解析游戏列表
+        :param html_content: HTML内容
+        :return: 游戏列表
+        """
+        return self.parse_game_cards(html_content)
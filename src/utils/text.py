@@ -0,0 +1,16 @@
+import re
+
+
+def sanitize_id(text: str) -> str:
+    """生成安全的ID，去除特殊字符"""
+    # 将标题转换为小写并替换空格为下划线
+    id_text = text.lower().replace(" ", "_")
+    
+    # 移除所有不适合作为文件夹名的字符
+    id_text = re.sub(r'[^\w\-]', '_', id_text)
+    
+    # 确保没有连续的下划线
+    id_text = re.sub(r'_+', '_', id_text)
+    
+    # 去除首尾的下划线
+    return id_text.strip('_')
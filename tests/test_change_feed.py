@@ -0,0 +1,64 @@
+from src.core.change_feed import ChangeFeed
+
+
+def emit_many(feed, count, start=0):
+    return [feed.emit("game_updated", f"game{i}", fields=["title"]) for i in range(start, start + count)]
+
+
+def test_offsets_are_byte_positions_and_reads_resume(tmp_path):
+    feed = ChangeFeed(str(tmp_path / "feed"))
+    offsets = emit_many(feed, 5)
+    assert offsets[0] == 0 and offsets == sorted(offsets)
+
+    events, next_offset = feed.read(0, limit=2)
+    assert [event["gameId"] for event in events] == ["game0", "game1"]
+    assert next_offset == offsets[2]
+
+    events, next_offset = feed.read(next_offset)
+    assert [event["offset"] for event in events] == offsets[2:]
+    assert next_offset == feed.end_offset()
+    assert feed.read(next_offset) == ([], next_offset)
+
+
+def test_reads_cross_segment_rotation(tmp_path):
+    feed = ChangeFeed(str(tmp_path / "feed"), max_segment_bytes=300, keep_segments=100)
+    offsets = emit_many(feed, 20)
+    segments = feed.segments()
+    assert len(segments) > 1
+    # 分段文件名是该分段第一个事件的偏移量
+    assert all(base in offsets for base, _ in segments)
+
+    collected, offset = [], 0
+    while True:
+        events, offset = feed.read(offset, limit=3)
+        if not events:
+            break
+        collected.extend(events)
+    assert [event["offset"] for event in collected] == offsets
+    assert offset == feed.end_offset()
+
+    # 从任意事件的偏移量开始读取都从该事件开始
+    for index in (1, 7, 19):
+        events, _ = feed.read(offsets[index], limit=1)
+        assert events[0]["gameId"] == f"game{index}"
+
+
+def test_offset_before_pruned_segments_starts_at_oldest(tmp_path):
+    feed = ChangeFeed(str(tmp_path / "feed"), max_segment_bytes=200, keep_segments=2)
+    offsets = emit_many(feed, 30)
+    oldest = feed.segments()[0][0]
+    assert oldest > 0
+    events, _ = feed.read(0, limit=1)
+    assert events[0]["offset"] == oldest
+    assert feed.read(oldest, limit=100)[0][-1]["offset"] == offsets[-1]
+
+
+def test_partial_line_is_left_for_next_read(tmp_path):
+    feed = ChangeFeed(str(tmp_path / "feed"))
+    emit_many(feed, 2)
+    end = feed.end_offset()
+    _, path = feed.segments()[-1]
+    with open(path, "ab") as f:
+        f.write(b'{"type": "game_added"')
+    events, next_offset = feed.read(0)
+    assert len(events) == 2 and next_offset == end
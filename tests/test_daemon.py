@@ -0,0 +1,25 @@
+import pytest
+
+from src.core.daemon import parse_interval
+
+
+@pytest.mark.parametrize("value, seconds", [
+    (90, 90.0),
+    (1.5, 1.5),
+    ("90", 90.0),
+    ("90s", 90.0),
+    ("15m", 900.0),
+    ("24h", 86400.0),
+    ("1d", 86400.0),
+    ("1h30m", 5400.0),
+    ("0.5h", 1800.0),
+    (" 2H ", 7200.0),
+])
+def test_parse_interval(value, seconds):
+    assert parse_interval(value) == seconds
+
+
+@pytest.mark.parametrize("value", ["", "abc", "10x", "1h 30m", "h", 0, "0s", -5])
+def test_parse_interval_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        parse_interval(value)
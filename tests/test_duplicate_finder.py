@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.core.duplicate_finder import banded_pairs, clusters_from_pairs, near_pairs
+
+
+def pair_set(pairs):
+    i, j, distances = pairs
+    return {(int(a), int(b), int(d)) for a, b, d in zip(i, j, distances)}
+
+
+def random_hashes(count, seed, near_fraction=0.3):
+    """随机哈希，其中一部分由已有哈希翻转少量位得到，保证存在距离较近的对"""
+    rng = np.random.default_rng(seed)
+    hashes = rng.integers(0, np.iinfo(np.uint64).max, size=count, dtype=np.uint64, endpoint=True)
+    for index in rng.choice(count, size=int(count * near_fraction), replace=False):
+        source = hashes[rng.integers(count)]
+        flips = rng.choice(64, size=rng.integers(0, 10), replace=False)
+        mask = np.uint64(0)
+        for bit in flips:
+            mask |= np.uint64(1) << np.uint64(bit)
+        hashes[index] = source ^ mask
+    return np.unique(hashes)
+
+
+@pytest.mark.parametrize("threshold, bands", [(0, 4), (3, 4), (6, 4), (8, 4), (6, 2), (10, 5), (12, 3)])
+def test_banded_pairs_matches_brute_force(threshold, bands):
+    hashes = random_hashes(600, seed=threshold * 10 + bands)
+    expected = pair_set(near_pairs(hashes, threshold))
+    # 哈希已去重，阈值为0时没有满足条件的对，其余情况测试数据中确实有满足条件的对
+    assert bool(expected) == (threshold > 0)
+    assert pair_set(banded_pairs(hashes, threshold, bands)) == expected
+
+
+def test_near_pairs_distances():
+    hashes = np.array([0b0000, 0b0001, 0b0111, 0xFFFF000000000000], dtype=np.uint64)
+    assert pair_set(near_pairs(hashes, 2)) == {(0, 1, 1), (1, 2, 2)}
+    assert pair_set(near_pairs(hashes, 0)) == set()
+
+
+def test_empty_and_single_inputs():
+    for hashes in (np.zeros(0, dtype=np.uint64), np.array([5], dtype=np.uint64)):
+        assert pair_set(near_pairs(hashes, 6)) == set()
+        assert pair_set(banded_pairs(hashes, 6)) == set()
+
+
+def test_clusters_from_pairs():
+    clusters = clusters_from_pairs(6, np.array([0, 1, 4]), np.array([1, 2, 5]))
+    assert sorted(sorted(cluster) for cluster in clusters) == [[0, 1, 2], [4, 5]]
@@ -0,0 +1,47 @@
+import pytest
+
+from src.core.embed_checker import DEAD_CONFIRMATIONS, frame_block_reason, is_dead
+
+SITE = "https://games.example.com"
+EMBED = "https://cdn.example.net/game/index.html"
+
+
+@pytest.mark.parametrize("health, dead", [
+    (None, False),
+    ({}, False),
+    ({"status": "ok"}, False),
+    ({"status": "error", "reason": "请求超时"}, False),
+    ({"status": "blocked"}, True),
+    ({"status": "unsupported"}, True),
+    ({"status": "dead", "failures": 1}, False),
+    ({"status": "dead", "failures": DEAD_CONFIRMATIONS}, True),
+])
+def test_is_dead(health, dead):
+    assert is_dead(health) is dead
+
+
+@pytest.mark.parametrize("headers, url, site, blocked", [
+    ({}, EMBED, SITE, False),
+    ({"X-Frame-Options": "DENY"}, EMBED, SITE, True),
+    ({"X-Frame-Options": "SAMEORIGIN"}, EMBED, SITE, True),
+    ({"X-Frame-Options": "SAMEORIGIN"}, f"{SITE}/game.html", SITE, False),
+    ({"X-Frame-Options": "ALLOWALL"}, EMBED, SITE, False),
+    ({"Content-Security-Policy": "frame-ancestors *"}, EMBED, SITE, False),
+    ({"Content-Security-Policy": "frame-ancestors 'none'"}, EMBED, SITE, True),
+    ({"Content-Security-Policy": "frame-ancestors 'self'"}, EMBED, SITE, True),
+    ({"Content-Security-Policy": "frame-ancestors 'self'"}, f"{SITE}/game.html", SITE, False),
+    ({"Content-Security-Policy": "frame-ancestors https://*.example.com"}, EMBED, SITE, False),
+    ({"Content-Security-Policy": "frame-ancestors http://*.example.com"}, EMBED, SITE, True),
+    ({"Content-Security-Policy": "frame-ancestors games.example.com"}, EMBED, SITE, False),
+    ({"Content-Security-Policy": "frame-ancestors https://other.org"}, EMBED, SITE, True),
+    ({"Content-Security-Policy": "frame-ancestors https://other.org"}, EMBED, None, True),
+    ({"Content-Security-Policy": "default-src 'self'"}, EMBED, SITE, False),
+])
+def test_frame_block_reason(headers, url, site, blocked):
+    assert (frame_block_reason(headers, url, site) is not None) is blocked
+
+
+def test_frame_ancestors_takes_precedence_over_x_frame_options():
+    headers = {"Content-Security-Policy": "script-src 'self'; frame-ancestors *", "X-Frame-Options": "DENY"}
+    assert frame_block_reason(headers, EMBED, SITE) is None
+    assert frame_block_reason({"X-Frame-Options": "DENY"}, EMBED, SITE) == "X-Frame-Options: DENY"
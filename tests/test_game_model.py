@@ -0,0 +1,75 @@
+import pytest
+
+from src.models.game import Game, GameComments, GameStats, SchemaError, dumps, loads
+
+
+def make_game(**values):
+    data = {"id": "space_race", "title": "Space Race", "category": "Racing", "tags": ["cars"],
+            "thumbnailUrl": "/games/assets/space_race/thumbnail.png", "health": {"status": "ok"}}
+    data.update(values)
+    return Game.from_dict(data)
+
+
+def test_unknown_keys_round_trip_through_extra():
+    game = make_game()
+    assert game["health"] == {"status": "ok"} and "health" in game
+    data = game.to_dict()
+    assert list(data)[:2] == ["id", "title"] and list(data)[-1] == "health"
+    assert Game.from_dict(data) == game
+    assert loads(game.to_json()) == data
+
+
+@pytest.mark.parametrize("values", [
+    {"title": 3},
+    {"tags": "cars"},
+    {"tags": ["cars", 1]},
+    {"title": ""},
+    {"device": []},
+])
+def test_validate_rejects_wrong_types(values):
+    with pytest.raises(SchemaError):
+        make_game(**values)
+
+
+def test_validate_can_be_skipped():
+    assert Game.from_dict({"id": "x", "title": 3}, validate=False)["title"] == 3
+
+
+@pytest.mark.parametrize("values", [
+    {"rating": 5.5},
+    {"rating": -1},
+    {"plays": -1},
+    {"plays": True},
+    {"ratingCount": 1.5},
+])
+def test_stats_range_checks(values):
+    with pytest.raises(SchemaError):
+        GameStats.from_dict(dict({"id": "g", "plays": 10, "rating": 4.2, "ratingCount": 3}, **values))
+
+
+def test_pack_unpack_round_trip():
+    game = make_game(screenshots=["/games/assets/space_race/screenshots/1.webp"])
+    restored = Game.unpack(game.pack())
+    assert restored == game and restored.extra == {"health": {"status": "ok"}}
+
+    comments = GameComments.from_dict({"id": "g", "comments": [{"id": "1", "user": "u", "content": "fun",
+                                                                "rating": 5, "date": "2024-01-01"}]})
+    restored = GameComments.unpack(comments.pack())
+    assert restored == comments
+    assert restored.comments[0]["content"] == "fun"
+
+
+def test_unpack_rejects_other_record_types():
+    with pytest.raises(SchemaError):
+        GameStats.unpack(make_game().pack())
+
+
+def test_nested_comments_are_validated():
+    with pytest.raises(SchemaError):
+        GameComments.from_dict({"id": "g", "comments": [{"id": "1", "rating": "five"}]})
+
+
+def test_dumps_accepts_records_and_plain_data():
+    game = make_game()
+    assert loads(dumps({"games": [game]})) == {"games": [game.to_dict()]}
+    assert "Space Race" in dumps(game, indent=True)
@@ -0,0 +1,75 @@
+import json
+import logging
+from urllib.parse import urlparse
+
+import pytest
+
+from src.core.crawler import GameCrawler
+from src.server.site_simulator import SiteSimulator
+from src.sites import AddictingGamesAdapter
+from src.storage import create_store
+
+SIMULATED_BASE_URL = "http://simulator.local"
+
+
+class SimulatedPageCrawler(GameCrawler):
+    """
+    直接调用SiteSimulator渲染页面的爬虫，不启动浏览器、不访问网络
+
+    列表和详情页的HTML与通过HTTP访问模拟站点得到的完全相同，调度、增量比较、解析和写入都走正常流程。
+    """
+
+    def __init__(self, simulator: SiteSimulator):
+        super().__init__(storage=create_store("json"), adapters=[AddictingGamesAdapter(base_url=SIMULATED_BASE_URL)])
+        self.simulator = simulator
+        self.fetch_assets = False
+        self.extract_workers = 0
+
+    def discover_games(self):
+        adapter = self.adapters[0]
+        pages = -(-len(self.simulator.catalog.games) // self.simulator.page_size)
+        html = "".join(self.simulator.render_tiles(page) for page in range(1, pages + 1))
+        return {adapter.name: adapter.parse_listing(html)}
+
+    def get_thread_driver(self):
+        return None
+
+    def _load_detail_page(self, driver, adapter, game_url: str, game_id: str) -> str:
+        _, status, _, body = self.simulator.route(urlparse(game_url).path)
+        if status != 200:
+            raise RuntimeError(f"模拟站点返回 {status}: {game_url}")
+        return body.decode("utf-8")
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # 爬虫使用相对路径(games/、crawl_progress.json)，在临时目录中运行
+    monkeypatch.chdir(tmp_path)
+    logging.disable(logging.CRITICAL)
+    yield tmp_path
+    logging.disable(logging.NOTSET)
+
+
+def test_added_removed_and_renamed_games_across_generations(workdir):
+    """每一代结束后列表中的游戏(包括改名后的新ID)都有元数据且在架，消失和改名前的旧ID都已标记下架"""
+    simulator = SiteSimulator(games=120, seed=1, churn=0.2, latency=(0, 0))
+    adapter = AddictingGamesAdapter(base_url=SIMULATED_BASE_URL)
+    crawler = SimulatedPageCrawler(simulator)
+    seen_ids = set()
+    renamed_total = 0
+    for generation in range(3):
+        if generation:
+            simulator.catalog.advance()
+        crawler.crawl()
+        catalog = simulator.catalog
+        listed = {adapter.game_id(catalog.title(game)) for game in catalog.games}
+        renamed_total += sum(1 for game in catalog.games if catalog.renamed.get(game.index) == generation)
+        with open("games/metadata/index.json", "r", encoding="utf-8") as f:
+            index = {game["id"]: game for game in json.load(f)["games"]}
+
+        assert sorted(game_id for game_id in listed if not crawler.storage.exists(game_id, "info")) == []
+        assert sorted(game_id for game_id in listed if game_id not in index or index[game_id].get("removed")) == []
+        assert sorted(game_id for game_id in seen_ids - listed if not index.get(game_id, {}).get("removed")) == []
+        seen_ids |= listed
+    # 确认模拟站点确实产生了改名，否则上面的检查没有覆盖改名
+    assert renamed_total > 0
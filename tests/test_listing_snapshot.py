@@ -0,0 +1,40 @@
+from src.core.listing_snapshot import ListingSnapshotStore, diff_snapshots
+
+
+def entries(*pairs):
+    return ListingSnapshotStore.build([{"url": url, "id": game_id, "title": game_id} for url, game_id in pairs])
+
+
+def test_identical_snapshots_have_no_changes():
+    snapshot = entries(("/a", "a"), ("/b", "b"))
+    diff = diff_snapshots(snapshot, snapshot)
+    assert diff.summary() == {"added": 0, "removed": 0, "renamed": 0}
+    assert diff.changed_urls == set()
+
+
+def test_added_removed_and_renamed_urls():
+    old = entries(("/a", "a"), ("/b", "b"), ("/c", "c"), ("/e", "e"))
+    new = entries(("/b", "b"), ("/c", "c_remastered"), ("/d", "d"), ("/f", "f"))
+    diff = diff_snapshots(old, new)
+    assert [entry["url"] for entry in diff.added] == ["/d", "/f"]
+    assert [entry["url"] for entry in diff.removed] == ["/a", "/e"]
+    assert [(old_entry["id"], new_entry["id"]) for old_entry, new_entry in diff.renamed] == [("c", "c_remastered")]
+    # 新增和改名的URL需要重新爬取
+    assert diff.changed_urls == {"/c", "/d", "/f"}
+    assert diff.to_dict()["renamed"] == [{"url": "/c", "from": "c", "to": "c_remastered"}]
+
+
+def test_empty_sides():
+    snapshot = entries(("/a", "a"), ("/b", "b"))
+    assert diff_snapshots([], snapshot).summary() == {"added": 2, "removed": 0, "renamed": 0}
+    assert diff_snapshots(snapshot, []).summary() == {"added": 0, "removed": 2, "renamed": 0}
+
+
+def test_build_sorts_and_deduplicates_by_url():
+    snapshot = ListingSnapshotStore.build([
+        {"url": "/b", "id": "b", "title": "B"},
+        {"url": "/a", "id": "a", "title": "A"},
+        {"url": "/b", "id": "b2", "title": "B2"},
+        {"url": "", "id": "x", "title": "X"},
+    ])
+    assert [(entry["url"], entry["id"]) for entry in snapshot] == [("/a", "a"), ("/b", "b2")]
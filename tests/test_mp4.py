@@ -0,0 +1,93 @@
+import struct
+
+import pytest
+
+from src.utils.mp4 import Mp4Error, faststart, faststart_files, iter_boxes, relocated_moov, top_level_boxes
+
+
+def box(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(body), kind) + body
+
+
+def moov_with(table: bytes) -> bytes:
+    return box(b"moov", box(b"mvhd", b"\0" * 20) +
+               box(b"trak", box(b"mdia", box(b"minf", box(b"stbl", table)))))
+
+
+def stco(*offsets) -> bytes:
+    return box(b"stco", struct.pack(f">II{len(offsets)}I", 0, len(offsets), *offsets))
+
+
+def chunk_offsets(moov: bytes):
+    """按类型返回moov中唯一一个stco/co64的块偏移量"""
+    kinds = {b"stco": "I", b"co64": "Q"}
+    for kind, width in kinds.items():
+        position = moov.find(kind)
+        if position >= 0:
+            body = moov[position + 4:]
+            count = struct.unpack_from(">I", body, 4)[0]
+            return kind, list(struct.unpack_from(f">{count}{width}", body, 8))
+    raise AssertionError("moov中没有块偏移表")
+
+
+def test_relocated_moov_shifts_chunk_offsets_by_moov_size():
+    moov = moov_with(stco(100, 200, 300))
+    new_moov = relocated_moov(moov, 8)
+    assert len(new_moov) == len(moov)
+    assert chunk_offsets(new_moov) == (b"stco", [100 + len(moov), 200 + len(moov), 300 + len(moov)])
+    # stco以外的box原样保留
+    assert new_moov.replace(new_moov[new_moov.find(b"stco") - 4:], b"") == \
+        moov.replace(moov[moov.find(b"stco") - 4:], b"")
+
+
+def test_relocated_moov_promotes_stco_to_co64_on_overflow():
+    moov = moov_with(stco(0xFFFFFFF0, 10))
+    new_moov = relocated_moov(moov, 8)
+    kind, offsets = chunk_offsets(new_moov)
+    # co64每项多4个字节，偏移量按改写后的moov长度计算
+    assert kind == b"co64"
+    assert len(new_moov) == len(moov) + 8
+    assert offsets == [0xFFFFFFF0 + len(new_moov), 10 + len(new_moov)]
+
+
+@pytest.mark.parametrize("table", [
+    box(b"stco", struct.pack(">II", 0, 5) + struct.pack(">I", 1)),  # 项数多于实际数据
+    box(b"stco", b"\0\0"),                                           # 缺少表头
+    struct.pack(">I4s", 1, b"free"),                                 # 64位长度不完整
+])
+def test_relocated_moov_rejects_truncated_tables(table):
+    with pytest.raises(Mp4Error):
+        relocated_moov(moov_with(table), 8)
+
+
+def test_faststart_moves_moov_and_keeps_offsets_pointing_at_media(tmp_path):
+    ftyp = box(b"ftyp", b"isom\0\0\0\0")
+    payload = b"FRAME-ONE" + b"FRAME-TWO"
+    data_start = len(ftyp) + 8
+    moov = moov_with(stco(data_start, data_start + 9))
+    path = tmp_path / "preview.mp4"
+    path.write_bytes(ftyp + box(b"mdat", payload) + moov)
+
+    assert faststart(str(path)) is True
+    data = path.read_bytes()
+    assert [kind for kind, *_ in top_level_boxes(str(path))] == [b"ftyp", b"moov", b"mdat"]
+    _, offsets = chunk_offsets(data)
+    assert [data[offset:offset + 9] for offset in offsets] == [b"FRAME-ONE", b"FRAME-TWO"]
+    # 已经是faststart的文件不再改写
+    assert faststart(str(path)) is False
+
+
+def test_faststart_files_counts_failures_without_aborting(tmp_path):
+    ftyp = box(b"ftyp", b"isom")
+    good = tmp_path / "good.mp4"
+    good.write_bytes(ftyp + box(b"mdat", b"x" * 10) + moov_with(stco(len(ftyp) + 8)))
+    bad = tmp_path / "bad.mp4"
+    bad.write_bytes(ftyp + box(b"mdat", b"x" * 10) + moov_with(box(b"stco", struct.pack(">II", 0, 9))))
+    assert faststart_files([str(bad), str(good)], workers=2) == {"rewritten": 1, "unchanged": 0, "failed": 1}
+
+
+def test_iter_boxes_rejects_box_past_end(tmp_path):
+    path = tmp_path / "broken.mp4"
+    path.write_bytes(box(b"ftyp", b"isom") + struct.pack(">I4s", 100, b"mdat") + b"x" * 10)
+    with open(path, "rb") as f, pytest.raises(Mp4Error):
+        list(iter_boxes(f, 0, path.stat().st_size))
@@ -0,0 +1,20 @@
+import pytest
+
+from src.utils.parser import rating_from_percent
+
+
+@pytest.mark.parametrize("percent, rating", [
+    (0, 1.0),
+    (100, 5.0),
+    (80, 4.2),
+    (50, 3.0),
+    ("75", 4.0),
+    (87.5, 4.5),
+])
+def test_rating_from_percent(percent, rating):
+    assert rating_from_percent(percent) == rating
+
+
+@pytest.mark.parametrize("value", [None, "", "n/a", [80]])
+def test_rating_from_percent_invalid_values(value):
+    assert rating_from_percent(value) == 0
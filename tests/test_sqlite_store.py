@@ -0,0 +1,36 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src.storage.sqlite_store import SqliteStore
+
+
+def test_close_closes_connections_from_every_thread(tmp_path):
+    store = SqliteStore(str(tmp_path / "catalog.db"))
+    store.put("main", "info", {"id": "main"})
+    connections = []
+
+    def worker(index):
+        store.put(f"game-{index}", "info", {"id": f"game-{index}"})
+        connections.append(store._conn())
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(map(id, connections))) == 3
+    store.close()
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_store_reopens_connection_after_close(tmp_path):
+    store = SqliteStore(str(tmp_path / "catalog.db"))
+    store.put("game", "info", {"id": "game", "title": "Game"})
+    store.close()
+    assert store.get("game", "info")["title"] == "Game"
+    store.close()
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from src.core.work_queue import BoundedWorkQueue
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_results_are_delivered_for_every_item():
+    results = []
+    lock = threading.Lock()
+
+    def on_result(item, result, error):
+        with lock:
+            results.append((item, result, error))
+
+    work_queue = BoundedWorkQueue(handler=lambda item: item * 2, workers=3, on_result=on_result, poll_interval=0.05)
+    for item in range(20):
+        work_queue.put(item)
+    work_queue.join()
+    work_queue.close()
+    assert sorted(results) == [(item, item * 2, None) for item in range(20)]
+
+
+def test_handler_errors_are_passed_to_on_result():
+    errors = []
+
+    def handler(item):
+        raise ValueError(item)
+
+    work_queue = BoundedWorkQueue(handler=handler, workers=1, poll_interval=0.05,
+                                  on_result=lambda item, result, error: errors.append((item, result, error)))
+    work_queue.put("x")
+    work_queue.close()
+    assert len(errors) == 1
+    item, result, error = errors[0]
+    assert (item, result) == ("x", None) and isinstance(error, ValueError)
+
+
+def test_put_blocks_when_pending_window_is_full():
+    release = threading.Event()
+    work_queue = BoundedWorkQueue(handler=lambda item: release.wait(), workers=1, max_pending=1, poll_interval=0.05)
+    try:
+        work_queue.put(1)
+        assert wait_for(lambda: work_queue.in_flight == 1 and work_queue._queue.qsize() == 0)
+        work_queue.put(2)  # 占满等待窗口
+        with pytest.raises(Exception):
+            work_queue.put(3, timeout=0.1)
+    finally:
+        release.set()
+        work_queue.close()
+
+
+def test_resize_grows_and_shrinks_workers():
+    exits = []
+    work_queue = BoundedWorkQueue(handler=lambda item: item, workers=2, poll_interval=0.05,
+                                  on_worker_exit=lambda: exits.append(threading.get_ident()))
+    assert work_queue.worker_count == 2
+    work_queue.resize(5)
+    assert work_queue.worker_count == 5
+    work_queue.resize(1)
+    # 缩容时空闲线程在下一次轮询时退出
+    assert wait_for(lambda: work_queue.worker_count == 1)
+    assert len(exits) == 4
+    work_queue.resize(0)  # 至少保留一个线程
+    assert work_queue.worker_count == 1
+    work_queue.close()
+    assert work_queue.worker_count == 0
+    assert len(exits) == 5
+
+
+def test_close_drains_pending_items_and_rejects_new_ones():
+    done = []
+    work_queue = BoundedWorkQueue(handler=lambda item: time.sleep(0.01) or item, workers=2, max_pending=10,
+                                  on_result=lambda item, result, error: done.append(item), poll_interval=0.05)
+    for item in range(10):
+        work_queue.put(item)
+    work_queue.close(wait=True)
+    assert sorted(done) == list(range(10))
+    with pytest.raises(RuntimeError):
+        work_queue.put(11)